@@ -90,7 +90,7 @@ def second_example(my_sim: Simulator,my_simulation_parameters):
     my_transformer.connect_input(input_fieldname=my_transformer.TransformerInput,         # Connect input from my transformer
                                  src_object_name=my_rn2.ComponentName,                    # to output of second random number object
                                  src_field_name=my_rn2.RandomOutput)
-    my_sim.add_component(my_transformer)                                                  # Add my transformer to simulator
+    my_sim.add_component(my_transformer, is_cachable=True)                                # Add my transformer to simulator, its output only depends on its input
 
     # Create sum builder object
     my_sum = SumBuilderForTwoInputs(name="Sum",
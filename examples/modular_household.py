@@ -182,7 +182,8 @@ def modular_household_explicit( my_sim, my_simulation_parameters: Optional[Simul
         my_sim.add_component( my_smart_device )
         if predictive == True:
             my_smart_device_controller = smart_device.SmartDeviceController( my_simulation_parameters = my_simulation_parameters )
-            my_sim.add_component( my_smart_device_controller )
+            # the controller reads the forecasts from the simulation repository
+            my_sim.add_component( my_smart_device_controller, skip_unchanged_inputs = False )
             my_smart_device.connect_only_predefined_connections( my_smart_device_controller )
             my_smart_device_controller.connect_only_predefined_connections( my_smart_device )
         my_sim, operation_counter, electricity_load_profiles = append_to_electricity_load_profiles( 
@@ -1,11 +1,14 @@
 # Generic
 
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple, Callable
 import typing
+import copy
+import operator
 from hisim.simulationparameters import SimulationParameters
 # Package
 from hisim import loadtypes as lt
 import dataclasses as dc
+import numpy as np
 from dataclasses import dataclass
 from hisim import log
 @dataclass
@@ -41,44 +44,60 @@ class ComponentInput:
         self.src_object_name: Optional[str] = None
         self.src_field_name: Optional[str] = None
         self.SourceOutput: Optional[ComponentOutput] = None
+        # GlobalIndex of the source output, set by the simulator when the input is connected
+        self.SourceIndex: int = -1
         self.Mandatory = mandatory
 
 
 class SingleTimeStepValues:
+    """
+    Values of all outputs in one timestep, stored in a float array that is indexed
+    by the GlobalIndex of the outputs. Missing values (None) are stored as NaN.
+    """
     def __init__(self, number_of_values: int):
-        self.values = [0.0] * number_of_values  # np.ndarray([number_of_values], dtype=float)
-        #self.dict = {}
+        self.values: np.ndarray = np.zeros(number_of_values, dtype=np.float64)
 
     def copy_values_from_other(self, other):
-        self.values = other.values[:]  # [x for x in other.values]
+        np.copyto(self.values, other.values)
 
     def get_input_value(self, component_input: ComponentInput):
+        if component_input.SourceIndex >= 0:
+            return self.values.item(component_input.SourceIndex)
+        # inputs that were not connected by the simulator, e.g. set by hand in tests
         if component_input.SourceOutput is None:
             return 0
         if(component_input.SourceOutput.GlobalIndex < 0):
             raise  Exception("Globalindex for input was -1: " + component_input.SourceOutput.FullName)
-        return self.values[component_input.SourceOutput.GlobalIndex]
+        return self.values.item(component_input.SourceOutput.GlobalIndex)
 
-    def set_output_value(self, output: ComponentOutput, value: float):
+    def set_output_value(self, output: ComponentOutput, value: Optional[float]):
         if(output.GlobalIndex < 0):
              raise Exception("Output Index was not set correctly for " + output.FullName + ". GlobalIndex was " +str(output.GlobalIndex))
         if(output.GlobalIndex > len(self.values)-1):
             raise Exception("Output Index was not set correctly for " + output.FullName)
-        self.values[output.GlobalIndex] = value
-
-    def is_close_enough_to_previous(self, previous_values):
-        count = len(self.values)
-        for i in range(count):
-            if abs(previous_values.values[i] - self.values[i]) > 0.0001:
-                return False
-        return True
-
-    def get_differences_for_error_msg(self, previous_values, outputs: List[ComponentOutput]):
-        count = len(self.values)
+        try:
+            self.values[output.GlobalIndex] = value
+        except TypeError:
+            if value is not None:
+                raise Exception("The value " + str(value) + " for " + output.FullName + " is not a number.")
+            self.values[output.GlobalIndex] = np.nan
+
+    def get_changed_values(self, previous_values, absolute_tolerance: typing.Union[float, np.ndarray] = 0.0001, relative_tolerance: float = 0.0) -> np.ndarray:
+        tolerance = absolute_tolerance + relative_tolerance * np.abs(previous_values.values)
+        changed_values: np.ndarray = np.abs(self.values - previous_values.values) > tolerance
+        # comparisons with NaN are False, so values that became missing or were set for the first time are
+        # only detected by their NaN-ness
+        changed_values |= np.isnan(self.values) != np.isnan(previous_values.values)
+        return changed_values
+
+    def is_close_enough_to_previous(self, previous_values, absolute_tolerance: typing.Union[float, np.ndarray] = 0.0001, relative_tolerance: float = 0.0) -> bool:
+        return not np.any(self.get_changed_values(previous_values, absolute_tolerance, relative_tolerance))
+
+    def get_differences_for_error_msg(self, previous_values, outputs: List[ComponentOutput],
+                                      absolute_tolerance: typing.Union[float, np.ndarray] = 0.0001, relative_tolerance: float = 0.0):
         error_msg = ""
-        for i in range(count):
-            if abs(previous_values.values[i] - self.values[i]) > 0.0001:
-                error_msg += outputs[i].get_pretty_name() + " previously: " + str(previous_values.values[i]) + " currently: " + str(self.values[i])
+        for i in np.flatnonzero(self.get_changed_values(previous_values, absolute_tolerance, relative_tolerance)):
+            error_msg += outputs[i].get_pretty_name() + " previously: " + str(previous_values.values[i]) + " currently: " + str(self.values[i])
         return error_msg
 
     #def prin1t(self):
@@ -86,6 +105,75 @@ class SingleTimeStepValues:
       #  prin1t(*self.values, sep=", ")
 
 
+_snapshot_definitions: Dict[type, Tuple[Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]]] = {}
+
+
+class ComponentState:
+    """
+    Base class for component states that are saved at the beginning of every timestep and restored in every
+    iteration. The attributes of the state are either declared in __slots__ or as fields of a dataclass.
+    snapshot() returns their values as a flat tuple and restore() writes them back, which is much cheaper than
+    deepcopy. The attributes therefore must not hold mutable objects like lists.
+    """
+    __slots__: Tuple[str, ...] = ()
+
+    @classmethod
+    def get_state_attributes(cls) -> Tuple[str, ...]:
+        return cls.get_snapshot_definition()[0]
+
+    @classmethod
+    def get_snapshot_definition(cls) -> Tuple[Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]]:
+        # the attributes and the getter are determined once per class
+        if cls not in _snapshot_definitions:
+            attributes: List[str] = []
+            for klass in reversed(cls.__mro__):
+                slots: Any = klass.__dict__.get("__slots__", ())
+                attributes.extend([slots] if isinstance(slots, str) else slots)
+            if hasattr(cls, "__dataclass_fields__"):
+                attributes.extend([field.name for field in dc.fields(typing.cast(Any, cls)) if field.name not in attributes])
+            if len(attributes) == 0:
+                raise Exception("The state " + cls.__name__ + " declares neither __slots__ nor dataclass fields.")
+            getter = operator.attrgetter(*attributes)
+            # attrgetter returns a single value instead of a tuple for a single attribute
+            snapshot_getter = getter if len(attributes) > 1 else (lambda state: (getter(state),))
+            _snapshot_definitions[cls] = (tuple(attributes), snapshot_getter)
+        return _snapshot_definitions[cls]
+
+    def snapshot(self) -> Tuple[Any, ...]:
+        return self.get_snapshot_definition()[1](self)
+
+    def restore(self, snapshot: Tuple[Any, ...]):
+        for attribute, value in zip(self.get_state_attributes(), snapshot):
+            setattr(self, attribute, value)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Tuple[Any, ...]):
+        # creates a new state without calling __init__, e.g. to restore a list of states
+        state = cls.__new__(cls)
+        state.restore(snapshot)
+        return state
+
+
+def get_state_snapshot(state: Any) -> Any:
+    """
+    Saves a state: states derived from ComponentState are saved as a tuple, all others are deep copied.
+    """
+    if isinstance(state, ComponentState):
+        return state.snapshot()
+    return copy.deepcopy(state)
+
+
+def restore_state_snapshot(state: Any, snapshot: Any) -> Any:
+    """
+    Restores a state that was saved with get_state_snapshot and returns it. States derived from ComponentState
+    are restored in place.
+    """
+    if isinstance(state, ComponentState):
+        state.restore(snapshot)
+        return state
+    return copy.deepcopy(snapshot)
+
+
 class SimRepository:
     def __init__(self):
         self.my_dict = {}
@@ -229,6 +317,19 @@ class Component:
     def i_doublecheck(self, timestep: int,  stsv: SingleTimeStepValues):
         pass
 
+    def i_simulate_all(self, timesteps: int) -> Optional[Dict[ComponentOutput, np.ndarray]]:
+        # Optional: delivers the values of all outputs for all timesteps at once. This is only possible for
+        # components that neither depend on their inputs nor have side effects in i_simulate, e.g. components
+        # that read precalculated profiles. The simulator then does not call i_simulate for the component.
+        # Components that can not precalculate their outputs return None.
+        return None
+
+    def i_simulate_all_inputs(self, timesteps: int, input_values: Dict[ComponentInput, np.ndarray]) -> Optional[Dict[ComponentOutput, np.ndarray]]:
+        # Optional: like i_simulate_all for components whose outputs only depend on their inputs, without a state
+        # or side effects in i_simulate. It is only called if all connected inputs come from precomputed components,
+        # input_values then contains the values of the connected inputs for all timesteps.
+        return None
+
 ## This doesn't do anything
 if __name__ == "__main__":
     pass
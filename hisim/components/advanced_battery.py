@@ -1,11 +1,12 @@
 import numpy as np
-import copy
 
 # Owned
-from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput
+from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput, ComponentState
+from hisim.component import get_state_snapshot, restore_state_snapshot
 from hisim import loadtypes as lt
 from hisim.simulationparameters import SimulationParameters
-class AdvancedBatteryState:
+class AdvancedBatteryState(ComponentState):
+    __slots__ = ("soc", "P_bs", "_th")
 
     def __init__(self, soc: float, P_bs: float, _th):
         self.soc = soc
@@ -27,7 +28,7 @@ class AdvancedBattery(Component):
         self.build(parameter)
 
         self.state = AdvancedBatteryState(soc=0.0, P_bs=0.0, _th=False)
-        self.previous_state = copy.copy(self.state)
+        self.previous_state = get_state_snapshot(self.state)
 
 
         self.Pr_C: ComponentInput = self.add_input(self.ComponentName,
@@ -114,10 +115,10 @@ class AdvancedBattery(Component):
         pass
 
     def i_save_state(self):
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = get_state_snapshot(self.state)
 
     def i_restore_state(self):
-        self.state = copy.deepcopy(self.previous_state)
+        self.state = restore_state_snapshot(self.state, self.previous_state)
 
     def i_doublecheck(self, timestep: int, stsv: SingleTimeStepValues):
         pass
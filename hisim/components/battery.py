@@ -75,7 +75,7 @@ class Battery(cp.Component):
         self.state = SimpleStorageState(max_var_val=self.max_var_stored_energy,
                                         min_var_val=self.min_var_stored_energy,
                                         stored_energy=self.max_stored_energy*soc)
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = cp.get_state_snapshot(self.state)
 
         self.inputC : cp.ComponentInput = self.add_input(self.ComponentName,
                                                       self.ElectricityInput,
@@ -141,10 +141,10 @@ class Battery(cp.Component):
     #def i_restore_state(self):
     #    self.state = copy.copy(self.previous_state)
     def i_save_state(self):
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = cp.get_state_snapshot(self.state)
 
     def i_restore_state(self):
-        self.state = copy.deepcopy(self.previous_state)
+        self.state = cp.restore_state_snapshot(self.state, self.previous_state)
 
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
         pass
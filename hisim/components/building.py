@@ -1,6 +1,5 @@
 # Generic/Built-in
 import math
-import pvlib
 import pandas as pd
 import numpy as np
 import os
@@ -18,6 +17,8 @@ from hisim.simulationparameters import SimulationParameters
 from hisim.components.weather import Weather
 from hisim.components.occupancy import Occupancy
 from functools import lru_cache
+# pvlib takes long to import, it is only loaded when the irradiance is actually calculated
+pvlib = utils.lazy_import("pvlib")
 
 __authors__ = "Vitor Hugo Bellotto Zago"
 __copyright__ = "Copyright 2021, the House Infrastructure Project"
@@ -1,4 +1,5 @@
-from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput
+from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput, ComponentState
+from hisim.component import get_state_snapshot, restore_state_snapshot
 from hisim import loadtypes as lt
 import copy
 from hisim.components.configuration import PhysicsConfig
@@ -75,7 +76,9 @@ class CHPConfig:
     temperature_max = df_specific['temperature_max']
     delta_T=10
 
-class CHPState:
+class CHPState(ComponentState):
+    __slots__ = ("start_timestep", "electricity_output", "cycle_number", "activation")
+
     def __init__(self,
                  start_timestep=None,
                  electricity_output = 0.0,
@@ -119,7 +122,7 @@ class CHP(Component):
         self.number_of_cycles = 0
         self.number_of_cycles_previous = copy.deepcopy(self.number_of_cycles)
         self.state = CHPState(start_timestep=int(0),cycle_number=0)
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = get_state_snapshot(self.state)
 
         #the 3600 comes from Normalised chp from p_el_max=3600. Look up chp_system_lib for more information
         self.P_el_max = p_el_max
@@ -169,11 +172,11 @@ class CHP(Component):
 
 
     def i_save_state(self):
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = get_state_snapshot(self.state)
         self.number_of_cycles_previous = self.number_of_cycles
 
     def i_restore_state(self):
-        self.state = copy.deepcopy(self.previous_state)
+        self.state = restore_state_snapshot(self.state, self.previous_state)
         self.number_of_cycles = self.number_of_cycles_previous
 
     def i_doublecheck(self, timestep: int, stsv: SingleTimeStepValues):
@@ -1,4 +1,5 @@
-from typing import List
+from typing import List, Dict
+import numpy as np
 import pandas as pd
 import os
 
@@ -76,6 +77,9 @@ class CSVLoader(cp.Component):
     def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues,  force_convergence: bool):
         stsv.set_output_value(self.output1, float(self.column[timestep]) * self.multiplier)
 
+    def i_simulate_all(self, timesteps: int) -> Dict[cp.ComponentOutput, np.ndarray]:
+        return {self.output1: self.column[:timesteps, 0] * self.multiplier}
+
     def i_save_state(self):
         pass
 
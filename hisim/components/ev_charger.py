@@ -1,6 +1,5 @@
 # Generic/Built-in
 import json
-import copy
 import sqlite3
 import datetime
 import os
@@ -320,7 +319,7 @@ class Vehicle(cp.Component):
         stsv.set_output_value(self.after_capacityC, capacity)
         stsv.set_output_value(self.max_capacityC, self.max_capacity)
 
-class SimpleStorageState:
+class SimpleStorageState(cp.ComponentState):
     """
     Simplistic implementation for any type
     of energy state storage. Relevant for battery,
@@ -343,6 +342,8 @@ class SimpleStorageState:
     seconds_per_timestep : int
         Duration in seconds of one time step.
     """
+    __slots__ = ("max_var_val", "min_var_val", "stored_energy", "time_correction_factor", "seconds_per_timestep")
+
     def __init__(self,
                  max_var_val: float,
                  min_var_val: float,
@@ -459,7 +460,7 @@ class EVCharger(cp.Component):
                                         seconds_per_timestep=self.seconds_per_timestep)
 
 
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = cp.get_state_snapshot(self.state)
 
         self.charging_inputC : cp.ComponentInput = self.add_input(self.ComponentName,
                                                                self.ElectricityInput,
@@ -536,10 +537,10 @@ class EVCharger(cp.Component):
         return lines
 
     def i_save_state(self):
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = cp.get_state_snapshot(self.state)
 
     def i_restore_state(self):
-        self.state = copy.deepcopy(self.previous_state)
+        self.state = cp.restore_state_snapshot(self.state, self.previous_state)
 
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
         pass
@@ -7,7 +7,6 @@ from hisim.components.configuration import ExtendedControllerConfig
 from hisim.simulationparameters import SimulationParameters
 from hisim import log
 from math import ceil
-from copy import deepcopy
 
 class ExtendedControllerSimulation:
     def __init__(self, config: ExtendedControllerConfig):
@@ -272,17 +271,18 @@ class ExtendedController(Component):
 
     def i_save_state(self):
         # self.previous_state = self.extended_controller.begin_new_timestep()
-        self.previous_state_chp1 = deepcopy(self.state_chp1)
-        self.previous_runtime_chp1 = deepcopy(self.runtime_chp1)
-        self.previous_state_gas_heater1 = deepcopy(self.state_gas_heater1)
-        self.previous_runtime_gas_heater1 = deepcopy(self.runtime_gas_heater1)
+        # the states and runtimes are numbers, so they do not need to be copied
+        self.previous_state_chp1 = self.state_chp1
+        self.previous_runtime_chp1 = self.runtime_chp1
+        self.previous_state_gas_heater1 = self.state_gas_heater1
+        self.previous_runtime_gas_heater1 = self.runtime_gas_heater1
 
     def i_restore_state(self):
         # self.extended_controller.reset_to_last_timestep(self.previous_state)
-        self.state_chp1 = deepcopy(self.previous_state_chp1)
-        self.runtime_chp1 = deepcopy(self.previous_runtime_chp1)
-        self.state_gas_heater1 = deepcopy(self.previous_state_gas_heater1)
-        self.runtime_gas_heater1 = deepcopy(self.previous_runtime_gas_heater1)
+        self.state_chp1 = self.previous_state_chp1
+        self.runtime_chp1 = self.previous_runtime_chp1
+        self.state_gas_heater1 = self.previous_state_gas_heater1
+        self.runtime_gas_heater1 = self.previous_runtime_gas_heater1
 
     def i_simulate(self, timestep: int, stsv: SingleTimeStepValues, force_convergence: bool):
         if force_convergence:
@@ -4,7 +4,7 @@ from typing import List
 import math
 
 # Owned
-from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput
+from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput, ComponentState
 from hisim import loadtypes as lt
 from hisim.simulationparameters import SimulationParameters
 from hisim.components.configuration import PhysicsConfig
@@ -12,7 +12,8 @@ from hisim.components.configuration import WarmWaterStorageConfig
 import hisim.log as log
 #from components.extended_storage import WaterSlice
 
-class WaterSlice:
+class WaterSlice(ComponentState):
+    __slots__ = ("diameter", "area", "height", "temperature", "density", "specific_heat_capacity", "mass", "enthalpy")
 
     def check_units(self):
         """
@@ -210,10 +211,10 @@ class WarmWaterStorageSimulation:
 
     def begin_new_timestep(self):
         """
-        Deep copy of my_slices
+        Snapshot of my_slices, one tuple per slice
         -> relevant for framework. This allows to reset to the previous state
         """
-        save_values_step_1 = deepcopy(self.my_slices)
+        save_values_step_1 = [water_slice.snapshot() for water_slice in self.my_slices]
         return save_values_step_1
 
     def reset_to_last_timestep(self, save_values_step_1):
@@ -221,7 +222,7 @@ class WarmWaterStorageSimulation:
         Get back the step before
         Use together with def begin_new_timestep
         """
-        self.my_slices = deepcopy(save_values_step_1)
+        self.my_slices = [WaterSlice.from_snapshot(snapshot) for snapshot in save_values_step_1]
         return
 
     def create_water_slice(self, slice_temperature_input: float, slice_mass_input: float):
@@ -1,9 +1,9 @@
 # Import packages from standard library or the environment e.g. pandas, numpy etc.
-from copy import deepcopy
 from dataclasses import dataclass
 
 # Import modules from HiSim
-from hisim.component import Component, ComponentInput, ComponentOutput, SingleTimeStepValues
+from hisim.component import Component, ComponentInput, ComponentOutput, SingleTimeStepValues, ComponentState
+from hisim.component import get_state_snapshot, restore_state_snapshot
 from hisim.loadtypes import LoadTypes, Units
 from hisim.inputs.heat_pump_hplib import hplib as hpl
 from hisim.simulationparameters import SimulationParameters
@@ -78,7 +78,7 @@ class HeatPumpHplib(Component):
 
         # Component has states
         self.state = HeatPumpState()
-        self.previous_state = deepcopy(self.state)
+        self.previous_state = get_state_snapshot(self.state)
 
         # Load parameters from heat pump database
         self.parameters = hpl.get_parameters(self.model, self.group_id,
@@ -146,10 +146,10 @@ class HeatPumpHplib(Component):
                                                       unit=Units.Seconds)
 
     def i_save_state(self):
-        self.previous_state = deepcopy(self.state)
+        self.previous_state = get_state_snapshot(self.state)
 
     def i_restore_state(self):
-        self.state = deepcopy(self.previous_state)
+        self.state = restore_state_snapshot(self.state, self.previous_state)
 
     def i_doublecheck(self, timestep: int,  stsv: SingleTimeStepValues):
         pass
@@ -210,7 +210,7 @@ class HeatPumpHplib(Component):
         self.state.on_off_previous = on_off
 
 @dataclass
-class HeatPumpState:
+class HeatPumpState(ComponentState):
     """
     This data class saves the state of the simulation results.
 
@@ -1,4 +1,5 @@
 # Generic/Built-in
+from typing import Dict, Optional
 import pandas as pd
 import json
 import numpy as np
@@ -203,6 +204,15 @@ class Occupancy(cp.Component):
             demandforecast = self.electricity_consumption[ timestep : int( timestep + 24 * 3600 / self.my_simulation_parameters.seconds_per_timestep ) ]
             self.simulation_repository.set_entry( self.Electricity_Demand_Forecast_24h, demandforecast )
 
+    def i_simulate_all(self, timesteps: int) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        # the demand forecast has to be written to the repository in every timestep
+        if self.my_simulation_parameters.system_config.predictive == True:
+            return None
+        return {self.number_of_residentsC: np.array(self.number_of_residents[:timesteps], dtype=float),
+                self.heating_by_residentsC: np.array(self.heating_by_residents[:timesteps], dtype=float),
+                self.electricity_outputC: np.array(self.electricity_consumption[:timesteps], dtype=float),
+                self.water_consumptionC: np.array(self.water_consumption[:timesteps], dtype=float)}
+
     def build( self):
         file_exists, cache_filepath = utils.get_cache_file(component_key=self.ComponentName, parameter_class=self.occupancyConfig)
         if file_exists:
@@ -3,13 +3,12 @@ import datetime
 import math
 import os
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
-import pvlib
 from dataclasses_json import dataclass_json
 
 from dataclasses import dataclass
 from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from hisim.simulationparameters import SimulationParameters
 # Owned
 from hisim import component as cp
@@ -17,6 +16,8 @@ from hisim import loadtypes as lt
 from hisim import utils
 from hisim import log
 from hisim.components.weather import Weather
+# pvlib takes long to import, it is only loaded when the irradiance is actually calculated
+pvlib = utils.lazy_import("pvlib")
 
 __authors__ = "Vitor Hugo Bellotto Zago"
 __copyright__ = "Copyright 2021, the House Infrastructure Project"
@@ -39,8 +40,6 @@ The implementation of the tsib project can be found under the following reposito
 https://github.com/FZJ-IEK3-VSA/tsib
 """
 
-temp_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
-
 @lru_cache(maxsize=16)
 def simPhotovoltaicFast(
     dni_extra=None,
@@ -79,6 +78,7 @@ def simPhotovoltaicFast(
                                                       DHI,
                                                       dni_extra)
 
+    temp_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
     pvtemps = pvlib.temperature.sapm_cell(poa_irrad["poa_global"], temperature, wind_speed, **temp_model)
 
     pv_dc = pvlib.pvsystem.pvwatts_dc(poa_irrad["poa_global"],
@@ -90,6 +90,154 @@ def simPhotovoltaicFast(
         pv_dc = 0
     return pv_dc
 
+def simPhotovoltaicFastProfile(
+    dni_extra: np.ndarray,
+    DNI: np.ndarray,
+    DHI: np.ndarray,
+    GHI: np.ndarray,
+    azimuth: np.ndarray,
+    apparent_zenith: np.ndarray,
+    temperature: np.ndarray,
+    wind_speed: np.ndarray,
+    surface_azimuth=180,
+    surface_tilt=30) -> np.ndarray:
+    """
+    Same model as simPhotovoltaicFast, but for the weather of all timesteps at once, so every pvlib
+    function is only called once on whole arrays. Returns the output per Watt peak of every timestep.
+    """
+    profiles = simPhotovoltaicFastProfiles(dni_extra, DNI, DHI, GHI, azimuth, apparent_zenith, temperature, wind_speed,
+                                           orientations=[(surface_azimuth, surface_tilt)])
+    return profiles[:, 0]
+
+def simPhotovoltaicSapmProfiles(
+    dni_extra: np.ndarray,
+    DNI: np.ndarray,
+    DHI: np.ndarray,
+    GHI: np.ndarray,
+    azimuth: np.ndarray,
+    apparent_zenith: np.ndarray,
+    temperature: np.ndarray,
+    wind_speed: np.ndarray,
+    orientations: List[Tuple[float, float]],
+    modules: List[pd.Series],
+    inverters: List[Optional[pd.Series]],
+    albedo=0.2) -> np.ndarray:
+    """
+    Simulates PV arrays with the Sandia PV Array Performance Model and, if an inverter is given, the Sandia
+    inverter model for the weather of all timesteps, following the tutorial
+    https://github.com/pvlib/pvlib-python/blob/master/docs/tutorials/tmy_to_power.ipynb
+
+    Every array is given by its orientation as azimuth and tilt, its module and its inverter or None. The
+    position of the sun and the airmass are shared by all arrays. Returns the output per Watt peak of the
+    module with one column per array.
+    """
+    geometry = SolarGeometry(apparent_zenith, azimuth)
+    DNI = np.asarray(DNI, dtype=np.float64)
+    DHI = np.asarray(DHI, dtype=np.float64)
+    GHI = np.asarray(GHI, dtype=np.float64)
+    temperature = np.asarray(temperature, dtype=np.float64)
+    wind_speed = np.asarray(wind_speed, dtype=np.float64)
+    temp_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
+    profiles = np.zeros((len(DNI), len(orientations)))
+    # the sun is below the horizon at night, which gives invalid airmasses and no output
+    with np.errstate(invalid="ignore", divide="ignore"):
+        airmass = pvlib.atmosphere.get_relative_airmass(apparent_zenith)
+        airmass_absolute = pvlib.atmosphere.get_absolute_airmass(airmass)
+        for column, ((surface_azimuth, surface_tilt), module, inverter) in enumerate(zip(orientations, modules, inverters)):
+            aoi = np.degrees(np.arccos(geometry.get_aoi_projection(surface_azimuth, surface_tilt)))
+            # use perez model to calculate the plane of array diffuse sky radiation
+            poa_sky_diffuse = pvlib.irradiance.perez(surface_tilt, surface_azimuth, DHI, DNI, dni_extra,
+                                                     apparent_zenith, azimuth, airmass)
+            poa_ground_diffuse = pvlib.irradiance.get_ground_diffuse(surface_tilt, GHI, albedo=albedo)
+            poa_irrad = pvlib.irradiance.poa_components(aoi, DNI, poa_sky_diffuse, poa_ground_diffuse)
+            pvtemps = pvlib.temperature.sapm_cell(poa_irrad["poa_global"], temperature, wind_speed, **temp_model)
+            # calculate effective irradiance on pv module
+            sapm_irr = pvlib.pvsystem.sapm_effective_irradiance(poa_irrad["poa_direct"], poa_irrad["poa_diffuse"],
+                                                                airmass_absolute, aoi, module)
+            sapm_out = pvlib.pvsystem.sapm(sapm_irr, pvtemps, module)
+            # peak load of a single module [W]
+            peak_load = module["Impo"] * module["Vmpo"]
+            if inverter is not None:
+                ac_power = pvlib.inverter.sandia(sapm_out["v_mp"], sapm_out["p_mp"], inverter) / peak_load
+            else:
+                ac_power = sapm_out["p_mp"] / peak_load
+            # the consumption of the inverter at night is not part of the production
+            profiles[:, column] = np.maximum(np.nan_to_num(np.asarray(ac_power, dtype=np.float64), nan=0.0), 0)
+    return profiles
+
+class SolarGeometry:
+    """
+    Position of the sun in every timestep. It is calculated once and shared by all orientations of the
+    modules, which then only need a few multiplications for their angle of incidence.
+    """
+    def __init__(self, apparent_zenith: np.ndarray, azimuth: np.ndarray):
+        zenith = np.radians(np.asarray(apparent_zenith, dtype=np.float64))
+        solar_azimuth = np.radians(np.asarray(azimuth, dtype=np.float64))
+        self.cos_zenith = np.cos(zenith)
+        self.sin_zenith = np.sin(zenith)
+        self.cos_azimuth = np.cos(solar_azimuth)
+        self.sin_azimuth = np.sin(solar_azimuth)
+
+    def get_aoi_projection(self, surface_azimuth: float, surface_tilt: float) -> np.ndarray:
+        """
+        Cosine of the angle of incidence on the modules, the same as pvlib.irradiance.aoi_projection.
+        """
+        tilt = math.radians(surface_tilt)
+        module_azimuth = math.radians(surface_azimuth)
+        # cos(solar azimuth - module azimuth) from the shared sine and cosine of the solar azimuth
+        cos_azimuth_difference = self.cos_azimuth * math.cos(module_azimuth) + self.sin_azimuth * math.sin(module_azimuth)
+        projection: np.ndarray = np.clip(math.cos(tilt) * self.cos_zenith
+                                         + math.sin(tilt) * self.sin_zenith * cos_azimuth_difference, -1, 1)
+        return projection
+
+    def get_poa_global(self, DNI: np.ndarray, DHI: np.ndarray, GHI: np.ndarray, surface_azimuth: float,
+                       surface_tilt: float, albedo: float = 0.25) -> np.ndarray:
+        """
+        Irradiance on the modules with the isotropic sky model, the same as the default model of
+        pvlib.irradiance.get_total_irradiance.
+        """
+        cos_tilt = math.cos(math.radians(surface_tilt))
+        poa_direct = np.maximum(DNI * self.get_aoi_projection(surface_azimuth, surface_tilt), 0)
+        poa_sky_diffuse = DHI * (1 + cos_tilt) * 0.5
+        poa_ground_diffuse = GHI * albedo * (1 - cos_tilt) * 0.5
+        poa_global: np.ndarray = poa_direct + poa_sky_diffuse + poa_ground_diffuse
+        return poa_global
+
+def simPhotovoltaicFastProfiles(
+    dni_extra: np.ndarray,
+    DNI: np.ndarray,
+    DHI: np.ndarray,
+    GHI: np.ndarray,
+    azimuth: np.ndarray,
+    apparent_zenith: np.ndarray,
+    temperature: np.ndarray,
+    wind_speed: np.ndarray,
+    orientations: List[Tuple[float, float]]) -> np.ndarray:
+    """
+    Output per Watt peak of modules with several orientations, given as pairs of azimuth and tilt, for the
+    weather of all timesteps. The position of the sun is shared by all orientations and the cell temperature
+    and the DC output are calculated for all orientations in one call. Returns one column per orientation.
+    """
+    geometry = SolarGeometry(apparent_zenith, azimuth)
+    DNI = np.asarray(DNI, dtype=np.float64)
+    DHI = np.asarray(DHI, dtype=np.float64)
+    GHI = np.asarray(GHI, dtype=np.float64)
+    poa_global = np.stack([geometry.get_poa_global(DNI, DHI, GHI, surface_azimuth, surface_tilt)
+                           for surface_azimuth, surface_tilt in orientations], axis=1)
+
+    temp_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
+    pvtemps = pvlib.temperature.sapm_cell(poa_global,
+                                          np.asarray(temperature, dtype=np.float64)[:, np.newaxis],
+                                          np.asarray(wind_speed, dtype=np.float64)[:, np.newaxis],
+                                          **temp_model)
+
+    pv_dc = pvlib.pvsystem.pvwatts_dc(poa_global,
+                                      temp_cell=pvtemps,
+                                      pdc0=1,
+                                      gamma_pdc=-0.002,
+                                      temp_ref=25.0)
+    return np.nan_to_num(np.asarray(pv_dc, dtype=np.float64), nan=0.0)
+
 def simPhotovoltaicSimple(
     dni_extra=None,
     DNI=None,
@@ -168,6 +316,90 @@ def simPhotovoltaicSimple(
         pv_dc = 0
     return pv_dc
 
+@dataclass_json
+@dataclass
+class SandiaDatabaseConfig:
+    """
+    Key of the binary copy of a Sandia module or inverter database, it is converted again if the csv file changes.
+    """
+    filename: str
+    size: int
+    modified: float
+
+class SandiaDatabase:
+    """
+    Module or inverter parameters of the Sandia databases. The csv file with one column per entry is converted
+    once into a binary file in the cache with one array per entry, so single entries are read without parsing the
+    whole database. Non-numeric parameters are stored as NaN like in the csv import before.
+    """
+    def __init__(self, csv_filepath: str):
+        self.csv_filepath = csv_filepath
+        self.entries: Dict[str, pd.Series] = {}
+        self.indices: Optional[Dict[str, int]] = None
+
+    def open(self):
+        if self.indices is not None:
+            return
+        status = os.stat(self.csv_filepath)
+        config = SandiaDatabaseConfig(filename=os.path.basename(self.csv_filepath), size=status.st_size,
+                                      modified=status.st_mtime)
+        file_exists, self.cache_filepath = utils.get_cache_file("SandiaDatabase", config)
+        if not file_exists:
+            self.convert()
+        with np.load(self.cache_filepath) as data:
+            self.parameters = data["parameters"]
+            self.indices = {name: index for index, name in enumerate(data["names"])}
+
+    def convert(self):
+        log.information("Converting the Sandia database " + self.csv_filepath)
+        database = pd.read_csv(self.csv_filepath, index_col=0)
+        database = database.apply(pd.to_numeric, errors="coerce")
+        arrays = {"entry_" + str(index): database[name].to_numpy(dtype=np.float64)
+                  for index, name in enumerate(database.columns)}
+        # write to a temporary file first, so an interrupted conversion is not used as cache
+        temporary_filepath = self.cache_filepath + ".tmp"
+        with open(temporary_filepath, "wb") as file:
+            np.savez(file, names=np.array(database.columns, dtype=str),
+                     parameters=np.array(database.index, dtype=str), **arrays)
+        os.replace(temporary_filepath, self.cache_filepath)
+
+    def get_entry(self, name: str) -> pd.Series:
+        if name not in self.entries:
+            self.open()
+            assert self.indices is not None
+            if name not in self.indices:
+                raise KeyError("The entry " + name + " does not exist in " + self.csv_filepath)
+            with np.load(self.cache_filepath) as data:
+                values = data["entry_" + str(self.indices[name])]
+            self.entries[name] = pd.Series(values, index=self.parameters, name=name)
+        return self.entries[name]
+
+# the databases are shared by all PV systems in a process
+sandia_databases: Dict[str, SandiaDatabase] = {}
+
+def get_sandia_database(csv_filepath: str) -> SandiaDatabase:
+    if csv_filepath not in sandia_databases:
+        sandia_databases[csv_filepath] = SandiaDatabase(csv_filepath)
+    return sandia_databases[csv_filepath]
+
+# the simplified PVWatts model or the Sandia module and inverter models with the parameters from their databases
+PVWATTS = "pvwatts"
+SAPM = "sapm+inverter"
+PV_MODELS = [PVWATTS, SAPM]
+
+@dataclass_json
+@dataclass
+class PVSubArray:
+    """
+    Part of a PV system with its own orientation, power and modules, e.g. the east or the west side of a roof.
+    """
+    name: str
+    power: float
+    azimuth: float = 180
+    tilt: float = 30
+    module_name: str = "Hanwha_HSL60P6_PA_4_250T__2013_"
+    inverter_name: str = "ABB__MICRO_0_25_I_OUTD_US_208_208V__CEC_2014_"
+
 @dataclass_json
 @dataclass
 class PVSystemConfig:
@@ -178,6 +410,10 @@ class PVSystemConfig:
     integrate_inverter: bool
     inverter_name:str
     power: float
+    azimuth: float
+    tilt: float
+    sub_arrays: List[PVSubArray]
+    model: str
 
     def __init__(self,
                  my_simulation_parameters: SimulationParameters,
@@ -186,7 +422,11 @@ class PVSystemConfig:
                  power:float,
                  module_name:str,
                  integrate_inverter:bool,
-                 inverter_name:str):
+                 inverter_name:str,
+                 azimuth: float = 180,
+                 tilt: float = 30,
+                 sub_arrays: Optional[List[PVSubArray]] = None,
+                 model: str = PVWATTS):
         self.parameter_string = my_simulation_parameters.get_unique_key()
         self.time = time
         self.location = location
@@ -194,7 +434,52 @@ class PVSystemConfig:
         self.integrate_inverter = integrate_inverter
         self.inverter_name = inverter_name
         self.power = power
+        self.azimuth = azimuth
+        self.tilt = tilt
+        self.sub_arrays = [] if sub_arrays is None else sub_arrays
+        self.model = model
 
+    def get_arrays(self) -> List[PVSubArray]:
+        """
+        Returns the sub-arrays or the whole system as the only array, if it has no sub-arrays.
+        """
+        if len(self.sub_arrays) > 0:
+            return self.sub_arrays
+        return [PVSubArray(name="", power=self.power, azimuth=self.azimuth, tilt=self.tilt,
+                           module_name=self.module_name, inverter_name=self.inverter_name)]
+
+@dataclass_json
+@dataclass
+class PVProfileConfig:
+    """
+    Everything the output of a PV system per Watt peak depends on, i.e. its configuration without the power.
+    It is the key of the cached profiles, so PV systems that only differ in their size share one profile.
+    The modules and the inverter are only part of the key for the Sandia model, the PVWatts model does not use them.
+    """
+    parameter_string: str
+    time: int
+    location: str
+    module_name: Optional[str]
+    integrate_inverter: Optional[bool]
+    inverter_name: Optional[str]
+    azimuth: float
+    tilt: float
+    model: str
+
+    def __init__(self, pvconfig: PVSystemConfig, array: PVSubArray):
+        self.parameter_string = pvconfig.parameter_string
+        self.time = pvconfig.time
+        self.location = pvconfig.location
+        self.module_name = None
+        self.integrate_inverter = None
+        self.inverter_name = None
+        if pvconfig.model == SAPM:
+            self.module_name = array.module_name
+            self.integrate_inverter = pvconfig.integrate_inverter
+            self.inverter_name = array.inverter_name
+        self.azimuth = array.azimuth
+        self.tilt = array.tilt
+        self.model = pvconfig.model
 
 
 class PVSystem(cp.Component):
@@ -207,6 +492,17 @@ class PVSystem(cp.Component):
         object Location with temperature and solar data
     power: float
         Power in kWp to be provided by the PV System
+    azimuth: float
+        Azimuth of the modules in degree, 180 degree means south, 90 degree east and 270 west
+    tilt: float
+        Tilt of the modules in degree
+    sub_arrays: List[PVSubArray]
+        Parts of the system with their own orientation, power and modules. Each of them has its own
+        output in addition to the total output. The power, orientation and modules of the system are
+        not used in that case.
+    model: str
+        "pvwatts" for the simplified PVWatts model or "sapm+inverter" for the Sandia module model
+        with the parameters of the module and, if integrateInverter is set, the Sandia inverter model
 
 
     Returns:
@@ -237,12 +533,25 @@ class PVSystem(cp.Component):
                  load_module_data=False,
                  module_name="Hanwha_HSL60P6_PA_4_250T__2013_",
                  integrateInverter=True,
-                 inverter_name="ABB__MICRO_0_25_I_OUTD_US_208_208V__CEC_2014_"                 ):
+                 inverter_name="ABB__MICRO_0_25_I_OUTD_US_208_208V__CEC_2014_",
+                 azimuth=180,
+                 tilt=30,
+                 sub_arrays: Optional[List[PVSubArray]] = None,
+                 model=PVWATTS):
         super().__init__("PVSystem", my_simulation_parameters=my_simulation_parameters)
+        if model not in PV_MODELS:
+            raise ValueError("Unknown PV model " + model + ", use one of " + ", ".join(PV_MODELS))
+        if sub_arrays is not None and len(sub_arrays) > 0:
+            names = [array.name for array in sub_arrays]
+            if "" in names or len(set(names)) != len(names):
+                raise ValueError("The sub-arrays of a PV system need unique names.")
+            power = sum(array.power for array in sub_arrays)
         self.pvconfig = PVSystemConfig(my_simulation_parameters=my_simulation_parameters,
                                        location=location, power = power, module_name=module_name,
                                        integrate_inverter=integrateInverter, inverter_name=inverter_name,
-                                       time=time)
+                                       time=time, azimuth=azimuth, tilt=tilt, sub_arrays=sub_arrays, model=model)
+        self.arrays = self.pvconfig.get_arrays()
+        self.array_powers = np.array([array.power for array in self.arrays], dtype=np.float64)
         self.build(load_module_data)
 
         self.t_outC : cp.ComponentInput = self.add_input(self.ComponentName,
@@ -299,6 +608,14 @@ class PVSystem(cp.Component):
                                                              lt.LoadTypes.Electricity,
                                                              lt.Units.Watt,
                                                              False)
+        # one output per sub-array, the total output is the sum of them
+        self.array_outputs: List[cp.ComponentOutput] = []
+        for array in self.pvconfig.sub_arrays:
+            self.array_outputs.append(self.add_output(self.ComponentName,
+                                                      PVSystem.ElectricityOutput + array.name,
+                                                      lt.LoadTypes.Electricity,
+                                                      lt.Units.Watt,
+                                                      False))
 
         self.add_default_connections(Weather, self.get_weather_default_connections())
 
@@ -323,16 +640,27 @@ class PVSystem(cp.Component):
         lines = []
         lines.append("Name: {}".format(self.ComponentName))
         lines.append("Power: {:3.0f} kWp".format(self.pvconfig.power*1E-3))
-        lines.append("Module: {}".format(self.pvconfig.module_name))
-        lines.append("Inverter: {}".format(self.pvconfig.inverter_name))
+        lines.append("Model: {}".format(self.pvconfig.model))
+        if len(self.pvconfig.sub_arrays) == 0:
+            lines.append("Azimuth: {:3.0f}°, tilt: {:2.0f}°".format(self.pvconfig.azimuth, self.pvconfig.tilt))
+            lines.append("Module: {}".format(self.pvconfig.module_name))
+            lines.append("Inverter: {}".format(self.pvconfig.inverter_name))
+        for array in self.pvconfig.sub_arrays:
+            lines.append("Sub-array {}: {:3.1f} kWp, azimuth: {:3.0f}°, tilt: {:2.0f}°, module: {}, inverter: {}".format(
+                array.name, array.power * 1E-3, array.azimuth, array.tilt, array.module_name, array.inverter_name))
         return lines
 
+    def set_array_output_values(self, stsv: cp.SingleTimeStepValues, array_values: np.ndarray):
+        stsv.set_output_value(self.electricity_outputC, float(array_values.sum()))
+        for output, value in zip(self.array_outputs, array_values):
+            stsv.set_output_value(output, float(value))
+
     def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues,  force_convergence: bool):
 
         if hasattr(self, "output"):
             #if(len(self.output) < timestep)
              #   raise Exception("Somehow the precalculated list of values for the PV system seems to be incorrect. Please delete the cache.")
-            stsv.set_output_value(self.electricity_outputC, self.output[timestep] * self.pvconfig.power)
+            self.set_array_output_values(stsv, self.output[timestep] * self.array_powers)
         else:
             DNI = stsv.get_input_value(self.DNIC)
             dni_extra = stsv.get_input_value(self.DNIextraC)
@@ -360,25 +688,79 @@ class PVSystem(cp.Component):
             #                                 apparent_zenith=apparent_zenith,
             #                                 temperature=temperature,
             #                                 wind_speed=wind_speed)
-            ac_power = simPhotovoltaicFast(
-                                            dni_extra=dni_extra,
-                                            DNI=DNI,
-                                            DHI=DHI,
-                                            GHI=GHI,
-                                            azimuth=azimuth,
-                                            apparent_zenith=apparent_zenith,
-                                            temperature=temperature,
-                                            wind_speed=wind_speed)
-
-            resultingvalue = ac_power * self.pvconfig.power
+            if self.pvconfig.model == PVWATTS:
+                ac_power = np.array([simPhotovoltaicFast(
+                                                dni_extra=dni_extra,
+                                                DNI=DNI,
+                                                DHI=DHI,
+                                                GHI=GHI,
+                                                azimuth=azimuth,
+                                                apparent_zenith=apparent_zenith,
+                                                temperature=temperature,
+                                                wind_speed=wind_speed,
+                                                surface_azimuth=array.azimuth,
+                                                surface_tilt=array.tilt) for array in self.arrays])
+            else:
+                ac_power = self.calculate_profiles(*[np.array([value]) for value in [dni_extra, DNI, DHI, GHI, azimuth,
+                                                                                      apparent_zenith, temperature, wind_speed]])[0]
+
             # if you wanted to access the temperature forecast from the weather component:
             # val = self.simulation_repository.get_entry(Weather.Weather_Temperature_Forecast_24h)
-            stsv.set_output_value(self.electricity_outputC, resultingvalue)
+            self.set_array_output_values(stsv, ac_power * self.array_powers)
             self.data[timestep] = ac_power
             if timestep + 1 == self.data_length:
-                database = pd.DataFrame(self.data, columns=["output"])
-
-                database.to_csv(self.cache_filepath, sep=",", decimal=".", index=False)
+                self.write_cache()
+
+    def write_cache(self):
+        # every sub-array has its own cached profile, so it can be shared with other PV systems
+        for column, cache_filepath in enumerate(self.cache_filepaths):
+            database = pd.DataFrame(self.data[:, column], columns=["output"])
+            database.to_csv(cache_filepath, sep=",", decimal=".", index=False)
+
+    def i_simulate_all(self, timesteps: int) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        # without cached results the photovoltaic output is calculated from the weather inputs
+        if not hasattr(self, "output"):
+            return None
+        array_values = self.output[:timesteps] * self.array_powers
+        columns = {self.electricity_outputC: array_values.sum(axis=1)}
+        for column, output in enumerate(self.array_outputs):
+            columns[output] = array_values[:, column]
+        return columns
+
+    def i_simulate_all_inputs(self, timesteps: int, input_values: Dict[cp.ComponentInput, np.ndarray]) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        # if the weather is precomputed, the output of all timesteps is calculated at once and cached
+        if hasattr(self, "output"):
+            return self.i_simulate_all(timesteps)
+        if timesteps != self.my_simulation_parameters.timesteps:
+            return None
+        self.data = self.calculate_profiles(dni_extra=input_values[self.DNIextraC],
+                                            DNI=input_values[self.DNIC],
+                                            DHI=input_values[self.DHIC],
+                                            GHI=input_values[self.GHIC],
+                                            azimuth=input_values[self.azimuthC],
+                                            apparent_zenith=input_values[self.apparent_zenithC],
+                                            temperature=input_values[self.t_outC],
+                                            wind_speed=input_values[self.wind_speedC])
+        self.write_cache()
+        self.output = self.data
+        return self.i_simulate_all(timesteps)
+
+    def calculate_profiles(self, dni_extra: np.ndarray, DNI: np.ndarray, DHI: np.ndarray, GHI: np.ndarray,
+                           azimuth: np.ndarray, apparent_zenith: np.ndarray, temperature: np.ndarray,
+                           wind_speed: np.ndarray) -> np.ndarray:
+        """
+        Output per Watt peak of all sub-arrays with the chosen model for the given weather, one column per sub-array.
+        The position of the sun is shared by all sub-arrays.
+        """
+        orientations = [(array.azimuth, array.tilt) for array in self.arrays]
+        if self.pvconfig.model == PVWATTS:
+            return simPhotovoltaicFastProfiles(dni_extra, DNI, DHI, GHI, azimuth, apparent_zenith, temperature, wind_speed,
+                                               orientations=orientations)
+        self.load_module_parameters()
+        inverters: List[Optional[pd.Series]] = list(self.array_inverters) if self.pvconfig.integrate_inverter \
+            else [None] * len(self.arrays)
+        return simPhotovoltaicSapmProfiles(dni_extra, DNI, DHI, GHI, azimuth, apparent_zenith, temperature, wind_speed,
+                                           orientations=orientations, modules=self.array_modules, inverters=inverters)
 
     def get_coordinates(self, location="Aachen", year=2019):
         """
@@ -416,11 +798,18 @@ class PVSystem(cp.Component):
     def build(self,  load_module_data):
 
         log.information(self.pvconfig.to_json())  # type: ignore
-        file_exists, self.cache_filepath = utils.get_cache_file("PVSystem", self.pvconfig)
-
-        if file_exists:
-
-            self.output = pd.read_csv(self.cache_filepath, sep=',', decimal='.')['output'].tolist()
+        # the output of every sub-array is cached per Watt peak, so the power is not part of the key
+        self.cache_filepaths: List[str] = []
+        all_files_exist = True
+        for array in self.arrays:
+            file_exists, cache_filepath = utils.get_cache_file("PVSystem", PVProfileConfig(self.pvconfig, array))
+            self.cache_filepaths.append(cache_filepath)
+            all_files_exist = all_files_exist and file_exists
+
+        if all_files_exist:
+            # one column per sub-array
+            self.output = np.stack([pd.read_csv(cache_filepath, sep=',', decimal='.')['output'].to_numpy(dtype=np.float64)
+                                    for cache_filepath in self.cache_filepaths], axis=1)
             if len(self.output) !=        self.my_simulation_parameters.timesteps:
                 raise Exception("Reading the cached PV values seems to have failed. Expected "
                                 + str(self.my_simulation_parameters.timesteps) + " values, but got " + str(len(self.output )))
@@ -428,44 +817,40 @@ class PVSystem(cp.Component):
             self.get_coordinates(location = self.pvconfig.location, year =  self.pvconfig.time)
             # Factor to guarantee peak power based on module with 250 Wh
             self.ac_power_factor = math.ceil( ( self.pvconfig.power * 1e3 ) / 250 )
-            self.data = [0] * self.my_simulation_parameters.timesteps
+            self.data = np.zeros((self.my_simulation_parameters.timesteps, len(self.arrays)))
             self.data_length = self.my_simulation_parameters.timesteps
+        # the module and inverter parameters are only loaded when the Sandia model is calculated
+        self.load_module_data = load_module_data
+        #self.power = self.power
+        #self.module_name =  module_name
+        #self.inverter_name = inverter_name
+        #self.integrateInverter = integrateInverter
+        #self.simPhotovoltaicSimpleJit = simPhotovoltaicSimple
 
-
-        self.modules = pd.read_csv(
-            os.path.join(utils.HISIMPATH["photovoltaic"]["modules"]),
-            index_col=0,
-        )
-
-        self.inverters = pd.read_csv(
-            os.path.join(utils.HISIMPATH["photovoltaic"]["inverters"]),
-            index_col=0,
-        )
-
-        self.temp_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
-
-        # load the sandia data
-        if load_module_data:
+    def load_module_parameters(self):
+        """
+        Loads the Sandia parameters of the modules and inverters of all sub-arrays, if they are not loaded yet.
+        """
+        if hasattr(self, "array_modules"):
+            return
+        if self.load_module_data:
             # load module data online
             modules = pvlib.pvsystem.retrieve_sam(name="SandiaMod")
-            self.module = modules[self.pvconfig.module_name]
+            self.array_modules = [modules[array.module_name] for array in self.arrays]
             # get inverter data
             inverters = pvlib.pvsystem.retrieve_sam("cecinverter")
-            self.inverter = inverters[self.pvconfig.inverter_name]
+            self.array_inverters = [inverters[array.inverter_name] for array in self.arrays]
         else:
-            # load module and inverter data from csv
-            module = self.modules[self.pvconfig.module_name]
-            self.module = pd.to_numeric(module, errors="coerce")
-
-            inverter = self.inverters[self.pvconfig.inverter_name]
-            self.inverter = pd.to_numeric(inverter, errors="coerce")
-        #self.power = self.power
-        #self.module_name =  module_name
-        #self.inverter_name = inverter_name
-        #self.integrateInverter = integrateInverter
-        #self.simPhotovoltaicSimpleJit = simPhotovoltaicSimple
+            # load module and inverter data from the databases that are shared by all PV systems
+            module_database = get_sandia_database(utils.HISIMPATH["photovoltaic"]["modules"])
+            inverter_database = get_sandia_database(utils.HISIMPATH["photovoltaic"]["inverters"])
+            self.array_modules = [module_database.get_entry(array.module_name) for array in self.arrays]
+            self.array_inverters = [inverter_database.get_entry(array.inverter_name) for array in self.arrays]
+        self.module = self.array_modules[0]
+        self.inverter = self.array_inverters[0]
 
     def plot(self):
+        import matplotlib.pyplot as plt
         # Plots ac_power. One day is represented by 1440 steps.
         #self.ac_power.iloc[0:7200].plot()
         plt.plot(self.data)
@@ -483,127 +868,6 @@ class PVSystem(cp.Component):
         pd_database = pd_database.sort_index()
         return pd_database.resample('1T').asfreq().interpolate(method='linear').tolist()
 
-
-    def simPhotovoltaic2(
-        self,
-        dni_extra=None,
-        DNI=None,
-        DHI=None,
-        GHI=None,
-        azimuth=None,
-        apparent_zenith=None,
-        temperature=None,
-        wind_speed=None,
-        surface_tilt=30,
-        surface_azimuth=180,
-        albedo=0.2):
-        """
-        Simulates a defined PV array with the Sandia PV Array Performance Model.
-        The implementation is done in accordance with following tutorial:
-        https://github.com/pvlib/pvlib-python/blob/master/docs/tutorials/tmy_to_power.ipynb
-
-        Based on the tsib project @[tsib-kotzur] (Check header)
-
-        Parameters
-        ----------
-        tmy_data: pandas.DataFrame(), required
-            Weatherfile in the format of a tmy file.
-        surface_tilt: int or float, optional (default:30)
-            Tilt angle of of the array in degree.
-        surface_azimuth: int or float, optional (default:180)
-            Azimuth angle of of the array in degree. 180 degree means south,
-            90 degree east and 270 west.
-        albedo: float, optional (default: 0.2)
-            Reflection coefficient of the surrounding area.
-        losses: float, optional (default: 0.1)
-            Losses due to soiling, mismatch, diode connections, dc wiring etc.
-        load_module_data: Boolean, optional (default: False)
-            If True the module data base is loaded from the Sandia Website.
-            Otherwise it is loaded from this relative path
-                '\\profiles\\PV-Modules\\sandia_modules.csv'.
-        module_name: str, optional (default:'Hanwha_HSL60P6_PA_4_250T__2013_')
-            Module name. The string must be existens in Sandia Module database.
-        integrateInverter: bool, optional (default: True)
-            If an inverter shall be added to the simulation, providing the photovoltaic output after the inverter.
-        inverter_name: str, optional (default: 'ABB__MICRO_0_25_I_OUTD_US_208_208V__CEC_2014_')
-            Type of inverter.
-
-        Returns
-        --------
-        """
-        # automatic pd time series in future pvlib version
-        # calculate airmass
-        airmass = pvlib.atmosphere.get_relative_airmass(apparent_zenith)
-        # use perez model to calculate the plane of array diffuse sky radiation
-        poa_sky_diffuse = pvlib.irradiance.perez(
-            surface_tilt,
-            surface_azimuth,
-            DHI,
-            np.float64(DNI),
-            dni_extra,
-            apparent_zenith,
-            azimuth,
-            airmass,
-        )
-        # calculate ground diffuse with specified albedo
-        poa_ground_diffuse = pvlib.irradiance.get_ground_diffuse(
-            surface_tilt, GHI, albedo=albedo
-        )
-        # calculate angle of incidence
-        aoi = pvlib.irradiance.aoi(surface_tilt, surface_azimuth, apparent_zenith, azimuth)
-        # calculate plane of array irradiance
-        poa_irrad = pvlib.irradiance.poa_components(aoi, np.float64(DNI), poa_sky_diffuse, poa_ground_diffuse)
-        # calculate pv cell and module temperature
-        #temp_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
-        pvtemps = pvlib.temperature.sapm_cell(poa_irrad["poa_global"], temperature, wind_speed, **self.temp_model)
-
-
-        # calculate effective irradiance on pv module
-        sapm_irr = pvlib.pvsystem.sapm_effective_irradiance(
-            module=self.module,
-            poa_direct=poa_irrad["poa_direct"],
-            poa_diffuse=poa_irrad["poa_diffuse"],
-            airmass_absolute=airmass,
-            aoi=aoi,
-        )
-        # calculate pv performance
-        sapm_out = pvlib.pvsystem.sapm(
-            sapm_irr,
-            module=self.module,
-            temp_cell=pvtemps,
-        )
-        # calculate peak load of single module [W]
-        peak_load = self.module.loc["Impo"] * self.module.loc["Vmpo"]
-        ac_power = pd.DataFrame()
-        if self.pvconfig.integrate_inverter:
-            # calculate load after inverter
-            iv_load = pvlib.inverter.sandia(inverter=self.inverter, v_dc=sapm_out["v_mp"], p_dc=sapm_out["p_mp"])
-            ac_power = iv_load / peak_load
-        else:
-            # load in [kW/kWp]
-            ac_power = sapm_out["p_mp"] / peak_load
-
-        if math.isnan(ac_power):
-            ac_power = 0.0
-
-        #ac_power = ac_power * self.time_correction_factor
-        #ac_power = ac_power
-
-        #data = [DHI,
-        #        DNI,
-        #        GHI,
-        #        dni_extra,
-        #        aoi,
-        #        apparent_zenith,
-        #        azimuth,
-        #        airmass,
-        #        wind_speed]
-        #if timestep % 60 == 0 and timestep < 1442:
-        #    log.information(data)
-        #    log.information("Timestep:{} , AcPower: {}".format(timestep, ac_power))
-
-        return ac_power
-
 def readTRY(location="Aachen", year=2010):
     """
     Reads a test reference year file and gets the GHI, DHI and DNI from it.
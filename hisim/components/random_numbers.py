@@ -1,6 +1,7 @@
 # Generic/Built-in
 import random
-from typing import List
+from typing import List, Dict
+import numpy as np
 
 # Owned
 from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput
@@ -28,6 +29,9 @@ class RandomNumbers(Component):
         val1: float = self.values[timestep]
         stsv.set_output_value(self.output1, float(val1))
 
+    def i_simulate_all(self, timesteps: int) -> Dict[ComponentOutput, np.ndarray]:
+        return {self.output1: np.array(self.values[:timesteps], dtype=float)}
+
     def i_doublecheck(self, timestep: int, stsv: SingleTimeStepValues):
         pass
 
@@ -1,5 +1,4 @@
 # Generic/Built-in
-import copy
 import numpy as np
 
 # Owned
@@ -17,7 +16,9 @@ __maintainer__ = "Maximilian Hillen"
 __email__ = "maximilian.hillen@rwth-aachen.de"
 __status__ = ""
 
-class HeatStorageState:
+class HeatStorageState(cp.ComponentState):
+    __slots__ = ("T_sp_ww", "T_sp_hw")
+
     def __init__(self, T_sp_ww: float,T_sp_hw: float):
         self.T_sp_ww = T_sp_ww
         self.T_sp_hw = T_sp_hw
@@ -65,7 +66,7 @@ class HeatStorage(Component):
 
 
         self.state = HeatStorageState(T_sp_ww=40,T_sp_hw=40)
-        self.previous_state = copy.copy(self.state)
+        self.previous_state = cp.get_state_snapshot(self.state)
 
 
         self.thermal_demand_heating_water : ComponentInput = self.add_input(self.ComponentName,
@@ -133,10 +134,10 @@ class HeatStorage(Component):
     def write_to_report(self):
         pass
     def i_save_state(self):
-        self.previous_state = copy.deepcopy(self.state)
+        self.previous_state = cp.get_state_snapshot(self.state)
 
     def i_restore_state(self):
-        self.state = copy.deepcopy(self.previous_state)
+        self.state = cp.restore_state_snapshot(self.state, self.previous_state)
 
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
         pass
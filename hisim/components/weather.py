@@ -3,11 +3,10 @@ import datetime
 import math
 import os
 import pandas as pd
-import pvlib
 import numpy as np
 from dataclasses_json import dataclass_json
 from dataclasses import dataclass
-from typing import  List
+from typing import  List, Dict, Optional
 # Owned
 from hisim.component import Component, SingleTimeStepValues, ComponentInput, ComponentOutput
 from hisim.simulationparameters import SimulationParameters
@@ -17,6 +16,8 @@ from hisim import utils
 from hisim import log
 import json
 from timeit import default_timer as timer
+# pvlib takes long to import, it is only loaded when the irradiance is actually calculated
+pvlib = utils.lazy_import("pvlib")
 
 __authors__ = "Vitor Hugo Bellotto Zago"
 __copyright__ = "Copyright 2021, the House Infrastructure Project"
@@ -182,6 +183,20 @@ class Weather(Component):
             temperatureforecast = self.temperature_list[timestep:last_forecast_timestep]
             self.simulation_repository.set_entry(self.Weather_Temperature_Forecast_24h,temperatureforecast)
 
+    def i_simulate_all(self, timesteps: int) -> Optional[Dict[ComponentOutput, np.ndarray]]:
+        # the forecast has to be written to the repository in every timestep
+        if self.my_simulation_parameters.system_config.predictive:
+            return None
+        return {self.t_outC: np.array(self.temperature_list[:timesteps], dtype=float),
+                self.DNIC: np.array(self.DNI_list[:timesteps], dtype=float),
+                self.DNIextraC: np.array(self.DNIextra_list[:timesteps], dtype=float),
+                self.DHIC: np.array(self.DHI_list[:timesteps], dtype=float),
+                self.GHIC: np.array(self.GHI_list[:timesteps], dtype=float),
+                self.altitudeC: np.array(self.altitude_list[:timesteps], dtype=float),
+                self.azimuthC: np.array(self.azimuth_list[:timesteps], dtype=float),
+                self.wind_speedC: np.array(self.Wspd_list[:timesteps], dtype=float),
+                self.apparent_zenithC: np.array(self.apparent_zenith_list[:timesteps], dtype=float)}
+
     def build(self, location,my_simulation_parameters:SimulationParameters):
         seconds_per_timestep=my_simulation_parameters.seconds_per_timestep
         parameters = [ location ]
@@ -0,0 +1,76 @@
+# Generic
+from typing import Optional
+import numpy as np
+
+# Owned
+from hisim import component as cp
+
+
+class ConvergenceStrategy:
+    """
+    Determines how the values of a circular connection are updated between two sweeps over its components.
+
+    After every sweep that did not converge yet, update() gets the values from before the sweep and the
+    single timestep values after the sweep. It may change the values of the loop variables, i.e. the outputs
+    of the circular connection that are read by its own components, before the next sweep starts.
+    """
+    def reset(self):
+        # gets called before the iteration of a circular connection starts
+        pass
+
+    def update(self, previous_values: cp.SingleTimeStepValues, stsv: cp.SingleTimeStepValues, loop_indices: np.ndarray):
+        raise NotImplementedError()
+
+
+class GaussSeidel(ConvergenceStrategy):
+    """
+    Takes the values of the last sweep as they are. This was the only strategy before it could be chosen.
+    """
+    def update(self, previous_values: cp.SingleTimeStepValues, stsv: cp.SingleTimeStepValues, loop_indices: np.ndarray):
+        pass
+
+
+class Relaxation(ConvergenceStrategy):
+    """
+    Under relaxation with a constant factor: new = previous + factor * (sweep - previous).
+    A factor below one damps oscillating loops.
+    """
+    def __init__(self, factor: float = 0.5):
+        if factor <= 0:
+            raise ValueError("The relaxation factor has to be positive, but was " + str(factor))
+        self.factor = factor
+
+    def update(self, previous_values: cp.SingleTimeStepValues, stsv: cp.SingleTimeStepValues, loop_indices: np.ndarray):
+        previous = previous_values.values[loop_indices]
+        stsv.values[loop_indices] = previous + self.factor * (stsv.values[loop_indices] - previous)
+
+
+class Aitken(ConvergenceStrategy):
+    """
+    Relaxation with a factor that is adapted in every sweep with Aitken's delta squared method
+    (Irons and Tuck). The factor is limited to the range between minimum_factor and maximum_factor.
+    """
+    def __init__(self, initial_factor: float = 0.5, minimum_factor: float = 0.1, maximum_factor: float = 1.5):
+        self.initial_factor = initial_factor
+        self.minimum_factor = minimum_factor
+        self.maximum_factor = maximum_factor
+        self.factor = initial_factor
+        self.previous_residual: Optional[np.ndarray] = None
+
+    def reset(self):
+        self.factor = self.initial_factor
+        self.previous_residual = None
+
+    def update(self, previous_values: cp.SingleTimeStepValues, stsv: cp.SingleTimeStepValues, loop_indices: np.ndarray):
+        previous = previous_values.values[loop_indices]
+        residual = stsv.values[loop_indices] - previous
+        # missing values (NaN) do not take part in the estimation of the factor
+        finite_residual = np.where(np.isfinite(residual), residual, 0.0)
+        if self.previous_residual is not None:
+            residual_change = finite_residual - self.previous_residual
+            denominator = float(np.dot(residual_change, residual_change))
+            if denominator > 0:
+                factor = -self.factor * float(np.dot(self.previous_residual, residual_change)) / denominator
+                self.factor = min(max(factor, self.minimum_factor), self.maximum_factor)
+        self.previous_residual = finite_residual
+        stsv.values[loop_indices] = previous + self.factor * residual
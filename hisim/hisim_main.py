@@ -4,9 +4,10 @@ from datetime import datetime
 from hisim import log
 import hisim.simulator as sim
 import os
+from typing import Optional
 #from hisim.postprocessing import postprocessing_main as pp
 
-def main(path_to_module: str, function_in_module: str, my_simulation_parameters = None):
+def main(path_to_module: str, function_in_module: str, my_simulation_parameters = None, checkpoint: Optional[str] = None, warm_start: bool = False):
     log.information("#################################")
     log.information("starting simulation of " + path_to_module  + " " + function_in_module)
     starttime = datetime.now()
@@ -50,6 +51,10 @@ def main(path_to_module: str, function_in_module: str, my_simulation_parameters
     # Pass setup function to simulator
     model_init_method(my_sim, my_simulation_parameters)
 
+    # Resume from or warm start with a checkpoint of a previous simulation
+    if checkpoint is not None:
+        my_sim.load_checkpoint(checkpoint, warm_start=warm_start)
+
     # Perform simulation throughout the defined timeline
     my_sim.run_all_timesteps()
     log.information("#################################")
@@ -68,6 +73,16 @@ if __name__ == "__main__":
         quit()
     filename = sys.argv[1]
     functionname = sys.argv[2]
+    # optional: a checkpoint to resume from, followed by "warm" to only take over the states of the components
+    checkpoint = None
+    warm_start = False
+    if len(sys.argv) > 3:
+        checkpoint = sys.argv[3]
+    if len(sys.argv) > 4:
+        if sys.argv[4] != "warm":
+            log.information("the fourth argument can only be warm for a warm start from the checkpoint")
+            quit()
+        warm_start = True
     log.information("calling " + functionname + " from " + filename)
-    main(filename, functionname)
+    main(filename, functionname, checkpoint=checkpoint, warm_start=warm_start)
 
@@ -0,0 +1,193 @@
+# Generic
+from typing import Any, Dict, List
+import numpy as np
+
+# Owned
+from hisim import component as cp
+from hisim.postprocessing import aggregation
+
+
+class KpiAccumulator:
+    """
+    Key performance indicator that is updated with the converged values of every timestep, so it does not
+    need the results of the whole simulation. Accumulators are added to the simulator with Simulator.add_kpi.
+
+    Power outputs are integrated to energy, i.e. their values are multiplied with the length of a timestep in hours.
+    """
+    def __init__(self, name: str, outputs: List[cp.ComponentOutput]):
+        self.name = name
+        self.outputs = outputs
+        self.indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.hours_per_timestep: float = 0
+        # attributes that are not part of the accumulated state and therefore not stored in checkpoints
+        self.configuration_attributes = ["name", "outputs", "indices", "hours_per_timestep"]
+
+    def prepare(self, seconds_per_timestep: int):
+        """
+        Gets called once before the first timestep, after the outputs were registered.
+        """
+        for output in self.outputs:
+            if output.GlobalIndex < 0:
+                raise Exception("The output " + output.FullName + " of the KPI " + self.name + " was not registered.")
+        self.indices = np.array([output.GlobalIndex for output in self.outputs], dtype=np.int64)
+        self.hours_per_timestep = seconds_per_timestep / 3600
+
+    def get_energy_factor(self, output: cp.ComponentOutput) -> float:
+        if aggregation.get_aggregation_method(output) == aggregation.ENERGY:
+            return self.hours_per_timestep
+        return 1
+
+    def update(self, values: np.ndarray):
+        """
+        Gets the values of all outputs in one converged timestep.
+        """
+        raise NotImplementedError()
+
+    def get_result(self) -> Any:
+        raise NotImplementedError()
+
+    def get_state(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if key not in self.configuration_attributes
+                and key != "configuration_attributes"}
+
+    def set_state(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+
+
+class Sum(KpiAccumulator):
+    """
+    Sum of an output over all timesteps, power is integrated to energy.
+    """
+    def __init__(self, name: str, output: cp.ComponentOutput):
+        super().__init__(name, [output])
+        self.total: float = 0
+
+    def update(self, values: np.ndarray):
+        self.total += values.item(self.indices[0])
+
+    def get_result(self) -> float:
+        return self.total * self.get_energy_factor(self.outputs[0])
+
+
+class Maximum(KpiAccumulator):
+    """
+    Largest value of an output, e.g. the peak load.
+    """
+    def __init__(self, name: str, output: cp.ComponentOutput):
+        super().__init__(name, [output])
+        self.maximum: float = -np.inf
+
+    def update(self, values: np.ndarray):
+        value = values.item(self.indices[0])
+        if value > self.maximum:
+            self.maximum = value
+
+    def get_result(self) -> float:
+        return self.maximum
+
+
+class Minimum(KpiAccumulator):
+    """
+    Smallest value of an output, e.g. the lowest room temperature.
+    """
+    def __init__(self, name: str, output: cp.ComponentOutput):
+        super().__init__(name, [output])
+        self.minimum: float = np.inf
+
+    def update(self, values: np.ndarray):
+        value = values.item(self.indices[0])
+        if value < self.minimum:
+            self.minimum = value
+
+    def get_result(self) -> float:
+        return self.minimum
+
+
+class Histogram(KpiAccumulator):
+    """
+    Number of timesteps in which the value of an output falls into each of the bins between the bin edges.
+    Values below the first or above the last edge are counted in the first or last bin.
+    """
+    def __init__(self, name: str, output: cp.ComponentOutput, bin_edges: List[float]):
+        super().__init__(name, [output])
+        if len(bin_edges) < 2 or any(np.diff(bin_edges) <= 0):
+            raise ValueError("The bin edges of the histogram " + name + " need to be increasing.")
+        self.bin_edges = list(bin_edges)
+        self.inner_edges = np.array(bin_edges[1:-1], dtype=np.float64)
+        self.counts = np.zeros(len(bin_edges) - 1, dtype=np.int64)
+        self.configuration_attributes += ["bin_edges", "inner_edges"]
+
+    def update(self, values: np.ndarray):
+        self.counts[np.searchsorted(self.inner_edges, values.item(self.indices[0]), side="right")] += 1
+
+    def get_result(self) -> Dict[str, List[Any]]:
+        return {"bin_edges": self.bin_edges, "counts": self.counts.tolist()}
+
+
+class SwitchOnCounter(KpiAccumulator):
+    """
+    Counts how often an output rises above a threshold, e.g. the number of cycles of a heat pump.
+    """
+    def __init__(self, name: str, output: cp.ComponentOutput, threshold: float = 0):
+        super().__init__(name, [output])
+        self.threshold = threshold
+        self.count: int = 0
+        self.is_above: bool = False
+        self.configuration_attributes.append("threshold")
+
+    def update(self, values: np.ndarray):
+        is_above = values.item(self.indices[0]) > self.threshold
+        if is_above and not self.is_above:
+            self.count += 1
+        self.is_above = is_above
+
+    def get_result(self) -> int:
+        return self.count
+
+
+class TimeAboveThreshold(KpiAccumulator):
+    """
+    Hours in which an output is above a threshold, e.g. the run hours of a heat pump.
+    """
+    def __init__(self, name: str, output: cp.ComponentOutput, threshold: float = 0):
+        super().__init__(name, [output])
+        self.threshold = threshold
+        self.timesteps: int = 0
+        self.configuration_attributes.append("threshold")
+
+    def update(self, values: np.ndarray):
+        if values.item(self.indices[0]) > self.threshold:
+            self.timesteps += 1
+
+    def get_result(self) -> float:
+        return self.timesteps * self.hours_per_timestep
+
+
+class ElectricityBalance(KpiAccumulator):
+    """
+    Grid import and export, self consumption and autarky from the electricity production and consumption
+    of a building. Both outputs need to be positive and have the same unit.
+    """
+    def __init__(self, name: str, production: cp.ComponentOutput, consumption: cp.ComponentOutput):
+        super().__init__(name, [production, consumption])
+        if production.Unit != consumption.Unit:
+            raise ValueError("The production and consumption of the KPI " + name + " have different units.")
+        self.production: float = 0
+        self.consumption: float = 0
+        self.self_consumption: float = 0
+
+    def update(self, values: np.ndarray):
+        production = values.item(self.indices[0])
+        consumption = values.item(self.indices[1])
+        self.production += production
+        self.consumption += consumption
+        self.self_consumption += min(production, consumption)
+
+    def get_result(self) -> Dict[str, float]:
+        factor = self.get_energy_factor(self.outputs[0])
+        return {"production": self.production * factor,
+                "consumption": self.consumption * factor,
+                "grid_import": (self.consumption - self.self_consumption) * factor,
+                "grid_export": (self.production - self.self_consumption) * factor,
+                "self_consumption_rate": self.self_consumption / self.production if self.production > 0 else 0.0,
+                "autarky_rate": self.self_consumption / self.consumption if self.consumption > 0 else 0.0}
@@ -8,6 +8,30 @@ class LogPrio(IntEnum):
     Profile = 5
     Trace = 6
 
+# messages with a higher value than the log level are neither printed nor written to the log files
+log_level: int = LogPrio.Trace
+
+def set_log_level(prio: int) -> int:
+    """
+    Sets the highest priority that is still logged and returns the previous one.
+    """
+    global log_level
+    previous_level = log_level
+    log_level = prio
+    return previous_level
+
+# the log files are only written while this is True, simulators without result directory turn it off
+file_logging: bool = True
+
+def set_file_logging(enabled: bool) -> bool:
+    """
+    Turns writing the log files on or off and returns the previous setting. The messages are still printed.
+    """
+    global file_logging
+    previous_file_logging = file_logging
+    file_logging = enabled
+    return previous_file_logging
+
 def error(message: str):
     log(LogPrio.Error, message)
 
@@ -28,12 +52,18 @@ def profile(message: str):
     log_profile_file(LogPrio.Profile, message)
 
 def log(prio: int, message: str):
+    if prio > log_level:
+        return
     #if(prio < LogPrio.Debug):
     print(str(prio) + ":" + message)
+    if not file_logging:
+        return
     with open('hisim_simulation.log', 'a') as f:
         f.write(message + "\n")
 
 def log_profile_file(prio: int, message: str):
+    if prio > log_level or not file_logging:
+        return
     #if(prio < LogPrio.Debug):
     with open('profiling_timeuse.log', 'a') as f:
         f.write(message + "\n")
@@ -0,0 +1,79 @@
+# Generic
+from typing import List
+import numpy as np
+import pandas as pd
+
+# Owned
+from hisim import component as cp
+from hisim import loadtypes as lt
+
+# how the values of an output are combined within one period
+MEAN = "mean"
+ENERGY = "energy"
+SUM = "sum"
+
+# intensive quantities are averaged over the period
+MEAN_UNITS = [lt.Units.Celsius, lt.Units.Kelvin, lt.Units.Percent, lt.Units.Degrees,
+              lt.Units.MeterPerSecond, lt.Units.c_per_kWh]
+# power is integrated to energy, i.e. W to Wh, kW to kWh and W per square meter to Wh per square meter
+ENERGY_UNITS = {lt.Units.Watt: lt.Units.Wh, lt.Units.kW: lt.Units.kWh, lt.Units.Wm2: lt.Units.Whm2}
+
+
+def get_aggregation_method(output: cp.ComponentOutput) -> str:
+    """
+    Determines from the load type and the unit of an output how its values are aggregated.
+    Everything that is neither an intensive quantity nor a power is an amount per timestep and summed up.
+    """
+    if output.LoadType == lt.LoadTypes.Temperature or output.Unit in MEAN_UNITS:
+        return MEAN
+    if output.Unit in ENERGY_UNITS:
+        return ENERGY
+    return SUM
+
+
+def get_aggregated_unit(output: cp.ComponentOutput) -> lt.Units:
+    """
+    Unit of the aggregated values of an output, power outputs are aggregated to energy.
+    """
+    if get_aggregation_method(output) == ENERGY:
+        return ENERGY_UNITS[output.Unit]
+    return output.Unit
+
+
+def get_aggregated_name(output: cp.ComponentOutput) -> str:
+    """
+    Column name of an output in the aggregated results, like its pretty name but with the aggregated unit.
+    """
+    return output.ObjectName + " - " + output.DisplayName + " [" + output.LoadType + " - " \
+        + get_aggregated_unit(output) + "]"
+
+
+def aggregate_results(results: np.ndarray, timeline: pd.DatetimeIndex, outputs: List[cp.ComponentOutput],
+                      frequency: str, seconds_per_timestep: int) -> pd.DataFrame:
+    """
+    Aggregates the result matrix with one row per timestep and one column per output to periods of the
+    given pandas frequency, e.g. "15min", "H", "D", "W" or "M", in one pass over all columns.
+
+    The timesteps are summed per period with np.add.reduceat. The sums are then divided by the number of
+    timesteps for averaged outputs or multiplied by the length of a timestep in hours for power outputs.
+    Periods without any timestep, which only occur for frequencies finer than the timestep, are NaN.
+    The columns are named with the aggregated units, so power outputs are labeled as energy.
+    """
+    if results.shape != (len(timeline), len(outputs)):
+        raise ValueError("The results have the shape " + str(results.shape) + ", but there are " + str(len(timeline))
+                         + " timesteps and " + str(len(outputs)) + " outputs.")
+    # position of the first timestep of every period, the labels are the same as the ones of DataFrame.resample
+    first_positions = pd.Series(np.arange(len(timeline)), index=timeline).resample(frequency).first()
+    has_timesteps = first_positions.notna().to_numpy()
+    starts = first_positions.to_numpy()[has_timesteps].astype(np.int64)
+    aggregated = np.full((len(first_positions), len(outputs)), np.nan)
+    if len(starts) > 0:
+        sums = np.add.reduceat(results, starts, axis=0)
+        counts = np.diff(np.append(starts, len(timeline)))
+        methods = np.array([get_aggregation_method(output) for output in outputs])
+        factors = np.ones((len(starts), len(outputs)))
+        factors[:, methods == MEAN] = 1 / counts[:, np.newaxis]
+        factors[:, methods == ENERGY] = seconds_per_timestep / 3600
+        aggregated[has_timesteps] = sums * factors
+    columns = [get_aggregated_name(output) for output in outputs]
+    return pd.DataFrame(aggregated, index=first_positions.index, columns=columns)
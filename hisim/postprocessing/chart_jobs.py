@@ -0,0 +1,198 @@
+# Generic
+import os
+import gc
+import shutil
+import hashlib
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Owned
+from hisim import log
+
+LINE = "Line"
+CARPET = "Carpet"
+DAY = "Day"
+BAR = "Bar"
+
+# has to be increased whenever the look of the charts changes, so the cached charts are not used anymore
+CHART_CACHE_VERSION = 1
+
+
+@dataclass
+class ChartJob:
+    """
+    Description of one chart. It only refers to the column of its output in the results, so it is cheap
+    to send to another process, which takes the values from the shared results.
+    """
+    chart_type: str
+    output: str
+    column: int
+    units: Any
+    day: int = 0
+    month: int = 0
+    # column of a second output that is shown in the same chart
+    second_column: Optional[int] = None
+
+
+class ChartData:
+    """
+    Values the charts are made from: the results with one row per timestep and one column per output,
+    the time of every timestep and the monthly results for the bar charts.
+    """
+    def __init__(self, values: np.ndarray, index: pd.DatetimeIndex, monthly_values: np.ndarray,
+                 directorypath: str, time_correction_factor: float):
+        self.values = values
+        self.index = index
+        self.monthly_values = monthly_values
+        self.directorypath = directorypath
+        self.time_correction_factor = time_correction_factor
+
+    def get_column(self, column: int) -> pd.Series:
+        # the series is a view on the results, the charts do not change their data in place
+        return pd.Series(self.values[:, column], index=self.index, copy=False)
+
+
+def make_chart(job: ChartJob, chart_data: ChartData) -> Any:
+    # the charts import pyplot, so they are only imported where they are drawn
+    from hisim.postprocessing import charts
+    from hisim.postprocessing.chart_singleday import ChartSingleDay
+    if job.chart_type == LINE:
+        return charts.Line(output=job.output, data=chart_data.get_column(job.column), units=job.units,
+                           directorypath=chart_data.directorypath,
+                           time_correction_factor=chart_data.time_correction_factor)
+    if job.chart_type == CARPET:
+        return charts.Carpet(output=job.output, data=chart_data.get_column(job.column), units=job.units,
+                             directorypath=chart_data.directorypath,
+                             time_correction_factor=chart_data.time_correction_factor)
+    if job.chart_type == DAY:
+        second_output = None if job.second_column is None else chart_data.get_column(job.second_column)
+        return ChartSingleDay(output=job.output, data=chart_data.get_column(job.column), units=job.units,
+                              directorypath=chart_data.directorypath,
+                              time_correction_factor=chart_data.time_correction_factor,
+                              day=job.day, month=job.month, output2=second_output)
+    if job.chart_type == BAR:
+        return charts.Bar(output=job.output, data=chart_data.monthly_values[:, job.column], units=job.units,
+                          dirpath=chart_data.directorypath,
+                          time_correction_factor=chart_data.time_correction_factor)
+    raise ValueError("Unknown chart type: " + job.chart_type)
+
+
+def get_chart_hash(job: ChartJob, chart_data: ChartData) -> str:
+    """
+    Hash of everything a chart depends on: the values of its column, the time of the timesteps and the
+    parameters of the job. Charts with the same hash are identical.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(str(CHART_CACHE_VERSION).encode())
+    hasher.update(repr((job.chart_type, job.output, str(job.units), job.day, job.month,
+                        chart_data.time_correction_factor)).encode())
+    if job.chart_type == BAR:
+        hasher.update(np.ascontiguousarray(chart_data.monthly_values[:, job.column]).tobytes())
+    else:
+        hasher.update(np.ascontiguousarray(chart_data.values[:, job.column]).tobytes())
+        hasher.update(chart_data.index.asi8.tobytes())
+    return hasher.hexdigest()
+
+
+def render_chart(job: ChartJob, chart_data: ChartData, cache_directory: Optional[str] = None):
+    """
+    Draws the chart of the job into the result directory. With a cache directory, a chart that was already
+    drawn from the same data is copied from there instead and new charts are added to it.
+    """
+    chart = make_chart(job, chart_data)
+    if cache_directory is None:
+        chart.plot()
+        return
+    cached_file = os.path.join(cache_directory, get_chart_hash(job, chart_data) + ".png")
+    if os.path.isfile(cached_file):
+        shutil.copyfile(cached_file, chart.filepath)
+        return
+    chart.plot()
+    # the chart is first copied to a temporary file, so other processes never see a partial chart
+    temporary_file = cached_file + "." + str(os.getpid()) + ".tmp"
+    shutil.copyfile(chart.filepath, temporary_file)
+    os.replace(temporary_file, cached_file)
+
+
+# the chart data of a worker process without the values, set once by initialize_worker
+_worker_chart_data: Optional[ChartData] = None
+_worker_shared_memory_name: Optional[str] = None
+_worker_shape: Tuple[int, ...] = (0, 0)
+_worker_cache_directory: Optional[str] = None
+
+
+def initialize_worker(shared_memory_name: str, shape: Tuple[int, ...], index: pd.DatetimeIndex,
+                      monthly_values: np.ndarray, directorypath: str, time_correction_factor: float,
+                      cache_directory: Optional[str]):
+    global _worker_chart_data, _worker_shared_memory_name, _worker_shape, _worker_cache_directory
+    # workers never show a window, the non interactive backend is also faster
+    import matplotlib
+    matplotlib.use("Agg")
+    _worker_chart_data = ChartData(np.zeros((0, 0)), index, monthly_values, directorypath, time_correction_factor)
+    _worker_shared_memory_name = shared_memory_name
+    _worker_shape = shape
+    _worker_cache_directory = cache_directory
+
+
+def render_chart_in_worker(job: ChartJob):
+    """
+    Draws a chart from the values in the shared memory. The worker attaches to the shared memory for every chart
+    and closes its handle afterwards, only the parent process unlinks it.
+    """
+    if _worker_chart_data is None or _worker_shared_memory_name is None:
+        raise Exception("The chart worker was not initialized.")
+    shared_values = shared_memory.SharedMemory(name=_worker_shared_memory_name)
+    try:
+        render_chart_from_shared_memory(job, _worker_chart_data, shared_values)
+    finally:
+        close_shared_memory(shared_values)
+
+
+def render_chart_from_shared_memory(job: ChartJob, chart_data: ChartData, shared_values: shared_memory.SharedMemory):
+    # the views on the shared memory are released when this function returns, so it can be closed
+    values: np.ndarray = np.ndarray(_worker_shape, dtype=np.float64, buffer=shared_values.buf)
+    render_chart(job, ChartData(values, chart_data.index, chart_data.monthly_values, chart_data.directorypath,
+                                chart_data.time_correction_factor), _worker_cache_directory)
+
+
+def close_shared_memory(shared_values: shared_memory.SharedMemory):
+    try:
+        shared_values.close()
+    except BufferError:
+        # the values can still be referenced by reference cycles of the chart, e.g. within matplotlib
+        gc.collect()
+        shared_values.close()
+
+
+def render_charts(jobs: List[ChartJob], chart_data: ChartData, processes: int = 1,
+                  cache_directory: Optional[str] = None):
+    """
+    Draws all charts. With more than one process, the results are copied once into shared memory and the
+    charts are drawn by a pool of worker processes that read their columns from there.
+    """
+    if len(jobs) == 0:
+        return
+    if cache_directory is not None:
+        os.makedirs(cache_directory, exist_ok=True)
+    if processes <= 1 or len(jobs) == 1:
+        for job in jobs:
+            render_chart(job, chart_data, cache_directory)
+        return
+    log.information("Drawing " + str(len(jobs)) + " charts with " + str(processes) + " processes")
+    values = np.ascontiguousarray(chart_data.values, dtype=np.float64)
+    shared_values = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shared_values.buf)[:] = values
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs)), initializer=initialize_worker,
+                                 initargs=(shared_values.name, values.shape, chart_data.index,
+                                           chart_data.monthly_values, chart_data.directorypath,
+                                           chart_data.time_correction_factor, cache_directory)) as executor:
+            # list() raises the exceptions of the workers
+            list(executor.map(render_chart_in_worker, jobs))
+    finally:
+        shared_values.close()
+        shared_values.unlink()
@@ -146,7 +146,8 @@ class Bar(Chart):
         # seaborn.despine(ax=ax, offset=0)  # the important part here
         # autolabel(rect)
         plt.tight_layout()
-        plt.ylabel(self.units)
+        # the values are shown in thousands, e.g. monthly energy in kWh
+        plt.ylabel("k" + self.units)
         plt.legend(loc='best')
         plt.savefig(self.filepath, bbox_inches='tight')
         plt.close()
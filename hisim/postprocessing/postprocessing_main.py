@@ -6,6 +6,7 @@ import subprocess
 #import tkinter as tk
 import tkinter.filedialog as filedialog
 from enum import Enum
+from typing import List, Tuple
 
 #currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 #parentdir = os.path.dirname(currentdir)
@@ -22,6 +23,9 @@ import pickle
 import hisim.postprocessing.charts as charts
 from hisim.postprocessing.chart_singleday import ChartSingleDay
 import hisim.postprocessing.report as report
+import hisim.postprocessing.aggregation as aggregation
+import hisim.postprocessing.chart_jobs as chart_jobs_module
+from hisim.postprocessing.chart_jobs import ChartJob
 from hisim import component
 from hisim.simulationparameters import SimulationParameters
 import warnings
@@ -163,41 +167,30 @@ class PostProcessor:
 
         days={"month":0,
               "day":0}
+        # the charts are collected first and drawn together, possibly in several processes
+        chart_jobs: List[ChartJob] = []
         #if len(self.results) == 60 * 24 * 365:
-        for index, output in enumerate(self.ppdt.all_outputs):
+        for index, output in self.get_selected_outputs():
             if PostProcessingOptions.Plot_Line in  self.ppdt.postProcessingOptions:
-                my_line = charts.Line(output=output.FullName,
-                               data=self.ppdt.results.iloc[:, index],
-                               units=output.Unit,
-                               directorypath=self.ppdt.directory_path,
-                               time_correction_factor=self.ppdt .time_correction_factor)
-                my_line.plot()
+                chart_jobs.append(ChartJob(chart_jobs_module.LINE, output.FullName, index, output.Unit))
             if PostProcessingOptions.Plot_Carpet in self.ppdt.postProcessingOptions:
-                #log.information("Making carpet plots")
-                my_carpet = charts.Carpet(output=output.FullName,
-                                   data=self.ppdt.results.iloc[:, index],
-                                   units=output.Unit,
-                                   directorypath=self.ppdt.directory_path,
-                                   time_correction_factor=self.ppdt.time_correction_factor)
-                my_carpet.plot()
-
+                chart_jobs.append(ChartJob(chart_jobs_module.CARPET, output.FullName, index, output.Unit))
             if PostProcessingOptions.Plot_Day in self.ppdt.postProcessingOptions:
-                    my_days = ChartSingleDay(output=output.FullName,
-                                   data=self.ppdt.results.iloc[:, index],
-                                   units=output.Unit,
-                                   directorypath=self.ppdt.directory_path,
-                                   time_correction_factor=self.ppdt.time_correction_factor,
-                                   day=days["day"],
-                                   month=days["month"])
-                    my_days.plot()
+                chart_jobs.append(ChartJob(chart_jobs_module.DAY, output.FullName, index, output.Unit,
+                                           day=days["day"], month=days["month"]))
             if PostProcessingOptions.Plot_Bar in self.ppdt.postProcessingOptions:
-                my_bar = charts.Bar(output=output.FullName,
-                             data=self.ppdt.results_monthly.iloc[:, index],
-                             units=output.Unit,
-                             dirpath=self.ppdt.directory_path,
-                             time_correction_factor=self.ppdt.time_correction_factor)
-                my_bar.plot()
+                # the monthly values of power outputs are energies
+                chart_jobs.append(ChartJob(chart_jobs_module.BAR, output.FullName, index,
+                                           aggregation.get_aggregated_unit(output)))
 
+        if len(self.ppdt.results) == 1440:
+            # the first day is always drawn for simulations of one day, the same chart of Plot_Day is replaced
+            chart_jobs = [job for job in chart_jobs if job.chart_type != chart_jobs_module.DAY or job.day != 0 or job.month != 0]
+            for index, output in self.get_selected_outputs():
+                second_column = 11 if output.FullName == "Dummy # Residence Temperature" else None
+                chart_jobs.append(ChartJob(chart_jobs_module.DAY, output.FullName, index, output.Unit,
+                                           day=0, month=0, second_column=second_column))
+        self.render_charts(chart_jobs)
 
         # Plot sankey
         if PostProcessingOptions.Plot_Sankey in self.ppdt.postProcessingOptions:
@@ -215,46 +208,80 @@ class PostProcessor:
         else:
             log.information("not exporting to CSV")
 
+        # Export all results to one columnar file
+        if PostProcessingOptions.Export_To_Feather in self.ppdt.postProcessingOptions:
+            log.information("exporting to feather")
+            self.export_results_to_feather()
 
-        if len(self.ppdt.results) == 1440:
-            for index, output in enumerate(self.ppdt.all_outputs):
-                if output.FullName == "Dummy # Residence Temperature":
-                    my_days = ChartSingleDay(output=output.FullName,
-                                   data=self.ppdt.results.iloc[:, index],
-                                   units=output.Unit,
-                                   directorypath=self.ppdt.directory_path,
-                                   time_correction_factor=self.ppdt.time_correction_factor,
-                                   day=0,
-                                   month=0,
-                                   output2=self.ppdt.results.iloc[:, 11])
-                else:
-                    my_days = ChartSingleDay(output=output.FullName,
-                                   data=self.ppdt   .results.iloc[:, index],
-                                   units=output.Unit,
-                                   directorypath=self.ppdt.directory_path,
-                                   time_correction_factor=self.ppdt.time_correction_factor,
-                                   day=0,
-                                   month=0)
-                my_days.plot()
-                #my_days.close()
 
         # Open file explorer
         if PostProcessingOptions.Open_Directory in self.ppdt.postProcessingOptions:
             self.open_dir_in_file_explorer()
 
+    @utils.measure_execution_time
+    def render_charts(self, chart_jobs: List[ChartJob]):
+        chart_data = chart_jobs_module.ChartData(values=self.ppdt.results.values,
+                                                 index=self.ppdt.results.index,
+                                                 monthly_values=self.ppdt.results_monthly.values,
+                                                 directorypath=self.ppdt.directory_path,
+                                                 time_correction_factor=self.ppdt.time_correction_factor)
+        cache_directory = None
+        if self.ppdt.simulation_parameters.cache_charts:
+            cache_directory = os.path.join(utils.HISIMPATH["cache_dir"], "charts")
+        chart_jobs_module.render_charts(chart_jobs, chart_data, self.ppdt.simulation_parameters.chart_processes,
+                                        cache_directory)
+
+    def get_selected_outputs(self) -> List[Tuple[int, component.ComponentOutput]]:
+        """
+        Returns the column index and the output of the outputs that are selected for post processing
+        by the filters in the simulation parameters.
+        """
+        simulation_parameters = self.ppdt.simulation_parameters
+        return [(index, output) for index, output in enumerate(self.ppdt.all_outputs)
+                if simulation_parameters.is_output_selected(output.FullName, output.LoadType)]
+
     @utils.measure_execution_time
     def export_results_to_csv(self):
-        for column in self.ppdt.results:
+        selected_columns = [index for index, _ in self.get_selected_outputs()]
+        for column in self.ppdt.results.columns[selected_columns]:
             self.ppdt.results[column].to_csv(os.path.join(self.ppdt.directory_path,
                                                      "{}_{}.csv".format(column.split(' ', 3)[2],
                                                                         column.split(' ', 3)[0])),
                                         sep=",", decimal=".")
-        for column in self.ppdt.results_monthly:
+        for column in self.ppdt.results_monthly.columns[selected_columns]:
             self.ppdt.results_monthly[column].to_csv(os.path.join(self.ppdt.directory_path,
                                                        "{}_{}_monthly.csv".format(column.split(' ', 3)[2],
                                                                                   column.split(' ', 3)[0])),
                                           sep=",", decimal=".")
 
+    @utils.measure_execution_time
+    def export_results_to_feather(self):
+        """
+        Writes all timesteps of all outputs to results.feather, a single Arrow file that can be loaded again
+        with utils.load_results. The object name, field name, load type and unit of every output are stored
+        as metadata of its column.
+        """
+        # pyarrow is only needed for this export, so it is not imported with the rest of hisim
+        import pyarrow as pa
+        from pyarrow import feather
+        fields = [pa.field(utils.RESULTS_TIME_COLUMN, pa.timestamp("ns"))]
+        arrays = [pa.array(self.ppdt.results.index.values)]
+        for index, output in enumerate(self.ppdt.all_outputs):
+            metadata = {"ObjectName": output.ObjectName,
+                        "FieldName": output.FieldName,
+                        "LoadType": str(output.LoadType.value) if isinstance(output.LoadType, Enum) else str(output.LoadType),
+                        "Unit": str(output.Unit.value) if isinstance(output.Unit, Enum) else str(output.Unit)}
+            fields.append(pa.field(self.ppdt.results.columns[index], pa.float64(), metadata=metadata))
+            arrays.append(pa.array(self.ppdt.results.values[:, index]))
+        simulation_parameters = self.ppdt.simulation_parameters
+        schema = pa.schema(fields, metadata={"setup_function": str(self.ppdt.setup_function),
+                                             "seconds_per_timestep": str(simulation_parameters.seconds_per_timestep)})
+        table = pa.Table.from_arrays(arrays, schema=schema)
+        # only uncompressed files can be memory mapped when they are loaded
+        compression = simulation_parameters.result_compression
+        feather.write_feather(table, os.path.join(self.ppdt.directory_path, "results.feather"),
+                              compression="uncompressed" if compression is None else compression)
+
     def write_to_report(self, text):
         self.report.open()
         self.report.write(text)
@@ -360,41 +387,6 @@ class PostProcessor:
 
         """
 
-    def get_std_results(self):
-        """:key
-        ToDo: to be redefined and recoded in monthly bar plots in Bar Class
-
-
-        """
-        pd_timeline = pd.date_range(start=self.ppdt.simulation_parameters.start_date,
-                                    end=self.ppdt.simulation_parameters.end_date,
-                                    freq='{}S'.format(self.ppdt.simulation_parameters.seconds_per_timestep))[:-1]
-        n_columns = self.ppdt.results.shape[1]
-        df = pd.DataFrame()
-        for i_column in range(n_columns):
-            temp_df = pd.DataFrame(self.ppdt.results.values[:, i_column], index=pd_timeline, columns=[self.ppdt.results.columns[i_column]])
-            if 'Temperature' in self.ppdt.results.columns[i_column] or 'Percent' in self.ppdt.results.columns[i_column]:
-                temp_df = temp_df.resample('H').interpolate(method='linear')
-            else:
-                temp_df = temp_df.resample('H').sum()
-            df[temp_df.columns[0]] = temp_df.values[:, 0]
-            df.index = temp_df.index
-
-        self.ppdt.results.index = pd_timeline
-        #self.ppdt.results_std = df
-
-        dfm = pd.DataFrame()
-        for i_column in range(n_columns):
-            temp_df = pd.DataFrame(self.ppdt.results.values[:, i_column], index=pd_timeline, columns=[self.ppdt.results.columns[i_column]])
-            if 'Temperature' in self.ppdt.results.columns[i_column] or 'Percent' in self.ppdt.results.columns[i_column]:
-                temp_df = temp_df.resample('M').interpolate(method='linear')
-            else:
-                temp_df = temp_df.resample('M').sum()
-            dfm[temp_df.columns[0]] = temp_df.values[:, 0]
-            dfm.index = temp_df.index
-
-        self.result_m = dfm
-
 # if __name__ == "__main__":
 #     flags = {"plot_line": True,
 #              "plot_carpet": False,
@@ -0,0 +1,123 @@
+# Generic
+import fnmatch
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Owned
+from hisim import component as cp
+
+# how the values of an output within k timesteps are combined into one recorded value
+MEAN = "mean"
+SUM = "sum"
+MINIMUM = "min"
+MAXIMUM = "max"
+METHODS = [MEAN, SUM, MINIMUM, MAXIMUM]
+
+
+class RecordingPolicy:
+    """
+    Determines which outputs are stored in the results and at which resolution. The simulation itself
+    always runs with the full resolution, the policy is only applied when the values of a timestep are stored.
+
+    outputs: glob patterns on the full names of the outputs that are stored, all outputs if it is None
+    steps: number of timesteps that are combined into one stored value, 1 stores every timestep
+    method: how the timesteps are combined, one of mean, sum, min and max
+    methods: methods for single outputs, keyed by glob patterns on their full names
+    """
+    def __init__(self, outputs: Optional[List[str]] = None, steps: int = 1, method: str = MEAN,
+                 methods: Optional[Dict[str, str]] = None):
+        if steps < 1:
+            raise ValueError("At least one timestep has to be combined into a stored value, but steps was " + str(steps))
+        self.outputs = outputs
+        self.steps = steps
+        self.method = method
+        self.methods: Dict[str, str] = {} if methods is None else methods
+        for chosen_method in [method] + list(self.methods.values()):
+            if chosen_method not in METHODS:
+                raise ValueError("Unknown recording method " + chosen_method + ", use one of " + ", ".join(METHODS))
+
+    def is_recorded(self, output: cp.ComponentOutput) -> bool:
+        if self.outputs is None:
+            return True
+        return any(fnmatch.fnmatchcase(output.FullName, pattern) for pattern in self.outputs)
+
+    def get_method(self, output: cp.ComponentOutput) -> str:
+        for pattern, method in self.methods.items():
+            if fnmatch.fnmatchcase(output.FullName, pattern):
+                return method
+        return self.method
+
+    def select_outputs(self, all_outputs: List[cp.ComponentOutput]) -> List[cp.ComponentOutput]:
+        return [output for output in all_outputs if self.is_recorded(output)]
+
+    def get_number_of_records(self, timesteps: int) -> int:
+        # a last incomplete group of timesteps is stored as well
+        return -(-timesteps // self.steps)
+
+
+class ResultRecorder:
+    """
+    Writes the values of every timestep into the results array following a recording policy.
+    The values of the timesteps that are combined are collected in buffers with one entry per stored output.
+    """
+    def __init__(self, policy: RecordingPolicy, recorded_outputs: List[cp.ComponentOutput],
+                 number_of_outputs: int, results_array: np.ndarray):
+        self.policy = policy
+        self.results_array = results_array
+        self.indices = np.array([output.GlobalIndex for output in recorded_outputs], dtype=np.int64)
+        # every timestep of every output is stored as it is
+        self.records_all_values = policy.steps == 1 and len(recorded_outputs) == number_of_outputs
+        methods = np.array([policy.get_method(output) for output in recorded_outputs])
+        self.is_mean = methods == MEAN
+        self.is_minimum = methods == MINIMUM
+        self.is_maximum = methods == MAXIMUM
+        self.uses_extremes = bool(np.any(self.is_minimum) or np.any(self.is_maximum))
+        self.sums = np.zeros(len(recorded_outputs))
+        self.minima = np.full(len(recorded_outputs), np.inf)
+        self.maxima = np.full(len(recorded_outputs), -np.inf)
+        self.count: int = 0
+
+    def record(self, timestep: int, values: np.ndarray, is_last_timestep: bool = False):
+        if self.records_all_values:
+            self.results_array[timestep] = values
+            return
+        if self.policy.steps == 1:
+            self.results_array[timestep] = values[self.indices]
+            return
+        selected_values = values[self.indices]
+        self.sums += selected_values
+        if self.uses_extremes:
+            np.minimum(self.minima, selected_values, out=self.minima)
+            np.maximum(self.maxima, selected_values, out=self.maxima)
+        self.count += 1
+        if self.count == self.policy.steps or is_last_timestep:
+            row = self.sums.copy()
+            row[self.is_mean] /= self.count
+            row[self.is_minimum] = self.minima[self.is_minimum]
+            row[self.is_maximum] = self.maxima[self.is_maximum]
+            self.results_array[timestep // self.policy.steps] = row
+            self.sums[:] = 0
+            self.minima[:] = np.inf
+            self.maxima[:] = -np.inf
+            self.count = 0
+
+    def get_state(self, next_timestep: int) -> Dict[str, Any]:
+        """
+        Returns the number of complete records and the buffers before next_timestep for a checkpoint.
+        The records themselves are read with get_records, so they only need to be written once.
+        """
+        return {"records": next_timestep // self.policy.steps,
+                "sums": self.sums.copy(),
+                "minima": self.minima.copy(),
+                "maxima": self.maxima.copy(),
+                "count": self.count}
+
+    def get_records(self, start: int, stop: int) -> np.ndarray:
+        return np.asarray(self.results_array[start:stop])
+
+    def set_state(self, state: Dict[str, Any], records: np.ndarray):
+        self.results_array[:len(records)] = records
+        self.sums[:] = state["sums"]
+        self.minima[:] = state["minima"]
+        self.maxima[:] = state["maxima"]
+        self.count = state["count"]
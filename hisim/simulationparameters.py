@@ -1,8 +1,14 @@
-from typing import List, Union
+from typing import List, Union, Dict, Optional, TYPE_CHECKING
 from dataclasses_json import dataclass_json
 from dataclasses import dataclass
 import datetime
+import fnmatch
+import re
 from hisim.utils import PostProcessingOptions
+from hisim import loadtypes as lt
+if TYPE_CHECKING:
+    # the recording policy refers to component outputs, which need the simulation parameters
+    from hisim.recording import RecordingPolicy
 
 @dataclass_json
 @dataclass()
@@ -30,6 +36,37 @@ class SimulationParameters:
         self.year = start_date.year
         self.post_processing_options = post_processing_options
         self.system_config = SystemConfig( )
+        # tolerances for the convergence of circularly connected components
+        self.convergence_absolute_tolerance: float = 0.0001
+        self.convergence_relative_tolerance: float = 0.0
+        # absolute tolerances for single load types or outputs (by full name), they take precedence over the default
+        self.convergence_tolerances_per_load_type: Dict[lt.LoadTypes, float] = {}
+        self.convergence_tolerances_per_output: Dict[str, float] = {}
+        # number of iterations after which convergence is forced or the simulation is stopped
+        self.force_convergence_after_iterations: int = 10
+        self.maximum_iterations: int = 100
+        # store the results in a memory mapped file in the result directory instead of the memory
+        self.memory_mapped_results: bool = False
+        # number of timesteps between two checkpoints in the result directory, 0 disables checkpoints
+        self.checkpoint_interval: int = 0
+        # keep the values of all outputs in every timestep. Without them, there is no post processing and only
+        # the KPIs of the simulation are available, which needs much less memory for long simulations.
+        self.store_results: bool = True
+        # which outputs are stored at which resolution, all outputs in every timestep if it is None
+        self.recording_policy: Optional["RecordingPolicy"] = None
+        # measure the wall time of every component and write it to the result directory and the report
+        self.profile_components: bool = False
+        # compression of the columnar result export ("lz4" or "zstd"), uncompressed results can be memory mapped
+        self.result_compression: Optional[str] = None
+        # number of processes that draw the charts in the post processing
+        self.chart_processes: int = 1
+        # outputs that are post processed: full names matching one of the glob patterns or the regular expression
+        # or outputs of one of the load types. Without any filter, all outputs are post processed.
+        self.post_processing_output_patterns: List[str] = []
+        self.post_processing_output_regex: Optional[str] = None
+        self.post_processing_load_types: List[lt.LoadTypes] = []
+        # reuse charts of identical data from earlier simulations instead of drawing them again
+        self.cache_charts: bool = False
 
     @classmethod
     def full_year(cls, year: int, seconds_per_timestep: int):
@@ -53,6 +90,16 @@ class SimulationParameters:
     def one_day_only(cls, year: int, seconds_per_timestep: int):
         return cls(datetime.date(year, 1, 1), datetime.date(year, 1, 2), seconds_per_timestep)
 
+    def is_output_selected(self, full_name: str, load_type: lt.LoadTypes) -> bool:
+        if len(self.post_processing_output_patterns) == 0 and self.post_processing_output_regex is None \
+                and len(self.post_processing_load_types) == 0:
+            return True
+        if any(fnmatch.fnmatchcase(full_name, pattern) for pattern in self.post_processing_output_patterns):
+            return True
+        if self.post_processing_output_regex is not None and re.search(self.post_processing_output_regex, full_name):
+            return True
+        return load_type in self.post_processing_load_types
+
     def get_unique_key(self):
         return str(self.start_date) + "###" + str(self.end_date) + "###"  + str(self.seconds_per_timestep) + "###" + str(self.year) + "###" + str(self.timesteps)
     
@@ -4,43 +4,82 @@ import numpy as np
 import datetime
 
 # Other Libraries
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, TypeVar, cast
+from collections import OrderedDict
 from typing import Tuple
 import pandas as pd
 import warnings
+from enum import Enum
 
 
 import time
+import copy
+import pickle
+import json
+import io
+import types
+from functools import wraps
 
 # Owned
-from hisim.postprocessing import postprocessing_main as pp
+from hisim.postprocessing import aggregation
 import hisim.component as cp
 from hisim import log
 from hisim.simulationparameters import SimulationParameters
 from hisim import loadtypes as lt
 from hisim import utils
+from hisim import convergence
+from hisim import kpis
+from hisim import recording
 #import utils
 
+# methods of the component wrapper whose wall time is measured when the components are profiled
+PROFILED_METHODS = ["save_state", "restore_state", "calculate_component", "doublecheck"]
 
 
 class ComponentWrapper:
-    def __init__(self, component: cp.Component, is_cachable: bool):
+    def __init__(self, component: cp.Component, is_cachable: bool, cache_size: int = 10000,
+                 cache_quantization: Optional[float] = None, skip_unchanged_inputs: bool = True):
         self.MyComponent = component
         self.component_inputs: List[cp.ComponentInput] = []
         self.component_outputs: List[cp.ComponentOutput] = []
-        #self.cachedict: = {}
+        # cache for the outputs of components that only depend on their inputs, keyed by the input values
         self.is_cachable = is_cachable
-
-    def register_component_outputs(self, all_outputs: List[cp.ComponentOutput]):
+        self.cache_size = cache_size
+        self.cache_quantization = cache_quantization
+        self.cachedict: OrderedDict = OrderedDict()
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self.input_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.output_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        # components whose outputs were calculated for all timesteps before the simulation
+        self.is_precomputed: bool = False
+        # input and output values of the last calculation, used to skip components with unchanged inputs
+        self.skip_unchanged_inputs = skip_unchanged_inputs
+        self.last_timestep: int = -1
+        self.last_force_convergence: bool = False
+        self.last_input_values: bytes = b""
+        self.last_output_values: bytes = b""
+        self.skipped_calculations: int = 0
+        # cumulative wall time and number of calls per profiled method, only filled if profiling is enabled
+        self.is_profiled: bool = False
+        self.profile_seconds: Dict[str, float] = {}
+        self.profile_calls: Dict[str, int] = {}
+
+    def register_component_outputs(self, all_outputs: List[cp.ComponentOutput],
+                                   output_index: Dict[Tuple[str, str], cp.ComponentOutput]):
+        """
+        Assigns the global indices to the outputs of the component and adds them to all_outputs and to
+        the index of the outputs by object name and field name, which is used to connect the inputs.
+        """
         log.information("Registering component outputs on " + self.MyComponent.ComponentName)
         # register the output column
         output_columns = self.MyComponent.get_outputs()
         for col in output_columns:
+            key = (col.ObjectName, col.FieldName)
+            if key in output_index:
+                raise Exception("trying to register the same key twice: " + col.FullName)
             col.GlobalIndex = len(all_outputs)
-            target_output: cp.ComponentOutput
-            for output in all_outputs:
-                if output.FullName == col.FullName:
-                    raise Exception("trying to register the same key twice: " + col.FullName)
+            output_index[key] = col
             all_outputs.append(col)
             log.information("Registered output " + col.FullName)
             self.component_outputs.append(col)
@@ -56,9 +95,6 @@ class ComponentWrapper:
     def save_state(self):
         # get called at the beginning of a timestep
         self.MyComponent.i_save_state()
-        self.cachedict = {}
-        # reset previous values
-        # self.previous_iteration_values = [0] * len(self.output_column_list)
 
     def doublecheck(self, timestep: int,  stsv: cp.SingleTimeStepValues):
         # get called at the beginning of a timestep
@@ -68,82 +104,153 @@ class ComponentWrapper:
     def restore_state(self):
         self.MyComponent.i_restore_state()
 
-    def calculate_component(self, timestep: int,  stsv: cp.SingleTimeStepValues, force_convergence: bool):
-        #if(self.is_cachable)
-        #cachekey building
-        # key = ""
-        # for ci in self.component_inputs:
-        #     # build the key
-        #     key += stsv[ci.]
-        # if key in self.cachedict:
-        #     for idx in range(len(self.component_outputs))
-        #         stsv[self.component_outputs[idx]....] = self.cachedict[key][idx]
-        #         #set outputs
-        # # send to component
-        # else
-        self.MyComponent.i_simulate(timestep, stsv,  force_convergence)
-        # #save outputs to dict
-        # myresults = []
-        # for output in self.component_outputs:
-        #     #build result list
-        #     myresults.append(stsv[output. ...])
-        # self.cachedict[key] = myresults
-
-        # a function to decorate
-        #self.MyComponent.i_simulate(timestep, stsv, seconds_per_timestep, force_convergence)
+    def reset(self):
+        """
+        Forgets the cached outputs, the last calculation, the precomputation and the profile of a previous run.
+        """
+        self.cachedict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_timestep = -1
+        self.last_force_convergence = False
+        self.last_input_values = b""
+        self.last_output_values = b""
+        self.skipped_calculations = 0
+        self.is_precomputed = False
+        # the timed methods refer to these dictionaries, so they are reset in place
+        for method_name in self.profile_seconds:
+            self.profile_seconds[method_name] = 0.0
+            self.profile_calls[method_name] = 0
+
+    def enable_profiling(self):
+        """
+        Measures the cumulative wall time and the number of calls of the profiled methods. The methods are
+        replaced by timed versions on this instance only, so components that are not profiled do not pay for it.
+        """
+        if self.is_profiled:
+            return
+        self.is_profiled = True
+        for method_name in PROFILED_METHODS:
+            self.profile_seconds[method_name] = 0.0
+            self.profile_calls[method_name] = 0
+            setattr(self, method_name, self.make_timed_method(method_name, getattr(self, method_name)))
+
+    def make_timed_method(self, method_name: str, method):
+        profile_seconds = self.profile_seconds
+        profile_calls = self.profile_calls
+
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profile_seconds[method_name] += time.perf_counter() - start
+                profile_calls[method_name] += 1
+        return timed_method
+
+    def prepare_cache(self):
+        """
+        Determines the positions of the connected inputs and of the outputs in the single timestep values.
+        Needs to be called after the inputs were connected.
+        """
+        self.input_indices = np.array([cinput.SourceOutput.GlobalIndex for cinput in self.component_inputs
+                                       if cinput.SourceOutput is not None], dtype=np.int64)
+        self.output_indices = np.array([output.GlobalIndex for output in self.component_outputs], dtype=np.int64)
+        self.cachedict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def has_unchanged_inputs(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> bool:
+        """
+        Checks if the component was already calculated in this timestep with bit identical input values and if
+        its outputs in stsv are still the ones it calculated. Calculating it again would then give the same result.
+        """
+        if not self.skip_unchanged_inputs or self.last_timestep != timestep or self.last_force_convergence != force_convergence:
+            return False
+        input_values: bytes = stsv.values[self.input_indices].tobytes()
+        output_values: bytes = stsv.values[self.output_indices].tobytes()
+        return input_values == self.last_input_values and output_values == self.last_output_values
 
+    def calculate_component_if_inputs_changed(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        """
+        Restores the state and calculates the component, unless its inputs did not change since its last
+        calculation in this timestep.
+        """
+        if self.has_unchanged_inputs(timestep, stsv, force_convergence):
+            self.skipped_calculations += 1
+            return
+        input_values = stsv.values[self.input_indices].tobytes()
+        self.restore_state()
+        self.calculate_component(timestep, stsv, force_convergence)
+        if self.skip_unchanged_inputs:
+            self.last_timestep = timestep
+            self.last_force_convergence = force_convergence
+            self.last_input_values = input_values
+            self.last_output_values = stsv.values[self.output_indices].tobytes()
 
+    def calculate_component(self, timestep: int,  stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        # components are only cached if they do not depend on anything but their inputs. With force convergence
+        # they might behave differently, so the cache is not used in that case.
+        if not self.is_cachable or force_convergence:
+            self.MyComponent.i_simulate(timestep, stsv,  force_convergence)
+            return
+        input_values = stsv.values[self.input_indices]
+        if self.cache_quantization is not None:
+            input_values = np.round(input_values / self.cache_quantization)
+        key = input_values.tobytes()
+        cached_outputs = self.cachedict.get(key)
+        if cached_outputs is not None:
+            self.cache_hits += 1
+            self.cachedict.move_to_end(key)
+            stsv.values[self.output_indices] = cached_outputs
+            return
+        self.cache_misses += 1
+        self.MyComponent.i_simulate(timestep, stsv,  force_convergence)
+        self.cachedict[key] = stsv.values[self.output_indices]
+        if len(self.cachedict) > self.cache_size:
+            self.cachedict.popitem(last=False)
 
-    def connect_inputs(self, all_outputs):
+    def connect_inputs(self, output_index: Dict[Tuple[str, str], cp.ComponentOutput]):
         """
         Connects cp.ComponentOutputs to ComponentInputs of
-        WrapperComponent
+        WrapperComponent. The outputs are looked up in the index built by register_component_outputs.
 
         :key
         """
         # Returns a List of ComponentInputs
         self.MyComponent.get_input_definitions()
+        self.component_inputs = []
 
         # Loop through lists of inputs of self component
         for cinput in self.MyComponent.inputs:
             # Adds to the ComponentInput List of ComponentWrapper
             self.component_inputs.append(cinput)
-
-            # Creates a ComponentOutput variable
-            global_output: cp.ComponentOutput
-
-            # Loop through all the existent component outputs in the current simulation
-            for global_output in all_outputs:
-                # Check if ComponentOutput and ComponentInput match
-                if global_output.ObjectName == cinput.src_object_name and global_output.FieldName == cinput.src_field_name:
-                    # Check if ComponentOutput and ComponentInput have the same units
-                    if cinput.Unit != global_output.Unit:
-                        # Check the use of "Units.Any"
-                        if (cinput.Unit == lt.Units.Any and global_output.Unit != lt.Units.Any) or (cinput.Unit != lt.Units.Any and global_output.Unit == lt.Units.Any):
-                            warnings.simplefilter("always")
-                            warnings.warn("The input %s (cp: %s, unit: %s) and output %s(cp: %s, unit: %s) might not have compatible units." % ( cinput.FieldName,
-                                                                                                                                               cinput.ObjectName,
-                                                                                                                                               cinput.Unit,
-                                                                                                                                               global_output.FieldName,
-                                                                                                                                               global_output.ObjectName,
-                                                                                                                                               global_output.Unit)) #
-                            # ToDo: Dirty code! Look the second else with the same code. Too lazy to figure out sth better
-                            # Connect, i.e, save ComponentOutput in ComponentInput
-                            cinput.SourceOutput = global_output
-                            log.debug(
-                                "connected input '" + cinput.FullName + "' to '" + global_output.FullName + "'")
-                        else:
-                            raise SystemError("The input %s (cp: %s, unit: %s) and output %s(cp: %s, unit: %s) do not have the same unit!" % ( cinput.FieldName,
-                                                                                                                           cinput.ObjectName,
-                                                                                                                           cinput.Unit,
-                                                                                                                           global_output.FieldName,
-                                                                                                                           global_output.ObjectName,
-                                                                                                                           global_output.Unit)) #
+            global_output: Optional[cp.ComponentOutput] = None
+            if cinput.src_object_name is not None and cinput.src_field_name is not None:
+                global_output = output_index.get((cinput.src_object_name, cinput.src_field_name))
+            if global_output is not None:
+                # Check if ComponentOutput and ComponentInput have the same units
+                if cinput.Unit != global_output.Unit:
+                    # Check the use of "Units.Any"
+                    if cinput.Unit == lt.Units.Any or global_output.Unit == lt.Units.Any:
+                        warnings.simplefilter("always")
+                        warnings.warn("The input %s (cp: %s, unit: %s) and output %s(cp: %s, unit: %s) might not have compatible units." % ( cinput.FieldName,
+                                                                                                                                           cinput.ObjectName,
+                                                                                                                                           cinput.Unit,
+                                                                                                                                           global_output.FieldName,
+                                                                                                                                           global_output.ObjectName,
+                                                                                                                                           global_output.Unit)) #
                     else:
-                        # ToDo: Dirty code! Too lazy to figure out sth better
-                        # Connect, i.e, save ComponentOutput in ComponentInput
-                        cinput.SourceOutput = global_output
-                        log.debug("connected input '" + cinput.FullName + "' to '" + global_output.FullName + "'")
+                        raise SystemError("The input %s (cp: %s, unit: %s) and output %s(cp: %s, unit: %s) do not have the same unit!" % ( cinput.FieldName,
+                                                                                                                       cinput.ObjectName,
+                                                                                                                       cinput.Unit,
+                                                                                                                       global_output.FieldName,
+                                                                                                                       global_output.ObjectName,
+                                                                                                                       global_output.Unit)) #
+                # Connect, i.e, save ComponentOutput and its position in the single timestep values in ComponentInput
+                cinput.SourceOutput = global_output
+                cinput.SourceIndex = global_output.GlobalIndex
+                log.debug("connected input '" + cinput.FullName + "' to '" + global_output.FullName + "'")
 
             # Check if there are inputs that have been not connected
             if cinput.Mandatory and cinput.SourceOutput is None:
@@ -153,69 +260,590 @@ class ComponentWrapper:
                         cinput.ObjectName,
                         cinput.Unit))  #
 
+class ExecutionGroup:
+    """
+    Group of components that are calculated together within one timestep.
+
+    Components that are not part of a circular connection form a group of their own
+    and are calculated exactly once per timestep. All components of one circular
+    connection (strongly connected component of the dependency graph) form a single
+    group that is iterated until its outputs converge.
+    """
+    def __init__(self, wrapped_components: List[ComponentWrapper], is_circular: bool):
+        self.WrappedComponents: List[ComponentWrapper] = wrapped_components
+        self.is_circular: bool = is_circular
+        # outputs of the group that are read by its own components and have a physical unit. Control
+        # signals (Units.Any) are left out, so the convergence strategies never blend e.g. on/off states.
+        self.loop_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        if is_circular:
+            own_outputs = set([output.GlobalIndex for wr in wrapped_components for output in wr.component_outputs])
+            loop_indices = set()
+            for wr in wrapped_components:
+                for cinput in wr.component_inputs:
+                    source = cinput.SourceOutput
+                    if source is not None and source.GlobalIndex in own_outputs and source.Unit != lt.Units.Any:
+                        loop_indices.add(source.GlobalIndex)
+            self.loop_indices = np.array(sorted(loop_indices), dtype=np.int64)
+
+    def get_names(self) -> str:
+        return ", ".join([wr.MyComponent.ComponentName for wr in self.WrappedComponents])
+
+
+def build_execution_plan(wrapped_components: List[ComponentWrapper], all_outputs: List[cp.ComponentOutput]) -> List[ExecutionGroup]:
+    """
+    Builds the order in which the components are calculated from the connections
+    between their inputs and outputs.
+
+    The strongly connected components of the dependency graph are determined with
+    Tarjan's algorithm, which finishes every group after the groups it depends on. The
+    search starts at the components in the order they were added to the simulator, so
+    components are calculated in the order of the setup function, except for components
+    whose outputs are needed earlier through their connections, which are moved right
+    before the first component that reads them.
+
+    Components that only exchange values through the SimRepository are not connected.
+    They keep the order in which they were added, unless one of them is moved before
+    the other because another component reads its outputs. A component that reads a
+    repository entry therefore has to be added after the component that writes it. If
+    the reader is moved before the writer because its outputs are needed earlier, it
+    has to be connected to an output of the writer.
+    """
+    number_of_components = len(wrapped_components)
+    # find the component that owns each global output
+    owner_of_output: List[int] = [-1] * len(all_outputs)
+    for component_index, wr in enumerate(wrapped_components):
+        for output in wr.component_outputs:
+            owner_of_output[output.GlobalIndex] = component_index
+
+    # dependencies[i] contains the components whose outputs are read by component i
+    dependencies: List[List[int]] = []
+    for wr in wrapped_components:
+        sources: List[int] = []
+        for cinput in wr.component_inputs:
+            if cinput.SourceOutput is None or cinput.SourceOutput.GlobalIndex < 0:
+                continue
+            source = owner_of_output[cinput.SourceOutput.GlobalIndex]
+            if source >= 0 and source not in sources:
+                sources.append(source)
+        # the sources are visited in the order they were added
+        dependencies.append(sorted(sources))
+
+    # Tarjan's algorithm, implemented iteratively to allow for large setups
+    index_counter = 0
+    indices: List[int] = [-1] * number_of_components
+    lowlinks: List[int] = [0] * number_of_components
+    on_stack: List[bool] = [False] * number_of_components
+    stack: List[int] = []
+    strongly_connected: List[List[int]] = []
+    for root in range(number_of_components):
+        if indices[root] >= 0:
+            continue
+        work: List[Tuple[int, int]] = [(root, 0)]
+        while work:
+            node, next_child = work.pop()
+            if next_child == 0:
+                indices[node] = index_counter
+                lowlinks[node] = index_counter
+                index_counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            recurse = False
+            for child_position in range(next_child, len(dependencies[node])):
+                child = dependencies[node][child_position]
+                if indices[child] < 0:
+                    work.append((node, child_position + 1))
+                    work.append((child, 0))
+                    recurse = True
+                    break
+                if on_stack[child]:
+                    lowlinks[node] = min(lowlinks[node], indices[child])
+            if recurse:
+                continue
+            if lowlinks[node] == indices[node]:
+                members: List[int] = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    members.append(member)
+                    if member == node:
+                        break
+                strongly_connected.append(sorted(members))
+            if work:
+                parent = work[-1][0]
+                lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+
+    # the groups are found in a topological order, every group after the groups it depends on
+    execution_plan: List[ExecutionGroup] = []
+    for members in strongly_connected:
+        is_circular = len(members) > 1 or members[0] in dependencies[members[0]]
+        execution_plan.append(ExecutionGroup([wrapped_components[member] for member in members], is_circular))
+    return execution_plan
+
+
+# the records of the results are appended to this file next to checkpoint.pkl
+CHECKPOINT_RECORDS_FILENAME = "checkpoint_records.bin"
+
+# attributes that connect a component to the simulation and are not part of its state
+WIRING_ATTRIBUTES = ["inputs", "outputs", "simulation_repository", "my_simulation_parameters", "default_connections"]
+
+
+def get_wiring(wrapped_components: List["ComponentWrapper"], repository: cp.SimRepository) -> Dict[Tuple[str, ...], Any]:
+    """
+    The objects that connect the components to the simulation, i.e. the components themselves, their inputs and
+    outputs, the simulation repository and the simulation parameters, by keys that stay the same when the
+    simulation is built again by the same setup function.
+    """
+    wiring: Dict[Tuple[str, ...], Any] = {("repository",): repository}
+    for wr in wrapped_components:
+        component = wr.MyComponent
+        name = component.ComponentName
+        wiring[("component", name)] = component
+        wiring[("parameters", name)] = component.my_simulation_parameters
+        wiring[("repository", name)] = component.__dict__.get("simulation_repository")
+        for cinput in component.inputs:
+            wiring[("input", cinput.FullName)] = cinput
+        for output in component.outputs:
+            wiring[("output", output.FullName)] = output
+    return {key: item for key, item in wiring.items() if item is not None}
+
+
+class WiringPickler(pickle.Pickler):
+    """
+    Pickles the objects of get_wiring as references to their keys, so they are not copied at any depth.
+    """
+    def __init__(self, file: io.BytesIO, wiring: Dict[Tuple[str, ...], Any]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.wiring_keys = {id(item): key for key, item in wiring.items()}
+
+    def persistent_id(self, obj: Any) -> Optional[Tuple[str, ...]]:
+        return self.wiring_keys.get(id(obj))
+
+
+class WiringUnpickler(pickle.Unpickler):
+    """
+    Unpickles the references of WiringPickler as the objects with the same keys in the current simulation.
+    """
+    def __init__(self, file: io.BytesIO, wiring: Dict[Tuple[str, ...], Any]):
+        super().__init__(file)
+        self.wiring = wiring
+
+    def persistent_load(self, pid: Any) -> Any:
+        key = tuple(pid)
+        if key not in self.wiring:
+            raise pickle.UnpicklingError("The checkpoint refers to " + " ".join(key) + ", which is not part of the simulation.")
+        return self.wiring[key]
+
+
+def dump_with_wiring(value: Any, wiring: Dict[Tuple[str, ...], Any]) -> bytes:
+    buffer = io.BytesIO()
+    WiringPickler(buffer, wiring).dump(value)
+    return buffer.getvalue()
+
+
+def load_with_wiring(data: bytes, wiring: Dict[Tuple[str, ...], Any]) -> Any:
+    return WiringUnpickler(io.BytesIO(data), wiring).load()
+
+
+def get_component_attributes(component: cp.Component, wiring: Dict[Tuple[str, ...], Any]) -> Dict[str, Any]:
+    """
+    Collects the attributes of a component for a checkpoint, without the lists of inputs and outputs and the
+    other attributes that connect it to the simulation. Attributes that can not be pickled are left out.
+    """
+    attributes = {name: value for name, value in component.__dict__.items() if name not in WIRING_ATTRIBUTES}
+    try:
+        dump_with_wiring(attributes, wiring)
+    except Exception:
+        for name in list(attributes.keys()):
+            try:
+                dump_with_wiring(attributes[name], wiring)
+            except Exception:
+                log.warning("The attribute " + name + " of " + component.ComponentName + " can not be stored in a checkpoint.")
+                del attributes[name]
+    return attributes
+
+
+def can_precompute(component: cp.Component) -> bool:
+    # components that implement i_simulate_all or i_simulate_all_inputs
+    component_class = type(component)
+    return component_class.i_simulate_all is not cp.Component.i_simulate_all \
+        or component_class.i_simulate_all_inputs is not cp.Component.i_simulate_all_inputs
+
+
+def is_time_series(value: Any, timesteps: int) -> bool:
+    # profiles and results that cover the whole simulation are not restored for a warm start
+    return isinstance(value, (list, tuple, np.ndarray, pd.Series, pd.DataFrame)) and len(value) >= timesteps
+
+
+class InitialState:
+    """
+    States of the components, the KPIs and the simulation repository before the first timestep, which are
+    restored by Simulator.reset. Attributes derived from cp.ComponentState are saved with their snapshots and
+    the other attributes, like counters and small scalars, are deep copied. Time series that cover the whole
+    simulation, like weather data, profiles and precomputed outputs, are inputs of the simulation: they are shared
+    by reference at any depth of the attributes instead of being copied for every rerun, so components must not
+    change them in place. The objects that connect the components to the simulation, i.e. the components
+    themselves, their inputs and outputs, the simulation repository and the simulation parameters, are never
+    copied either, so the restored attributes refer to the same objects as before.
+    """
+    def __init__(self, wrapped_components: List["ComponentWrapper"], kpi_accumulators: List[kpis.KpiAccumulator],
+                 repository: cp.SimRepository, timesteps: int):
+        self.states: Dict[str, Dict[str, Tuple[cp.ComponentState, Any]]] = {}
+        # attributes that can not be copied keep their current values
+        self.references: Dict[str, Dict[str, Any]] = {}
+        attributes: Dict[str, Dict[str, Any]] = {}
+        for wr in wrapped_components:
+            component = wr.MyComponent
+            name = component.ComponentName
+            self.states[name] = {key: (value, cp.get_state_snapshot(value)) for key, value in component.__dict__.items()
+                                 if isinstance(value, cp.ComponentState)}
+            attributes[name] = {key: value for key, value in component.__dict__.items() if key not in self.states[name]}
+            self.references[name] = {}
+        content = {"attributes": attributes, "kpis": {kpi.name: kpi.get_state() for kpi in kpi_accumulators},
+                   "repository": dict(repository.my_dict)}
+        wiring = self.get_wiring_memo(wrapped_components, repository)
+        self.time_series = get_time_series(content, timesteps, wiring)
+        memo = self.get_memo(wrapped_components, repository)
+        try:
+            self.content = copy.deepcopy(content, memo)
+        except Exception:
+            for name, component_attributes in attributes.items():
+                for key, value in list(component_attributes.items()):
+                    try:
+                        copy.deepcopy(value, dict(memo))
+                    except Exception:
+                        log.warning("The attribute " + key + " of " + name + " can not be copied, it is not reset.")
+                        self.references[name][key] = component_attributes.pop(key)
+            self.content = copy.deepcopy(content, memo)
+
+    @staticmethod
+    def get_wiring_memo(wrapped_components: List["ComponentWrapper"], repository: cp.SimRepository) -> Dict[int, Any]:
+        return {id(item): item for item in get_wiring(wrapped_components, repository).values()}
+
+    def get_memo(self, wrapped_components: List["ComponentWrapper"], repository: cp.SimRepository) -> Dict[int, Any]:
+        # deepcopy takes the objects in its memo as they are
+        memo = self.get_wiring_memo(wrapped_components, repository)
+        memo.update(self.time_series)
+        return memo
+
+    def restore(self, wrapped_components: List["ComponentWrapper"], kpi_accumulators: List[kpis.KpiAccumulator],
+                repository: cp.SimRepository):
+        """
+        Replaces the attributes of the components, so attributes that were added during a run are removed,
+        and the states of the KPIs and the simulation repository. The saved states stay untouched.
+        """
+        content = copy.deepcopy(self.content, self.get_memo(wrapped_components, repository))
+        for wr in wrapped_components:
+            name = wr.MyComponent.ComponentName
+            attributes: Dict[str, Any] = content["attributes"][name]
+            attributes.update(self.references[name])
+            for key, (state, snapshot) in self.states[name].items():
+                attributes[key] = cp.restore_state_snapshot(state, snapshot)
+            wr.MyComponent.__dict__.clear()
+            wr.MyComponent.__dict__.update(attributes)
+        for kpi in kpi_accumulators:
+            # KPIs that were added later were not updated yet
+            if kpi.name in content["kpis"]:
+                kpi.set_state(content["kpis"][kpi.name])
+        repository.my_dict.clear()
+        repository.my_dict.update(content["repository"])
+
+
+def is_numeric(value: Any) -> bool:
+    # sequences of objects, e.g. the layers of a storage, are part of the state of a component
+    if isinstance(value, (list, tuple)):
+        return all(isinstance(item, (int, float, np.number)) for item in value)
+    if isinstance(value, pd.DataFrame):
+        return all(dtype != object for dtype in value.dtypes)
+    return bool(value.dtype != object)
+
+
+def get_time_series(value: Any, timesteps: int, wiring: Dict[int, Any]) -> Dict[int, Any]:
+    """
+    Finds the time series that cover the whole simulation within a value, including the ones in dictionaries,
+    sequences and the attributes of objects, without looking into the objects in wiring. Returns them by their ids.
+    """
+    time_series: Dict[int, Any] = {}
+    visited = set(wiring.keys())
+    pending: List[Any] = [value]
+    while pending:
+        item = pending.pop()
+        if id(item) in visited:
+            continue
+        visited.add(id(item))
+        if is_time_series(item, timesteps) and is_numeric(item):
+            time_series[id(item)] = item
+        elif isinstance(item, dict):
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+        elif hasattr(item, "__dict__") and not callable(item) \
+                and not isinstance(item, (type, types.ModuleType, np.ndarray, pd.Series, pd.DataFrame, pd.Index)):
+            pending.extend(vars(item).values())
+    return time_series
+
+
+class SimulationResults:
+    """
+    Results of a simulation that was run in memory with Simulator.run.
+
+    values: matrix with one row per stored timestep and one column per output, None if only the KPIs were calculated
+    outputs: the stored outputs in the order of the columns
+    timeline: start of every row of the values
+    kpis: results of the KPIs by their names
+    """
+    def __init__(self, values: Optional[np.ndarray], outputs: List[cp.ComponentOutput], timeline: pd.DatetimeIndex,
+                 kpis: Dict[str, Any], seconds_per_record: int):
+        self.values = values
+        self.outputs = outputs
+        self.timeline = timeline
+        self.kpis = kpis
+        self.seconds_per_record = seconds_per_record
+
+    def get_output_metadata(self) -> List[Dict[str, str]]:
+        """
+        Object name, field name, load type and unit of every column, the same as in the Feather export.
+        """
+        return [{"ObjectName": output.ObjectName,
+                 "FieldName": output.FieldName,
+                 "LoadType": str(output.LoadType.value) if isinstance(output.LoadType, Enum) else str(output.LoadType),
+                 "Unit": str(output.Unit.value) if isinstance(output.Unit, Enum) else str(output.Unit)}
+                for output in self.outputs]
+
+    def get_column(self, full_name: str) -> np.ndarray:
+        if self.values is None:
+            raise Exception("Only the KPIs of the simulation were calculated.")
+        for index, output in enumerate(self.outputs):
+            if output.FullName == full_name:
+                return self.values[:, index]
+        raise KeyError("The output " + full_name + " was not stored.")
+
+
+SimulatorMethod = TypeVar("SimulatorMethod", bound=Callable[..., Any])
+
+
+def without_log_files_if_headless(method: SimulatorMethod) -> SimulatorMethod:
+    """
+    Calls a method of the simulator without writing the log files if the simulator has no result directory.
+    """
+    @wraps(method)
+    def wrapper(simulator: "Simulator", *args, **kwargs):
+        if simulator.writes_files:
+            return method(simulator, *args, **kwargs)
+        previous_file_logging = log.set_file_logging(False)
+        try:
+            return method(simulator, *args, **kwargs)
+        finally:
+            log.set_file_logging(previous_file_logging)
+    return cast(SimulatorMethod, wrapper)
+
+
 class Simulator:
     @utils.measure_execution_time
-    def __init__(self, module_directory: str, setup_function: str, my_simulation_parameters: SimulationParameters):
+    def __init__(self, module_directory: Optional[str], setup_function: str, my_simulation_parameters: SimulationParameters):
+        """
+        Without a module directory, the simulator writes no files at all, not even the log files, and is run
+        with run() instead of run_all_timesteps(), e.g. for the many simulations of an optimization.
+        """
+        self.writes_files: bool = module_directory is not None
+        # the components are built after the simulator, so the log files are written as long as the simulator
+        # that was created last writes files. The methods of a simulator without files never write them.
+        log.set_file_logging(self.writes_files)
         if(setup_function is None):
             raise Exception("No setup function was set")
         self.setup_function = setup_function
         self.SimulationParameters = my_simulation_parameters
         self.WrappedComponents: List[ComponentWrapper] = []
         self.all_outputs: List[cp.ComponentOutput] = []
+        # outputs by object name and field name for connecting the inputs
+        self.output_index: Dict[Tuple[str, str], cp.ComponentOutput] = {}
+        self.execution_plan: List[ExecutionGroup] = []
+        # the execution plan before the precomputed components are removed from it
+        self.full_execution_plan: List[ExecutionGroup] = []
+        # all components in the order of the execution plan, before the precomputed ones are removed from it
+        self.calculation_order: List[ComponentWrapper] = []
+        self.precomputed_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.convergence_strategy: convergence.ConvergenceStrategy = convergence.GaussSeidel()
+        self.absolute_tolerances: np.ndarray = np.zeros(0)
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        self.checkpoint_records_array: Optional[np.ndarray] = None
+        # number of records that were already written to the records file of the checkpoints
+        self.checkpoint_records: int = 0
+        self.warm_start: bool = False
+        self.precomputed_values: np.ndarray = np.zeros((0, 0))
+        # number of iterations of every timestep, only recorded if the components are profiled
+        self.iterations_per_timestep: Optional[np.ndarray] = None
+        # key performance indicators that are updated in every timestep and their results after the simulation
+        self.kpis: List[kpis.KpiAccumulator] = []
+        self.kpi_results: Dict[str, Any] = {}
+        # which outputs are stored at which resolution, see set_recording_policy
+        self.recording_policy: Optional[recording.RecordingPolicy] = None
+        self.recorded_outputs: List[cp.ComponentOutput] = []
+        self.seconds_per_record: int = my_simulation_parameters.seconds_per_timestep if my_simulation_parameters is not None else 0
+        self.recorder: Optional[recording.ResultRecorder] = None
+        # the components are connected once, the states before the first timestep are used by reset
+        self.is_prepared: bool = False
+        self.has_simulated: bool = False
+        # only stored if reruns are enabled, see enable_reruns
+        self.keeps_initial_state: bool = False
+        self.initial_state: Optional[InitialState] = None
+        # the parameters that were changed with set_parameter and are applied again after a reset
+        self.parameter_overrides: Dict[str, Any] = {}
 
+        self.simulation_repository = cp.SimRepository()
+        self.dirpath: Optional[str] = None
+        self.resultsdir: Optional[str] = None
+        if module_directory is None:
+            return
         if os.path.isdir(os.path.join(module_directory, "results")) is False:
             os.mkdir(os.path.join(module_directory, "results"))
         directoryname = "{}_{}".format(setup_function.lower(), datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
         self.dirpath = os.path.join(module_directory, "results", directoryname)
         self.resultsdir = os.path.join(module_directory, "results")
-        self.simulation_repository = cp.SimRepository()
         os.mkdir(self.dirpath)
 
-        # Creates and write result report
-        self.report = pp.report.Report(dirpath=self.dirpath)
-
 
-    def add_component(self, component: cp.Component, is_cachable: bool = False):
+    @without_log_files_if_headless
+    def add_component(self, component: cp.Component, is_cachable: bool = False, cache_size: int = 10000,
+                      cache_quantization: Optional[float] = None, skip_unchanged_inputs: bool = True):
         """
         Adds component to simulator and wraps it up
         the output in the register.
+
+        Components whose outputs only depend on the values of their inputs can be marked as cachable.
+        Their outputs are then stored for the last cache_size different input values and reused instead of
+        calling i_simulate. If cache_quantization is set, the input values are rounded to multiples of it
+        before they are compared.
+
+        Within the iterations of a circular connection, components are not calculated again if their inputs
+        did not change. Components that read values from the simulation repository need to be added with
+        skip_unchanged_inputs=False, because changes of these values can not be detected.
         """
         if self.SimulationParameters is None:
             raise Exception("Simulation Parameters were not initialized")
+        if self.is_prepared:
+            raise Exception("Components can not be added after the simulation was prepared.")
         # set the repository
         component.set_sim_repo(self.simulation_repository)
 
         # set the wrapper
-        wrap = ComponentWrapper(component, is_cachable)
-        wrap.register_component_outputs(self.all_outputs)
+        wrap = ComponentWrapper(component, is_cachable, cache_size, cache_quantization, skip_unchanged_inputs)
+        wrap.register_component_outputs(self.all_outputs, self.output_index)
         self.WrappedComponents.append(wrap)
 
+    @without_log_files_if_headless
     @utils.measure_execution_time
     def connect_all_components(self):
         """
         Connects the inputs from every component to the corresponding outputs
         """
         for wc in self.WrappedComponents:
-            wc.connect_inputs(self.all_outputs)
+            wc.connect_inputs(self.output_index)
+            wc.prepare_cache()
 
-    def process_one_timestep(self, timestep: int) -> Tuple[cp.SingleTimeStepValues, int]:
+    def set_convergence_strategy(self, convergence_strategy: convergence.ConvergenceStrategy):
+        """
+        Sets how the values of circular connections are updated between two iterations,
+        see hisim.convergence for the available strategies.
+        """
+        self.convergence_strategy = convergence_strategy
+
+    def build_absolute_tolerances(self):
+        """
+        Collects the absolute convergence tolerance of every output. Tolerances set for an output
+        take precedence over the ones for its load type, which take precedence over the default.
         """
-        Executes one simulation timestep. Some components are circurly connected.
-        To solve the circular dependency, all components have their states restored
-        and simulated until their values converge.
+        parameters = self.SimulationParameters
+        self.absolute_tolerances = np.full(len(self.all_outputs), parameters.convergence_absolute_tolerance, dtype=np.float64)
+        for output in self.all_outputs:
+            if output.FullName in parameters.convergence_tolerances_per_output:
+                self.absolute_tolerances[output.GlobalIndex] = parameters.convergence_tolerances_per_output[output.FullName]
+            elif output.LoadType in parameters.convergence_tolerances_per_load_type:
+                self.absolute_tolerances[output.GlobalIndex] = parameters.convergence_tolerances_per_load_type[output.LoadType]
+
+    @without_log_files_if_headless
+    def build_execution_plan(self):
+        """
+        Determines the calculation order of the components after all of them were connected.
+        """
+        self.execution_plan = build_execution_plan(self.WrappedComponents, self.all_outputs)
+        self.full_execution_plan = list(self.execution_plan)
+        self.calculation_order = [wr for group in self.execution_plan for wr in group.WrappedComponents]
+        self.build_absolute_tolerances()
+        circular_groups = [group for group in self.execution_plan if group.is_circular]
+        log.information("The execution plan consists of " + str(len(self.execution_plan)) + " groups, "
+                        + str(len(circular_groups)) + " of them with circular connections.")
+        for group in circular_groups:
+            log.information("Circular connection between: " + group.get_names())
+
+    def precompute_components(self, results_array: Optional[np.ndarray]):
+        """
+        Lets every component that supports it calculate its outputs for all timesteps at once. These columns
+        are written directly into the results array, if the results are stored, and the components are removed
+        from the execution plan. In every timestep the single timestep values are seeded with the precomputed
+        values instead.
+
+        The components are precomputed in the order of the execution plan, so components whose connected inputs
+        all come from precomputed components can calculate their outputs from the columns of these inputs.
+        """
+        timesteps = self.SimulationParameters.timesteps
+        precomputed_indices: List[int] = []
+        precomputed_columns: List[np.ndarray] = []
+        columns_by_index: Dict[int, np.ndarray] = {}
+        for wr in self.calculation_order:
+            columns = wr.MyComponent.i_simulate_all(timesteps)
+            connected_inputs = [cinput for cinput in wr.component_inputs if cinput.SourceOutput is not None]
+            if columns is None and len(connected_inputs) > 0 \
+                    and all(cinput.SourceIndex in columns_by_index for cinput in connected_inputs):
+                input_values = {cinput: columns_by_index[cinput.SourceIndex] for cinput in connected_inputs}
+                columns = wr.MyComponent.i_simulate_all_inputs(timesteps, input_values)
+            if columns is None:
+                continue
+            for output in wr.component_outputs:
+                if output not in columns:
+                    raise Exception("The component " + wr.MyComponent.ComponentName + " did not precompute the output " + output.FullName)
+                if len(columns[output]) != timesteps:
+                    raise Exception("The component " + wr.MyComponent.ComponentName + " precomputed " + str(len(columns[output]))
+                                    + " values for " + output.FullName + " instead of " + str(timesteps))
+                if results_array is not None:
+                    results_array[:, output.GlobalIndex] = columns[output]
+                precomputed_indices.append(output.GlobalIndex)
+                precomputed_columns.append(np.asarray(columns[output], dtype=np.float64))
+                columns_by_index[output.GlobalIndex] = precomputed_columns[-1]
+            wr.is_precomputed = True
+            log.information("Precomputed all timesteps of " + wr.MyComponent.ComponentName)
+        self.precomputed_indices = np.array(precomputed_indices, dtype=np.int64)
+        # one row per timestep with the precomputed outputs in the order of precomputed_indices
+        if len(precomputed_columns) > 0:
+            self.precomputed_values = np.stack(precomputed_columns, axis=1)
+        else:
+            self.precomputed_values = np.zeros((timesteps, 0))
+        execution_plan: List[ExecutionGroup] = []
+        for group in self.execution_plan:
+            remaining_components = [wr for wr in group.WrappedComponents if not wr.is_precomputed]
+            if len(remaining_components) == len(group.WrappedComponents):
+                execution_plan.append(group)
+            elif len(remaining_components) > 0:
+                execution_plan.append(ExecutionGroup(remaining_components, group.is_circular))
+        self.execution_plan = execution_plan
 
-        Firstly, their previously converged state is saved as the current timestep state.
-        Following up, all components have their states restored and simulated respectively.
-        Convergence is dependent on the i_restore and i_simulate of the components and how they
-        are connected to each other.
+    def process_one_timestep(self, timestep: int) -> Tuple[cp.SingleTimeStepValues, int]:
+        """
+        Executes one simulation timestep following the execution plan.
+
+        Firstly, the previously converged state of all components is saved as the current timestep state.
+        Components without circular connections are then calculated exactly once, in an order that
+        guarantees that all of their inputs are already known. Some components are circularly connected.
+        To solve the circular dependency, the components of such a loop have their states restored
+        and are simulated until their values converge. Convergence is dependent on the i_restore and
+        i_simulate of the components and how they are connected to each other. Components that
+        precomputed all timesteps are not called at all, their values are copied into the timestep values.
         """
 
         # Save states of all components
         # Executes save state in the component
         for wr in self.WrappedComponents:
-            wr.save_state()
-
-        continue_calculation = True
+            if not wr.is_precomputed:
+                wr.save_state()
 
         # Verifies data existence
         if(len(self.all_outputs)) == 0:
@@ -228,44 +856,66 @@ class Simulator:
         stsv            = cp.SingleTimeStepValues(number_of_outputs)
         # Creates a buffer List with values
         previous_values = cp.SingleTimeStepValues(number_of_outputs)
+        iterative_tries = 1
+        # Seeds the values of the precomputed components
+        if len(self.precomputed_indices) > 0:
+            stsv.values[self.precomputed_indices] = self.precomputed_values[timestep]
+
+        for group in self.execution_plan:
+            if group.is_circular:
+                group_tries = self.iterate_circular_group(group, timestep, stsv, previous_values)
+                iterative_tries = max(iterative_tries, group_tries)
+            else:
+                wr = group.WrappedComponents[0]
+                wr.restore_state()
+                wr.calculate_component(timestep, stsv, False)
+
+        for wr in self.WrappedComponents:
+            if not wr.is_precomputed:
+                wr.doublecheck(timestep, stsv)
+
+        return (stsv, iterative_tries)
+
+    def iterate_circular_group(self, group: ExecutionGroup, timestep: int, stsv: cp.SingleTimeStepValues,
+                               previous_values: cp.SingleTimeStepValues) -> int:
+        """
+        Restores and simulates the components of a circular connection until their outputs converge.
+        Returns the number of iterations that were needed.
+        """
+        parameters = self.SimulationParameters
+        continue_calculation = True
         iterative_tries = 0
         force_convergence = False
-
-       # Starts loop
+        self.convergence_strategy.reset()
+        previous_values.copy_values_from_other(stsv)
+        # Starts loop
         while continue_calculation:
-           # Loops through components
-            for wr in self.WrappedComponents:
-                #if timestep >= 10392:
-                #    log.information("Stop here!")
-
-                # Executes restore state for each component
-                wr.restore_state()
-                # Executes simulate for component
-                wr.calculate_component(timestep, stsv, force_convergence)
+            # Loops through components
+            for wr in group.WrappedComponents:
+                # Executes restore state and simulate for each component whose inputs changed
+                wr.calculate_component_if_inputs_changed(timestep, stsv, force_convergence)
 
             # Stops simulation for too small difference between
             # actual values and previous values
-            if stsv.is_close_enough_to_previous(previous_values):
-                #break
-                # todo: replace with epsilon-based check
+            if stsv.is_close_enough_to_previous(previous_values, self.absolute_tolerances,
+                                                parameters.convergence_relative_tolerance):
                 continue_calculation = False
-
-
-
-            if iterative_tries > 10:
+            else:
+                if iterative_tries > parameters.maximum_iterations:
+                    list_of_changed_values = stsv.get_differences_for_error_msg(previous_values, self.all_outputs,
+                                                                                self.absolute_tolerances,
+                                                                                parameters.convergence_relative_tolerance)
+                    raise Exception("More than " + str(parameters.maximum_iterations) + " tries in time step "
+                                    + str(timestep) + "\n" + list_of_changed_values)
+                # the values before the first sweep are no iterate of the loop, so they are not used
+                if iterative_tries > 0:
+                    self.convergence_strategy.update(previous_values, stsv, group.loop_indices)
+            if iterative_tries > parameters.force_convergence_after_iterations:
                 force_convergence = True
-            if iterative_tries > 100:
-                # return "error"
-                list_of_changed_values = stsv.get_differences_for_error_msg(previous_values, self.all_outputs)
-                raise Exception("More than 100 tries in time step " + str(timestep) + "\n" + list_of_changed_values)
             # Copies actual values to previous variable
             previous_values.copy_values_from_other(stsv)
             iterative_tries += 1
-
-        for wr in self.WrappedComponents:
-            wr.doublecheck(timestep, stsv)
-
-        return (stsv, iterative_tries)
+        return iterative_tries
 
     @utils.measure_execution_time
     def run_all_timesteps(self):
@@ -273,6 +923,172 @@ class Simulator:
         Performs all the timesteps of the simulation
         and saves the results in the attribute results
         """
+        if self.dirpath is None:
+            raise Exception("The simulator has no result directory, use run() to simulate in memory.")
+        # Starts time counter
+        start_counter = time.perf_counter()
+        results_array = self.simulate(self.SimulationParameters.store_results)
+        if results_array is None:
+            log.information("The results were not stored, so they are not post processed.")
+            if self.SimulationParameters.profile_components:
+                self.write_profile()
+            return
+        postprocessing_datatransfer = self.prepare_post_processing(results_array, start_counter)
+        if postprocessing_datatransfer is None:
+            raise Exception("PPDT was none")
+
+        # the post processing needs matplotlib and reportlab, so it is only imported when it is used
+        from hisim.postprocessing import postprocessing_main as pp
+        my_post_processor = pp.PostProcessor(ppdt=postprocessing_datatransfer)
+        my_post_processor.run()
+        if self.SimulationParameters.profile_components:
+            my_post_processor.write_to_report(self.write_profile())
+
+    @without_log_files_if_headless
+    def run(self, kpis_only: bool = False) -> SimulationResults:
+        """
+        Simulates all timesteps in memory and returns the results, without report, post processing or logging
+        below warnings. A simulator without module directory writes no files at all, so it can not write
+        checkpoints or memory mapped results. With kpis_only, no results are stored and only the KPIs are returned.
+        """
+        if self.dirpath is None and (self.SimulationParameters.checkpoint_interval > 0
+                                     or self.SimulationParameters.memory_mapped_results):
+            raise Exception("Checkpoints and memory mapped results need a result directory.")
+        previous_log_level = log.set_log_level(log.LogPrio.Warning)
+        try:
+            results_array = self.simulate(not kpis_only)
+        finally:
+            log.set_log_level(previous_log_level)
+        timeline = pd.date_range(start=self.SimulationParameters.start_date,
+                                 periods=0 if results_array is None else len(results_array),
+                                 freq='{}S'.format(self.seconds_per_record))
+        return SimulationResults(results_array, self.recorded_outputs, timeline, self.kpi_results, self.seconds_per_record)
+
+    @without_log_files_if_headless
+    def prepare_simulation(self):
+        """
+        Connects the components and builds the execution plan. If reruns are enabled, the initial states
+        are stored for reset. This only happens once, later runs reuse the connected components.
+        """
+        if self.is_prepared:
+            return
+        # Connects all components
+        self.connect_all_components()
+        log.information("finished connecting all components. A total of " + str(len(self.WrappedComponents)) + " components were defined. They have a total of "
+                     + str(len(self.all_outputs)) + " outputs.")
+        self.build_execution_plan()
+        self.is_prepared = True
+        if self.keeps_initial_state:
+            self.store_initial_state()
+
+    @without_log_files_if_headless
+    def enable_reruns(self):
+        """
+        Stores the states of the components before the first run, so the simulation can be reset and run again.
+        It is only needed if the simulation is reset after it was run, reset and set_parameter store the initial
+        states themselves as long as nothing was simulated yet.
+        """
+        if self.has_simulated and self.initial_state is None:
+            raise Exception("Reruns have to be enabled before the simulation is run.")
+        self.keeps_initial_state = True
+        if self.is_prepared:
+            self.store_initial_state()
+
+    def store_initial_state(self):
+        if self.initial_state is not None:
+            return
+        if self.has_simulated:
+            raise Exception("The simulation was already run without storing its initial states. "
+                            "Call enable_reruns before the first run to reset it.")
+        self.prepare_simulation()
+        self.initial_state = InitialState(self.WrappedComponents, self.kpis, self.simulation_repository,
+                                          self.SimulationParameters.timesteps)
+
+    @without_log_files_if_headless
+    def reset(self):
+        """
+        Restores the components, the KPIs and the simulation repository to their states before the first
+        timestep and applies the parameters that were changed with set_parameter again, so the simulation can
+        be run again without building the components and loading their inputs again.
+        """
+        self.store_initial_state()
+        assert self.initial_state is not None
+        self.initial_state.restore(self.WrappedComponents, self.kpis, self.simulation_repository)
+        for wr in self.WrappedComponents:
+            wr.reset()
+        # the precomputed components are determined again in the next run
+        self.execution_plan = list(self.full_execution_plan)
+        self.precomputed_indices = np.zeros(0, dtype=np.int64)
+        self.precomputed_values = np.zeros((0, 0))
+        for path, value in self.parameter_overrides.items():
+            self.set_attribute(path, value)
+        self.checkpoint = None
+        self.checkpoint_records_array = None
+        self.warm_start = False
+        self.kpi_results = {}
+
+    @without_log_files_if_headless
+    def set_parameter(self, path: str, value: Any):
+        """
+        Sets an attribute of a component by a dotted path that starts with the name of the component, e.g.
+        "Battery.capacity" or "Controller.config.threshold". Dictionaries on the path are indexed by their keys.
+        Only existing attributes can be set, so misspelled paths raise an exception. The parameter keeps its
+        value when the simulation is reset.
+        """
+        self.store_initial_state()
+        self.set_attribute(path, value)
+        self.warn_if_precomputed(path)
+        self.parameter_overrides[path] = value
+
+    def warn_if_precomputed(self, path: str):
+        # the outputs of these components are usually calculated from their parameters while they are built
+        component_name = path.partition(".")[0]
+        for wr in self.WrappedComponents:
+            if wr.MyComponent.ComponentName == component_name and can_precompute(wr.MyComponent):
+                log.warning("The component " + component_name + " can calculate all timesteps in advance from the "
+                            "parameters it was built with, so setting " + path + " might have no effect.")
+
+    def set_attribute(self, path: str, value: Any):
+        component_name, _, attribute_path = path.partition(".")
+        components = {wr.MyComponent.ComponentName: wr.MyComponent for wr in self.WrappedComponents}
+        if component_name not in components:
+            raise KeyError("There is no component with the name " + component_name)
+        if attribute_path == "":
+            raise ValueError("The path " + path + " does not contain an attribute of the component.")
+        names = attribute_path.split(".")
+        target: Any = components[component_name]
+        for name in names[:-1]:
+            target = target[name] if isinstance(target, dict) else getattr(target, name)
+        if isinstance(target, dict):
+            if names[-1] not in target:
+                raise KeyError("The path " + path + " does not exist.")
+            target[names[-1]] = value
+        else:
+            if not hasattr(target, names[-1]):
+                raise AttributeError("The path " + path + " does not exist.")
+            setattr(target, names[-1], value)
+
+    @without_log_files_if_headless
+    def rerun(self, overrides: Optional[Dict[str, Any]] = None, kpis_only: bool = False) -> SimulationResults:
+        """
+        Resets the simulation, sets the overrides, which are keyed by the dotted paths of set_parameter, and runs
+        it again in memory. The overrides only apply to this run, so they do not carry over to the next rerun,
+        unlike parameters that were changed with set_parameter. Parameters that the components only use while
+        they are built, e.g. to load their inputs, have no effect, so a warning is logged for the parameters of
+        components that can calculate all timesteps in advance.
+        """
+        self.reset()
+        if overrides is not None:
+            for path, value in overrides.items():
+                self.set_attribute(path, value)
+                self.warn_if_precomputed(path)
+        return self.run(kpis_only)
+
+    def simulate(self, store_results: bool) -> Optional[np.ndarray]:
+        """
+        Connects the components, performs all timesteps and collects the KPIs. Returns the stored
+        results, which are None if they are not stored.
+        """
         # Error Tests
         # Test if all parameters were initialized
         if self.SimulationParameters is None:
@@ -282,31 +1098,61 @@ class Simulator:
         if len(self.WrappedComponents) == 0:
             raise Exception("Not a single component was defined. Quitting.")
 
-        # Starts time counter
-        start_counter = time.perf_counter()
-
-        # Connects all components
-        self.connect_all_components()
-        log.information("finished connecting all components. A total of " + str(len(self.WrappedComponents)) + " components were defined. They have a total of "
-                     + str(len(self.all_outputs)) + " outputs.")
-        all_result_lines = []
+        self.prepare_simulation()
+        self.has_simulated = True
+        if self.SimulationParameters.profile_components:
+            self.enable_profiling()
+        for kpi in self.kpis:
+            kpi.prepare(self.SimulationParameters.seconds_per_timestep)
+        policy = self.get_recording_policy()
+        self.recorded_outputs = policy.select_outputs(self.all_outputs)
+        self.seconds_per_record = policy.steps * self.SimulationParameters.seconds_per_timestep
+        results_array: Optional[np.ndarray] = None
+        self.recorder = None
+        self.checkpoint_records = 0
+        if store_results:
+            results_array = self.allocate_results_array((policy.get_number_of_records(self.SimulationParameters.timesteps),
+                                                         len(self.recorded_outputs)))
+            self.recorder = recording.ResultRecorder(policy, self.recorded_outputs, len(self.all_outputs), results_array)
+            if not self.recorder.records_all_values:
+                log.information("Storing " + str(len(self.recorded_outputs)) + " of " + str(len(self.all_outputs))
+                                + " outputs with " + str(self.seconds_per_record) + " seconds per value")
+        # precomputed columns can only be written directly if every value is stored as it is
+        self.precompute_components(results_array if self.recorder is not None and self.recorder.records_all_values else None)
+        first_step, total_iteration_tries = self.apply_checkpoint()
         log.information("Starting simulation for " + str(self.SimulationParameters.timesteps) + " timesteps")
         lastmessage = datetime.datetime.now()
         starttime = datetime.datetime.now()
-        total_iteration_tries = 0
-
+        checkpoint_interval = self.SimulationParameters.checkpoint_interval
 
-        for step in range(self.SimulationParameters.timesteps):
+        for step in range(first_step, self.SimulationParameters.timesteps):
             if self.SimulationParameters.timesteps % 500 == 0:
                 log.information("Starting step " + str(step))
 
-            (result, iteration_tries) = self.process_one_timestep(step)
+            try:
+                (result, iteration_tries) = self.process_one_timestep(step)
+            except Exception:
+                if checkpoint_interval > 0:
+                    # go back to the beginning of the failed timestep, so the simulation can be resumed from there
+                    for wr in self.WrappedComponents:
+                        if not wr.is_precomputed:
+                            wr.restore_state()
+                    self.write_checkpoint(step, total_iteration_tries)
+                raise
 
             # Accumulates iteration counter
             total_iteration_tries += iteration_tries
+            if self.iterations_per_timestep is not None:
+                self.iterations_per_timestep[step] = iteration_tries
 
-            # Appends
-            all_result_lines.append(result.values)
+            # Writes the converged values into the results following the recording policy
+            if self.recorder is not None:
+                self.recorder.record(step, result.values, step == self.SimulationParameters.timesteps - 1)
+            for kpi in self.kpis:
+                kpi.update(result.values)
+
+            if checkpoint_interval > 0 and (step + 1) % checkpoint_interval == 0 and step + 1 < self.SimulationParameters.timesteps:
+                self.write_checkpoint(step + 1, total_iteration_tries)
 
             # Calculates time execution
             elapsed = datetime.datetime.now() - lastmessage
@@ -315,29 +1161,250 @@ class Simulator:
             if (elapsed.total_seconds() > 5):
                 lastmessage = self.show_progress(lastmessage, starttime, step, total_iteration_tries)
 
-        postprocessing_datatransfer = self.prepare_post_processing(all_result_lines, start_counter)
-        if postprocessing_datatransfer is None:
-            raise Exception("PPDT was none")
+        self.log_cache_statistics()
+        self.write_kpis()
+        return results_array
 
-        my_post_processor = pp.PostProcessor(ppdt=postprocessing_datatransfer)
-        my_post_processor.run()
+    def set_recording_policy(self, recording_policy: recording.RecordingPolicy):
+        """
+        Sets which outputs are stored in the results and at which resolution. It takes precedence over the
+        recording policy of the simulation parameters.
+        """
+        self.recording_policy = recording_policy
+
+    def get_recording_policy(self) -> recording.RecordingPolicy:
+        if self.recording_policy is not None:
+            return self.recording_policy
+        if self.SimulationParameters.recording_policy is not None:
+            return self.SimulationParameters.recording_policy
+        return recording.RecordingPolicy()
+
+    def add_kpi(self, kpi: kpis.KpiAccumulator):
+        """
+        Adds a key performance indicator that is updated in every timestep and written to kpis.json in the
+        result directory. Its outputs need to belong to components that were already added.
+        """
+        if any(existing.name == kpi.name for existing in self.kpis):
+            raise Exception("There is already a KPI with the name " + kpi.name)
+        self.kpis.append(kpi)
+
+    def get_result_directory(self) -> str:
+        if self.dirpath is None:
+            raise Exception("The simulator was created without a module directory, so it can not write any files.")
+        return self.dirpath
+
+    def write_kpis(self):
+        """
+        Collects the results of all KPIs in kpi_results and writes them to kpis.json in the result directory.
+        """
+        self.kpi_results = {kpi.name: kpi.get_result() for kpi in self.kpis}
+        if len(self.kpis) == 0 or self.dirpath is None:
+            return
+        with open(os.path.join(self.dirpath, "kpis.json"), "w") as kpi_file:
+            json.dump(self.kpi_results, kpi_file, indent=4)
+        for name, result in self.kpi_results.items():
+            log.information("KPI " + name + ": " + str(result))
+
+    def enable_profiling(self):
+        """
+        Measures the wall time and the calls of the wrapper methods of every component and records the
+        number of iterations of every timestep. Without profiling, the simulation loop is not changed at all.
+        """
+        for wr in self.WrappedComponents:
+            wr.enable_profiling()
+        self.iterations_per_timestep = np.zeros(self.SimulationParameters.timesteps, dtype=np.int64)
+
+    def write_profile(self) -> List[str]:
+        """
+        Writes the profile of the components to component_profile.json and component_profile.csv and the
+        iterations of every timestep to iterations_per_timestep.csv in the result directory.
+        Returns a summary with the slowest components first for the report.
+        """
+        dirpath = self.get_result_directory()
+        components: Dict[str, Any] = {}
+        rows = []
+        for wr in self.WrappedComponents:
+            if not wr.is_profiled:
+                continue
+            name = wr.MyComponent.ComponentName
+            methods = {method_name: {"calls": wr.profile_calls[method_name], "seconds": wr.profile_seconds[method_name]}
+                       for method_name in PROFILED_METHODS}
+            components[name] = {"methods": methods,
+                                "total_seconds": sum(wr.profile_seconds.values()),
+                                "skipped_calculations": wr.skipped_calculations,
+                                "is_precomputed": wr.is_precomputed}
+            for method_name, entry in methods.items():
+                rows.append({"Component": name, "Method": method_name, "Calls": entry["calls"], "Seconds": entry["seconds"]})
+        iterations = self.iterations_per_timestep
+        if iterations is None:
+            iterations = np.zeros(0, dtype=np.int64)
+        profile = {"components": components,
+                   "iterations": {"total": int(iterations.sum()),
+                                  "mean": float(iterations.mean()) if len(iterations) > 0 else 0.0,
+                                  "maximum": int(iterations.max()) if len(iterations) > 0 else 0}}
+        with open(os.path.join(dirpath, "component_profile.json"), "w") as profile_file:
+            json.dump(profile, profile_file, indent=4)
+        pd.DataFrame(rows, columns=["Component", "Method", "Calls", "Seconds"]).to_csv(
+            os.path.join(dirpath, "component_profile.csv"), index=False)
+        pd.DataFrame({"Iterations": iterations}).to_csv(
+            os.path.join(dirpath, "iterations_per_timestep.csv"), index_label="Timestep")
+        log.information("Wrote the component profile to " + dirpath)
+
+        summary = ["Component profile (wall time of save state, restore state, calculation and doublecheck):"]
+        for name, entry in sorted(components.items(), key=lambda item: item[1]["total_seconds"], reverse=True):
+            summary.append("{}: {:.3f} s, {} calculations, {} skipped".format(
+                name, entry["total_seconds"], entry["methods"]["calculate_component"]["calls"],
+                entry["skipped_calculations"]))
+        summary.append("Iterations per timestep: {:.2f} on average, at most {}".format(
+            profile["iterations"]["mean"], profile["iterations"]["maximum"]))
+        return summary
+
+    def write_checkpoint(self, next_timestep: int, total_iteration_tries: int):
+        """
+        Writes the attributes of all components and the content of the simulation repository to checkpoint.pkl
+        in the result directory and appends the records of the results up to next_timestep to their file.
+        The checkpoint is replaced atomically, so an interrupted simulation always leaves a complete checkpoint.
+        """
+        results_state: Optional[Dict[str, Any]] = None
+        if self.recorder is not None:
+            results_state = self.recorder.get_state(next_timestep)
+            self.append_checkpoint_records(results_state["records"])
+            results_state["filename"] = CHECKPOINT_RECORDS_FILENAME
+            results_state["columns"] = len(self.recorded_outputs)
+        # the objects that connect the components are stored as references, so they are not replaced when the
+        # checkpoint is applied
+        wiring = get_wiring(self.WrappedComponents, self.simulation_repository)
+        state = {
+            "component_attributes": {wr.MyComponent.ComponentName: get_component_attributes(wr.MyComponent, wiring)
+                                     for wr in self.WrappedComponents if not wr.is_precomputed},
+            "kpis": {kpi.name: kpi.get_state() for kpi in self.kpis},
+            "repository": self.simulation_repository.my_dict,
+        }
+        checkpoint = {
+            "timesteps": self.SimulationParameters.timesteps,
+            "next_timestep": next_timestep,
+            "total_iteration_tries": total_iteration_tries,
+            "output_names": [output.FullName for output in self.all_outputs],
+            "state": dump_with_wiring(state, wiring),
+            "results": results_state,
+        }
+        filename = os.path.join(self.get_result_directory(), "checkpoint.pkl")
+        temporary_filename = filename + ".tmp"
+        with open(temporary_filename, "wb") as checkpoint_file:
+            pickle.dump(checkpoint, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_filename, filename)
+        log.information("Wrote checkpoint at timestep " + str(next_timestep) + " to " + filename)
+
+    def append_checkpoint_records(self, records: int):
+        """
+        Appends the records that were completed since the last checkpoint to the records file of the checkpoints,
+        so the results are written only once during a simulation. The checkpoint only refers to the number of
+        records, rows of an interrupted append behind them are ignored when it is loaded.
+        """
+        assert self.recorder is not None
+        filename = os.path.join(self.get_result_directory(), CHECKPOINT_RECORDS_FILENAME)
+        mode = "ab" if self.checkpoint_records > 0 else "wb"
+        with open(filename, mode) as records_file:
+            records_file.seek(self.checkpoint_records * len(self.recorded_outputs) * 8)
+            records_file.truncate()
+            self.recorder.get_records(self.checkpoint_records, records).astype(np.float64).tofile(records_file)
+            records_file.flush()
+            os.fsync(records_file.fileno())
+        self.checkpoint_records = records
+
+    def load_checkpoint(self, filename: str, warm_start: bool = False):
+        """
+        Loads a checkpoint that is applied when the simulation starts. The setup function has to create the
+        same components with the same outputs as the simulation that wrote the checkpoint.
+
+        Without warm start the simulation is resumed at the timestep of the checkpoint. With warm start the
+        simulation starts at the first timestep, but with the states of the components in the checkpoint,
+        e.g. a building that was already heated up in another simulation. Time series that cover the whole
+        simulation period, like profiles, as well as the simulation repository are not taken over in that case.
+        """
+        with open(filename, "rb") as checkpoint_file:
+            self.checkpoint = pickle.load(checkpoint_file)
+        results_state = self.checkpoint["results"]
+        if results_state is not None and not warm_start:
+            # the records are stored next to the checkpoint
+            records_filename = os.path.join(os.path.dirname(filename), results_state["filename"])
+            records = np.fromfile(records_filename, dtype=np.float64,
+                                  count=results_state["records"] * results_state["columns"])
+            self.checkpoint_records_array = records.reshape(results_state["records"], results_state["columns"])
+        self.warm_start = warm_start
+        log.information("Loaded checkpoint " + filename)
+
+    def apply_checkpoint(self) -> Tuple[int, int]:
+        """
+        Restores the loaded checkpoint, if any. Returns the first timestep to simulate and the
+        number of iterations that were already needed.
+        """
+        if self.checkpoint is None:
+            return 0, 0
+        checkpoint = self.checkpoint
+        if checkpoint["output_names"] != [output.FullName for output in self.all_outputs]:
+            raise Exception("The checkpoint was written for a simulation with different outputs.")
+        if not self.warm_start and checkpoint["timesteps"] != self.SimulationParameters.timesteps:
+            raise Exception("The checkpoint was written for a simulation with " + str(checkpoint["timesteps"])
+                            + " timesteps instead of " + str(self.SimulationParameters.timesteps))
+        state = load_with_wiring(checkpoint["state"], get_wiring(self.WrappedComponents, self.simulation_repository))
+        for wr in self.WrappedComponents:
+            if wr.is_precomputed:
+                continue
+            name = wr.MyComponent.ComponentName
+            if name not in state["component_attributes"]:
+                raise Exception("The checkpoint does not contain the component " + name)
+            attributes: Dict[str, Any] = state["component_attributes"][name]
+            if self.warm_start:
+                attributes = {key: value for key, value in attributes.items() if not is_time_series(value, checkpoint["timesteps"])}
+            wr.MyComponent.__dict__.update(attributes)
+        if self.warm_start:
+            log.information("Warm start with the component states of the checkpoint")
+            return 0, 0
+        next_timestep: int = checkpoint["next_timestep"]
+        if self.recorder is not None:
+            if checkpoint["results"] is None:
+                raise Exception("The checkpoint was written by a simulation that did not store its results.")
+            assert self.checkpoint_records_array is not None
+            self.recorder.set_state(checkpoint["results"], self.checkpoint_records_array)
+        for kpi in self.kpis:
+            if kpi.name not in state["kpis"]:
+                raise Exception("The checkpoint does not contain the KPI " + kpi.name)
+            kpi.set_state(state["kpis"][kpi.name])
+        self.simulation_repository.my_dict.update(state["repository"])
+        log.information("Resuming the simulation at timestep " + str(next_timestep))
+        return next_timestep, checkpoint["total_iteration_tries"]
+
+    def allocate_results_array(self, shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Preallocates the matrix with one row per timestep and one column per output, unless another
+        shape is given. If the simulation parameters ask for it, the matrix is a memory mapped file in the
+        result directory, so the results of long simulations do not have to fit into memory.
+        """
+        if shape is None:
+            shape = (self.SimulationParameters.timesteps, len(self.all_outputs))
+        if self.SimulationParameters.memory_mapped_results:
+            filename = os.path.join(self.get_result_directory(), "results.npy")
+            log.information("Storing the results in the memory mapped file " + filename)
+            results_array: np.ndarray = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float64, shape=shape)
+            return results_array
+        return np.zeros(shape, dtype=np.float64)
 
     @utils.measure_execution_time
-    def prepare_post_processing(self, all_result_lines, start_counter):
-        if len(all_result_lines) != self.SimulationParameters.timesteps:
+    def prepare_post_processing(self, results_array: np.ndarray, start_counter):
+        if results_array.shape != (self.get_recording_policy().get_number_of_records(self.SimulationParameters.timesteps),
+                                   len(self.recorded_outputs)):
             raise Exception("not all lines were generated")
-        # npr = np.concatenate(all_result_lines, axis=0)
         columNames = []
         if (self.setup_function is None):
             raise Exception("No setup function was set")
         entry: cp.ComponentOutput
-        np_results = np.array(all_result_lines)
-        for index, entry in enumerate(self.all_outputs):
+        for index, entry in enumerate(self.recorded_outputs):
             column_name = entry.get_pretty_name()
             columNames.append(column_name)
             log.debug("Output column: " + column_name)
-            # self.all_outputs[index].Results = np_results[:, index]
-        self.results = pd.DataFrame(data=all_result_lines, columns=columNames)
+        # wraps the results array without copying it
+        self.results = pd.DataFrame(data=results_array, columns=columNames, copy=False)
         index = pd.date_range("2021-01-01 00:00:00", periods=len(self.results), freq="T")
         self.results.index = index
         end_counter = time.perf_counter()
@@ -345,12 +1412,15 @@ class Simulator:
         simulation_time = "Simulation took {:4.0f}s".format(self.execution_time)
         self.get_std_results()
         # Johanna Ganglbauer: time correction factor is applied in postprocessing to sum over power values and convert them to energy
-        time_correction_factor = self.SimulationParameters.seconds_per_timestep / 3600
+        time_correction_factor = self.seconds_per_record / 3600
+        from hisim.postprocessing import postprocessing_main as pp
+        # Creates and write result report
+        self.report = pp.report.Report(dirpath=self.get_result_directory())
         ppdt = pp.PostProcessingDataTransfer(
             time_correction_factor=time_correction_factor,
-            directory_path=self.dirpath,
+            directory_path=self.get_result_directory(),
             results=self.results,
-            all_outputs=self.all_outputs,
+            all_outputs=self.recorded_outputs,
             simulation_parameters=self.SimulationParameters,
             wrapped_components=self.WrappedComponents,
             story=self.report.story,
@@ -361,6 +1431,15 @@ class Simulator:
         )
         return ppdt
 
+    def log_cache_statistics(self):
+        for wr in self.WrappedComponents:
+            if not wr.is_cachable:
+                continue
+            calls = wr.cache_hits + wr.cache_misses
+            hit_rate = 0.0 if calls == 0 else wr.cache_hits / calls * 100
+            log.information("Cache of " + wr.MyComponent.ComponentName + ": " + str(wr.cache_hits) + " hits, "
+                            + str(wr.cache_misses) + " misses ({:.1f}% hit rate)".format(hit_rate))
+
     def show_progress(self, lastmessage, starttime, step, total_iteration_tries):
         # Calculates time execution
         lastmessage = datetime.datetime.now()
@@ -387,34 +1466,28 @@ class Simulator:
         return lastmessage
 
     def get_std_results(self):
-        pd_timeline = pd.date_range(start=self.SimulationParameters.start_date,
-                                    end=self.SimulationParameters.end_date,
-                                    freq='{}S'.format(self.SimulationParameters.seconds_per_timestep))[:-1]
-        n_columns = self.results.shape[1]
-        df = pd.DataFrame()
-        for i_column in range(n_columns):
-            temp_df = pd.DataFrame(self.results.values[:, i_column], index=pd_timeline, columns=[self.results.columns[i_column]])
-            if 'Temperature' in self.results.columns[i_column] or 'Percent' in self.results.columns[i_column]:
-                temp_df = temp_df.resample('H').interpolate(method='linear')
-            else:
-                temp_df = temp_df.resample('H').sum()
-            df[temp_df.columns[0]] = temp_df.values[:, 0]
-            df.index = temp_df.index
-
+        """
+        Aggregates the results to hourly values in results_std and to monthly values in results_m.
+        """
+        pd_timeline = self.get_timeline()
         self.results.index = pd_timeline
-        self.results_std = df
+        self.results_std = self.get_aggregated_results("H")
+        self.results_m = self.get_aggregated_results("M")
 
-        dfm = pd.DataFrame()
-        for i_column in range(n_columns):
-            temp_df = pd.DataFrame(self.results.values[:, i_column], index=pd_timeline, columns=[self.results.columns[i_column]])
-            if 'Temperature' in self.results.columns[i_column] or 'Percent' in self.results.columns[i_column]:
-                temp_df = temp_df.resample('M').interpolate(method='linear')
-            else:
-                temp_df = temp_df.resample('M').sum()
-            dfm[temp_df.columns[0]] = temp_df.values[:, 0]
-            dfm.index = temp_df.index
+    def get_timeline(self) -> pd.DatetimeIndex:
+        # the start of every stored row of the results
+        pd_timeline: pd.DatetimeIndex = pd.date_range(start=self.SimulationParameters.start_date,
+                                                      periods=len(self.results),
+                                                      freq='{}S'.format(self.seconds_per_record))
+        return pd_timeline
 
-        self.results_m = dfm
+    def get_aggregated_results(self, frequency: str) -> pd.DataFrame:
+        """
+        Aggregates the results to periods of any pandas frequency, e.g. "15min", "D" or "W".
+        Temperatures and percentages are averaged, power is integrated to energy and everything else is summed up.
+        """
+        return aggregation.aggregate_results(self.results.values, self.get_timeline(), self.recorded_outputs, frequency,
+                                             self.seconds_per_record)
 
 
 
@@ -8,9 +8,11 @@ import sys
 import inspect
 from enum import Enum, IntEnum
 import pdb
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 import hashlib
 import  json
+import importlib.util
+import types
 from functools import wraps
 from timeit import default_timer as timer
 from hisim import log
@@ -191,6 +193,28 @@ class PostProcessingOptions(IntEnum):
     Plot_Bar = 5
     Open_Directory = 6
     Export_To_CSV = 7
+    Export_To_Feather = 8
+
+# name of the column with the time of every timestep in exported results
+RESULTS_TIME_COLUMN = "Time"
+
+def load_results(filename: str, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Dict[str, Dict[str, str]]]:
+    """
+    Loads the results that were exported with PostProcessingOptions.Export_To_Feather. Uncompressed files are
+    memory mapped, so only the selected columns are read from the disk and their values are not copied.
+    Returns the results with the time as index and the object name, field name, load type and unit of every column.
+    """
+    # pyarrow is only needed for the columnar export, so it is not imported with the rest of hisim
+    from pyarrow import feather
+    if columns is not None:
+        columns = [RESULTS_TIME_COLUMN] + columns
+    table = feather.read_table(filename, columns=columns, memory_map=True)
+    metadata: Dict[str, Dict[str, str]] = {}
+    for field in table.schema:
+        if field.metadata is not None:
+            metadata[field.name] = {key.decode(): value.decode() for key, value in field.metadata.items()}
+    results: pd.DataFrame = table.to_pandas(split_blocks=True).set_index(RESULTS_TIME_COLUMN)
+    return results, metadata
 
 class Outputs:
 
@@ -446,6 +470,23 @@ def open_pickle(dirname):
         extracted_pickle = pickle.load(input)
     return extracted_pickle, dir_path
 
+def lazy_import(module_name: str) -> types.ModuleType:
+    """
+    Returns a module that is only loaded when one of its attributes is used for the first time. This keeps
+    expensive imports like pvlib out of the startup of simulations that never need them.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError("No module named " + module_name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    return module
+
 def measure_execution_time( my_function ):
     @wraps(my_function)
     def wrapTheFunction(*args, **kwargs):
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim.postprocessing import aggregation
+
+
+def test_aggregate_results():
+    outputs = [cp.ComponentOutput("Building", "Temperature", lt.LoadTypes.Temperature, lt.Units.Celsius),
+               cp.ComponentOutput("PV", "Power", lt.LoadTypes.Electricity, lt.Units.Watt),
+               cp.ComponentOutput("Tank", "Water", lt.LoadTypes.WarmWater, lt.Units.Liter)]
+    for index, output in enumerate(outputs):
+        output.GlobalIndex = index
+    timeline = pd.date_range("2021-01-01", periods=2 * 24 * 60, freq="T")
+    results = np.zeros((len(timeline), 3))
+    results[:, 0] = np.arange(len(timeline)) % 60
+    results[:, 1] = 600
+    results[:, 2] = 0.5
+
+    hourly = aggregation.aggregate_results(results, timeline, outputs, "H", 60)
+    assert len(hourly) == 48
+    assert np.allclose(hourly.iloc[:, 0], 29.5)
+    # 600 W for one hour are 600 Wh
+    assert np.allclose(hourly.iloc[:, 1], 600)
+    assert np.allclose(hourly.iloc[:, 2], 30)
+
+    quarter_hourly = aggregation.aggregate_results(results, timeline, outputs, "15min", 60)
+    assert len(quarter_hourly) == 4 * 48
+    assert np.allclose(quarter_hourly.iloc[:, 1], 150)
+
+    daily = aggregation.aggregate_results(results, timeline, outputs, "D", 60)
+    assert list(daily.index) == list(pd.date_range("2021-01-01", periods=2, freq="D"))
+    assert np.allclose(daily.iloc[:, 1], 24 * 600)
+    assert np.allclose(daily.iloc[:, 2], 24 * 60 * 0.5)
+
+    # periods shorter than a timestep have no values
+    coarse_timeline = pd.date_range("2021-01-01", periods=4, freq="H")
+    coarse = aggregation.aggregate_results(results[:4], coarse_timeline, outputs, "30min", 3600)
+    assert len(coarse) == 7
+    assert np.isnan(coarse.iloc[1, 0])
+    assert coarse.iloc[2, 1] == 600
+
+    # power outputs are labeled with the unit of their aggregated energy
+    assert hourly.columns[1] == "PV - Power [Electricity - Wh]"
+    assert hourly.columns[0] == outputs[0].get_pretty_name()
+    assert aggregation.get_aggregated_unit(outputs[1]) == lt.Units.Wh
@@ -0,0 +1,99 @@
+import os
+from multiprocessing import shared_memory
+from typing import List
+import numpy as np
+import pandas as pd
+import pytest
+from hisim import loadtypes as lt
+from hisim.simulationparameters import SimulationParameters
+from hisim.postprocessing import chart_jobs
+from hisim.postprocessing import charts
+
+
+def make_chart_data(directory) -> chart_jobs.ChartData:
+    index = pd.date_range("2021-01-01", periods=1440, freq="T")
+    values = np.stack([np.sin(np.arange(1440) / 100), np.arange(1440) * 2.0], axis=1)
+    monthly_values = np.ones((12, 2))
+    return chart_jobs.ChartData(values, index, monthly_values, str(directory), 1 / 60)
+
+
+def test_render_charts_in_processes(tmp_path):
+    jobs = [chart_jobs.ChartJob(chart_jobs.LINE, "Source # Temperature", 0, lt.Units.Celsius),
+            chart_jobs.ChartJob(chart_jobs.DAY, "Source # Power", 1, lt.Units.Watt),
+            chart_jobs.ChartJob(chart_jobs.BAR, "Source # Power", 1, lt.Units.Watt)]
+    serial_directory = tmp_path / "serial"
+    parallel_directory = tmp_path / "parallel"
+    serial_directory.mkdir()
+    parallel_directory.mkdir()
+    chart_jobs.render_charts(jobs, make_chart_data(serial_directory), processes=1)
+    chart_jobs.render_charts(jobs, make_chart_data(parallel_directory), processes=2)
+    assert len(os.listdir(serial_directory)) == 3
+    assert sorted(os.listdir(serial_directory)) == sorted(os.listdir(parallel_directory))
+
+
+def test_chart_cache(tmp_path, monkeypatch):
+    jobs = [chart_jobs.ChartJob(chart_jobs.LINE, "Source # Temperature", 0, lt.Units.Celsius),
+            chart_jobs.ChartJob(chart_jobs.BAR, "Source # Power", 1, lt.Units.Watt)]
+    cache_directory = str(tmp_path / "cache")
+    first_directory = tmp_path / "first"
+    first_directory.mkdir()
+    chart_jobs.render_charts(jobs, make_chart_data(first_directory), cache_directory=cache_directory)
+    assert len(os.listdir(cache_directory)) == 2
+
+    # identical charts are copied from the cache instead of being drawn again
+    def fail(self):
+        raise Exception("The chart should have been taken from the cache.")
+    monkeypatch.setattr(charts.Line, "plot", fail)
+    monkeypatch.setattr(charts.Bar, "plot", fail)
+    second_directory = tmp_path / "second"
+    second_directory.mkdir()
+    chart_jobs.render_charts(jobs, make_chart_data(second_directory), cache_directory=cache_directory)
+    for filename in os.listdir(first_directory):
+        with open(first_directory / filename, "rb") as first, open(second_directory / filename, "rb") as second:
+            assert first.read() == second.read()
+
+    # changed data is drawn again
+    changed_data = make_chart_data(tmp_path)
+    changed_data.values[0, 0] = 5
+    with pytest.raises(Exception):
+        chart_jobs.render_charts(jobs[:1], changed_data, cache_directory=cache_directory)
+
+
+def test_output_selection():
+    parameters = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    assert parameters.is_output_selected("Weather # TemperatureOutside", lt.LoadTypes.Temperature)
+    parameters.post_processing_output_patterns = ["Weather # *"]
+    parameters.post_processing_output_regex = "^PV"
+    parameters.post_processing_load_types = [lt.LoadTypes.WarmWater]
+    assert parameters.is_output_selected("Weather # TemperatureOutside", lt.LoadTypes.Temperature)
+    assert parameters.is_output_selected("PVSystem # ElectricityOutput", lt.LoadTypes.Electricity)
+    assert parameters.is_output_selected("Occupancy # WaterConsumption", lt.LoadTypes.WarmWater)
+    assert not parameters.is_output_selected("HeatPump # ElectricityOutput", lt.LoadTypes.Electricity)
+
+
+def test_worker_closes_shared_memory(tmp_path, monkeypatch):
+    chart_data = make_chart_data(tmp_path)
+    shared_values = shared_memory.SharedMemory(create=True, size=chart_data.values.nbytes)
+    # the handles of the worker are kept alive here, so they are only closed if the worker closes them
+    handles: List[shared_memory.SharedMemory] = []
+
+    class RecordedSharedMemory(shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            handles.append(self)
+
+        def unlink(self):
+            raise Exception("Only the parent process unlinks the shared memory.")
+    monkeypatch.setattr(shared_memory, "SharedMemory", RecordedSharedMemory)
+    try:
+        np.ndarray(chart_data.values.shape, dtype=np.float64, buffer=shared_values.buf)[:] = chart_data.values
+        chart_jobs.initialize_worker(shared_values.name, chart_data.values.shape, chart_data.index,
+                                     chart_data.monthly_values, chart_data.directorypath,
+                                     chart_data.time_correction_factor, None)
+        chart_jobs.render_chart_in_worker(chart_jobs.ChartJob(chart_jobs.LINE, "Source # Temperature", 0, lt.Units.Celsius))
+        chart_jobs.render_chart_in_worker(chart_jobs.ChartJob(chart_jobs.DAY, "Source # Power", 1, lt.Units.Watt))
+        assert len(handles) == 2
+        assert all(handle.buf is None for handle in handles)
+    finally:
+        shared_values.close()
+        shared_values.unlink()
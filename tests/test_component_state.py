@@ -0,0 +1,44 @@
+from hisim import component as cp
+from hisim.components.heat_pump_hplib import HeatPumpState
+from hisim.components.ev_charger import SimpleStorageState
+from hisim.components.extended_storage import WarmWaterStorageSimulation, WaterSlice
+from hisim.components.configuration import WarmWaterStorageConfig
+
+
+def test_dataclass_state():
+    state = HeatPumpState(time_on=60, time_off=0, on_off_previous=1)
+    snapshot = cp.get_state_snapshot(state)
+    assert snapshot == (60, 0, 1)
+    state.time_on = 120
+    state.on_off_previous = 0
+    restored = cp.restore_state_snapshot(state, snapshot)
+    assert restored is state
+    assert state == HeatPumpState(time_on=60, time_off=0, on_off_previous=1)
+
+
+def test_slots_state():
+    state = SimpleStorageState(max_var_val=10, min_var_val=-10, stored_energy=100)
+    snapshot = cp.get_state_snapshot(state)
+    state.store(max_capacity=1000, current_capacity=state.stored_energy, val=5)
+    assert state.stored_energy == 105
+    cp.restore_state_snapshot(state, snapshot)
+    assert state.stored_energy == 100
+
+
+def test_fallback_to_deepcopy():
+    state = {"values": [1, 2]}
+    snapshot = cp.get_state_snapshot(state)
+    state["values"].append(3)
+    assert cp.restore_state_snapshot(state, snapshot) == {"values": [1, 2]}
+
+
+def test_water_slices():
+    config = WarmWaterStorageConfig()
+    wws = WarmWaterStorageSimulation(config)
+    snapshot = wws.begin_new_timestep()
+    wws.my_slices[0].temperature = 10
+    wws.my_slices.append(WaterSlice(wws.diameter, 0.1, 50))
+    wws.reset_to_last_timestep(snapshot)
+    assert len(wws.my_slices) == 1
+    assert wws.my_slices[0].temperature == config.tank_start_temperature
+    assert wws.my_slices[0].snapshot() == snapshot[0]
@@ -0,0 +1,87 @@
+import os
+import json
+import numpy as np
+from typing import Optional
+import pytest
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import kpis
+from hisim import simulator as sim
+from hisim.simulationparameters import SimulationParameters
+from hisim.components.random_numbers import RandomNumbers
+from tests.test_simulator import Counter
+
+
+def test_electricity_balance():
+    production = cp.ComponentOutput("PV", "Production", lt.LoadTypes.Electricity, lt.Units.Watt)
+    consumption = cp.ComponentOutput("House", "Consumption", lt.LoadTypes.Electricity, lt.Units.Watt)
+    production.GlobalIndex = 0
+    consumption.GlobalIndex = 1
+    balance = kpis.ElectricityBalance("Balance", production, consumption)
+    # 15 minute timesteps
+    balance.prepare(900)
+    for values in [[0, 400], [1000, 400], [800, 800]]:
+        balance.update(np.array(values, dtype=np.float64))
+    result = balance.get_result()
+    assert result["production"] == pytest.approx(450)
+    assert result["consumption"] == pytest.approx(400)
+    assert result["grid_import"] == pytest.approx(100)
+    assert result["grid_export"] == pytest.approx(150)
+    assert result["self_consumption_rate"] == pytest.approx(300 / 450)
+    assert result["autarky_rate"] == pytest.approx(300 / 400)
+
+
+def test_kpis_without_stored_results(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.store_results = False
+    my_sim = sim.Simulator(module_directory=str(tmp_path), setup_function="test_setup", my_simulation_parameters=mysim)
+    my_counter = Counter("MyCounter", mysim)
+    my_rn = RandomNumbers(name="MyRandom", timesteps=mysim.timesteps, minimum=10, maximum=20, my_simulation_parameters=mysim)
+    my_sim.add_component(my_counter)
+    my_sim.add_component(my_rn)
+    my_sim.add_kpi(kpis.Sum("Total count", my_counter.output1))
+    my_sim.add_kpi(kpis.Maximum("Peak count", my_counter.output1))
+    my_sim.add_kpi(kpis.Minimum("Lowest random number", my_rn.output1))
+    my_sim.add_kpi(kpis.TimeAboveThreshold("Hours above 720", my_counter.output1, 720))
+    my_sim.add_kpi(kpis.SwitchOnCounter("Switch ons", my_counter.output1, 100))
+    my_sim.add_kpi(kpis.Histogram("Random numbers", my_rn.output1, [10, 15, 20]))
+    with pytest.raises(Exception):
+        my_sim.add_kpi(kpis.Sum("Total count", my_rn.output1))
+    my_sim.run_all_timesteps()
+
+    assert not hasattr(my_sim, "results")
+    with open(os.path.join(my_sim.get_result_directory(), "kpis.json")) as kpi_file:
+        results = json.load(kpi_file)
+    assert results == my_sim.kpi_results
+    assert results["Total count"] == 1440 * 1441 / 2
+    assert results["Peak count"] == 1440
+    assert 10 <= results["Lowest random number"] < 15
+    assert results["Hours above 720"] == 12
+    assert results["Switch ons"] == 1
+    assert sum(results["Random numbers"]["counts"]) == 1440
+
+
+def run_counter_with_kpi(directory, mysim: SimulationParameters, checkpoint: Optional[str] = None) -> sim.Simulator:
+    directory.mkdir()
+    my_sim: sim.Simulator = sim.Simulator(module_directory=str(directory), setup_function="test_setup",
+                                          my_simulation_parameters=mysim)
+    my_counter = Counter("MyCounter", mysim)
+    my_sim.add_component(my_counter)
+    my_sim.add_kpi(kpis.Sum("Total count", my_counter.output1))
+    if checkpoint is not None:
+        my_sim.load_checkpoint(checkpoint)
+    my_sim.run_all_timesteps()
+    return my_sim
+
+
+def test_kpis_are_resumed_from_checkpoints(tmp_path, monkeypatch):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.store_results = False
+    mysim.checkpoint_interval = 100
+    monkeypatch.setattr(Counter, "fail_at_timestep", 250)
+    with pytest.raises(Exception):
+        run_counter_with_kpi(tmp_path / "failed", mysim)
+    monkeypatch.setattr(Counter, "fail_at_timestep", -1)
+    checkpoint = str(next((tmp_path / "failed" / "results").iterdir()) / "checkpoint.pkl")
+    resumed = run_counter_with_kpi(tmp_path / "resumed", mysim, checkpoint)
+    assert resumed.kpi_results["Total count"] == 1440 * 1441 / 2
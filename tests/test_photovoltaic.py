@@ -1,7 +1,12 @@
+import os
 from hisim import component
 from hisim.components import weather
 from hisim.components import pvs
 from hisim import simulator as sim
+from hisim import kpis
+import numpy as np
+import pytest
+from typing import Tuple
 
 def test_photovoltaic():
     # Sets inputs
@@ -47,3 +52,268 @@ def test_photovoltaic():
     my_weather.i_simulate(655, stsv,  False)
     my_pvs.i_simulate(655, stsv,  False)
     assert abs(0.4532226665022684- stsv.values[9]) <0.05
+
+def test_photovoltaic_precomputed_from_weather(tmp_path):
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_weather = weather.Weather(location="Aachen", my_simulation_parameters=mysim)
+    my_pvs = pvs.PVSystem(power=10, my_simulation_parameters=mysim)
+    # calculate the output from the weather even if it was cached by an earlier test
+    if hasattr(my_pvs, "output"):
+        del my_pvs.output
+    my_pvs.cache_filepaths = [str(tmp_path / "pvs.cache")]
+    my_pvs.connect_only_predefined_connections(my_weather)
+    my_sim.add_component(my_weather)
+    my_sim.add_component(my_pvs)
+    my_sim.prepare_simulation()
+    my_sim.precompute_components(None)
+
+    assert my_sim.WrappedComponents[1].is_precomputed
+    assert len(my_sim.execution_plan) == 0
+    column = list(my_sim.precomputed_indices).index(my_pvs.electricity_outputC.GlobalIndex)
+    for timestep in [0, 655, 720, 1000]:
+        expected = pvs.simPhotovoltaicFast(dni_extra=my_weather.DNIextra_list[timestep],
+                                           DNI=my_weather.DNI_list[timestep],
+                                           DHI=my_weather.DHI_list[timestep],
+                                           GHI=my_weather.GHI_list[timestep],
+                                           azimuth=my_weather.azimuth_list[timestep],
+                                           apparent_zenith=my_weather.apparent_zenith_list[timestep],
+                                           temperature=my_weather.temperature_list[timestep],
+                                           wind_speed=my_weather.Wspd_list[timestep])
+        assert abs(my_sim.precomputed_values[timestep, column] - expected * 10) < 1e-9
+    assert (tmp_path / "pvs.cache").exists()
+
+def test_photovoltaic_profile_cache_is_shared_by_all_sizes():
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    small = pvs.PVSystem(power=5E3, my_simulation_parameters=mysim)
+    large = pvs.PVSystem(power=20E3, my_simulation_parameters=mysim)
+    east = pvs.PVSystem(power=5E3, azimuth=90, my_simulation_parameters=mysim)
+    assert small.cache_filepaths == large.cache_filepaths
+    assert small.cache_filepaths != east.cache_filepaths
+    # the PVWatts model does not use the modules and the inverter, the Sandia model does
+    other_module = "Canadian_Solar_CS5P_220M___2009_"
+    assert pvs.PVSystem(power=5E3, module_name=other_module, integrateInverter=False,
+                        my_simulation_parameters=mysim).cache_filepaths == small.cache_filepaths
+    sapm = pvs.PVSystem(power=5E3, model=pvs.SAPM, my_simulation_parameters=mysim)
+    assert pvs.PVSystem(power=5E3, model=pvs.SAPM, module_name=other_module,
+                        my_simulation_parameters=mysim).cache_filepaths != sapm.cache_filepaths
+    assert pvs.PVSystem(power=5E3, model=pvs.SAPM, integrateInverter=False,
+                        my_simulation_parameters=mysim).cache_filepaths != sapm.cache_filepaths
+
+
+def test_photovoltaic_sub_arrays(tmp_path):
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_weather = weather.Weather(location="Aachen", my_simulation_parameters=mysim)
+    # simulate the second day of the year, there is no direct irradiance on the first one
+    for name in ["temperature_list", "DNI_list", "DNIextra_list", "DHI_list", "GHI_list", "altitude_list",
+                 "azimuth_list", "Wspd_list", "apparent_zenith_list"]:
+        setattr(my_weather, name, getattr(my_weather, name)[mysim.timesteps:])
+    sub_arrays = [pvs.PVSubArray(name="East", power=3E3, azimuth=90, tilt=40),
+                  pvs.PVSubArray(name="West", power=5E3, azimuth=270, tilt=40)]
+    my_pvs = pvs.PVSystem(sub_arrays=sub_arrays, my_simulation_parameters=mysim)
+    assert my_pvs.pvconfig.power == 8E3
+    # the east side has the same profile as a single array with the same orientation
+    east = pvs.PVSystem(power=1E3, azimuth=90, tilt=40, my_simulation_parameters=mysim)
+    assert my_pvs.cache_filepaths[0] == east.cache_filepaths[0]
+    if hasattr(my_pvs, "output"):
+        del my_pvs.output
+    my_pvs.cache_filepaths = [str(tmp_path / "east.cache"), str(tmp_path / "west.cache")]
+    my_pvs.connect_only_predefined_connections(my_weather)
+    my_sim.add_component(my_weather)
+    my_sim.add_component(my_pvs)
+    my_sim.add_kpi(kpis.Sum("East", my_pvs.array_outputs[0]))
+    my_sim.add_kpi(kpis.Sum("West", my_pvs.array_outputs[1]))
+    my_sim.add_kpi(kpis.Sum("Total", my_pvs.electricity_outputC))
+    results = my_sim.run()
+
+    assert my_pvs.array_outputs[0].FieldName == "ElectricityOutputEast"
+    east_output = results.get_column(my_pvs.array_outputs[0].FullName)
+    west_output = results.get_column(my_pvs.array_outputs[1].FullName)
+    assert np.allclose(results.get_column(my_pvs.electricity_outputC.FullName), east_output + west_output)
+    assert results.kpis["Total"] > 0
+    # the east side produces more in the morning, the west side in the afternoon
+    assert east_output[:720].sum() / 3 > west_output[:720].sum() / 5
+    assert east_output[720:].sum() / 3 < west_output[720:].sum() / 5
+    for orientation, column in [((90, 40), 0), ((270, 40), 1)]:
+        for timestep in range(0, mysim.timesteps, 20):
+            expected = pvs.simPhotovoltaicFast(dni_extra=my_weather.DNIextra_list[timestep],
+                                               DNI=my_weather.DNI_list[timestep],
+                                               DHI=my_weather.DHI_list[timestep],
+                                               GHI=my_weather.GHI_list[timestep],
+                                               azimuth=my_weather.azimuth_list[timestep],
+                                               apparent_zenith=my_weather.apparent_zenith_list[timestep],
+                                               temperature=my_weather.temperature_list[timestep],
+                                               wind_speed=my_weather.Wspd_list[timestep],
+                                               surface_azimuth=orientation[0],
+                                               surface_tilt=orientation[1])
+            assert abs(results.get_column(my_pvs.array_outputs[column].FullName)[timestep]
+                       - expected * sub_arrays[column].power) < 1e-6
+    assert (tmp_path / "west.cache").exists()
+
+    with pytest.raises(ValueError):
+        pvs.PVSystem(sub_arrays=[pvs.PVSubArray(name="Roof", power=1E3), pvs.PVSubArray(name="Roof", power=1E3)],
+                     my_simulation_parameters=mysim)
+
+
+def test_photovoltaic_sapm_model(tmp_path):
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_weather = weather.Weather(location="Aachen", my_simulation_parameters=mysim)
+    # simulate the second day of the year, there is no direct irradiance on the first one
+    for name in ["temperature_list", "DNI_list", "DNIextra_list", "DHI_list", "GHI_list", "altitude_list",
+                 "azimuth_list", "Wspd_list", "apparent_zenith_list"]:
+        setattr(my_weather, name, getattr(my_weather, name)[mysim.timesteps:])
+    my_pvs = pvs.PVSystem(power=10E3, model=pvs.SAPM, my_simulation_parameters=mysim)
+    pvwatts = pvs.PVSystem(power=10E3, my_simulation_parameters=mysim)
+    assert my_pvs.cache_filepaths != pvwatts.cache_filepaths
+    if hasattr(my_pvs, "output"):
+        del my_pvs.output
+    my_pvs.cache_filepaths = [str(tmp_path / "sapm.cache")]
+    my_pvs.connect_only_predefined_connections(my_weather)
+    my_sim.add_component(my_weather)
+    my_sim.add_component(my_pvs)
+    results = my_sim.run()
+
+    output = results.get_column(my_pvs.electricity_outputC.FullName)
+    assert np.all(output >= 0)
+    assert output[:300].max() == 0
+    # a clear winter day at noon gives a few kW on a 10 kWp system
+    assert 1E3 < output.max() < 10E3
+    # the profile of all timesteps matches the calculation of single timesteps
+    for timestep in range(0, mysim.timesteps, 60):
+        values = [np.array([getattr(my_weather, name)[timestep]]) for name in
+                  ["DNIextra_list", "DNI_list", "DHI_list", "GHI_list", "azimuth_list", "apparent_zenith_list",
+                   "temperature_list", "Wspd_list"]]
+        assert abs(my_pvs.calculate_profiles(*values)[0, 0] * 10E3 - output[timestep]) < 1e-6
+    # compare with the scalar functions of pvlib for a few timesteps around noon
+    import pvlib
+    module = my_pvs.module
+    inverter = my_pvs.inverter
+    for timestep in [600, 720, 840]:
+        apparent_zenith = my_weather.apparent_zenith_list[timestep]
+        sun_azimuth = my_weather.azimuth_list[timestep]
+        airmass = pvlib.atmosphere.get_relative_airmass(apparent_zenith)
+        aoi = pvlib.irradiance.aoi(30, 180, apparent_zenith, sun_azimuth)
+        poa_irrad = pvlib.irradiance.get_total_irradiance(30, 180, apparent_zenith, sun_azimuth,
+                                                          my_weather.DNI_list[timestep], my_weather.GHI_list[timestep],
+                                                          my_weather.DHI_list[timestep], my_weather.DNIextra_list[timestep],
+                                                          airmass=airmass, albedo=0.2, model="perez")
+        temperature_model = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_glass"]
+        cell_temperature = pvlib.temperature.sapm_cell(poa_irrad["poa_global"], my_weather.temperature_list[timestep],
+                                                       my_weather.Wspd_list[timestep], **temperature_model)
+        effective_irradiance = pvlib.pvsystem.sapm_effective_irradiance(
+            poa_irrad["poa_direct"], poa_irrad["poa_diffuse"], pvlib.atmosphere.get_absolute_airmass(airmass), aoi, module)
+        dc_power = pvlib.pvsystem.sapm(effective_irradiance, cell_temperature, module)
+        ac_power = pvlib.inverter.sandia(dc_power["v_mp"], dc_power["p_mp"], inverter)
+        expected = max(float(ac_power), 0) / (module["Impo"] * module["Vmpo"]) * 10E3
+        assert expected > 0
+        assert abs(output[timestep] - expected) < 1e-6 * expected
+    assert (tmp_path / "sapm.cache").exists()
+
+    with pytest.raises(ValueError):
+        pvs.PVSystem(power=10E3, model="unknown", my_simulation_parameters=mysim)
+
+
+def test_sandia_database():
+    from hisim import utils
+    import pandas as pd
+    module_name = "Hanwha_HSL60P6_PA_4_250T__2013_"
+    csv_filepath = utils.HISIMPATH["photovoltaic"]["modules"]
+    database = pvs.get_sandia_database(csv_filepath)
+    assert pvs.get_sandia_database(csv_filepath) is database
+    module = database.get_entry(module_name)
+    expected = pd.to_numeric(pd.read_csv(csv_filepath, index_col=0)[module_name], errors="coerce")
+    assert list(module.index) == list(expected.index)
+    assert np.allclose(module.to_numpy(), expected.to_numpy(), equal_nan=True)
+    # a new database reads the converted file
+    assert pvs.SandiaDatabase(csv_filepath).get_entry(module_name).equals(module)
+    with pytest.raises(KeyError):
+        database.get_entry("unknown module")
+
+    # PV systems only load the parameters of their modules when the Sandia model is calculated
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_pvs = pvs.PVSystem(power=10E3, model=pvs.SAPM, my_simulation_parameters=mysim)
+    assert not hasattr(my_pvs, "array_modules")
+    my_pvs.load_module_parameters()
+    assert my_pvs.module is module
+
+
+def test_photovoltaic_sub_arrays_rerun(tmp_path):
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_weather = weather.Weather(location="Aachen", my_simulation_parameters=mysim)
+    sub_arrays = [pvs.PVSubArray(name="East", power=3E3, azimuth=90, tilt=40),
+                  pvs.PVSubArray(name="West", power=5E3, azimuth=270, tilt=40)]
+    my_pvs = pvs.PVSystem(sub_arrays=sub_arrays, my_simulation_parameters=mysim)
+    if hasattr(my_pvs, "output"):
+        del my_pvs.output
+    my_pvs.cache_filepaths = [str(tmp_path / "east.cache"), str(tmp_path / "west.cache")]
+    my_pvs.connect_only_predefined_connections(my_weather)
+    my_sim.add_component(my_weather)
+    my_sim.add_component(my_pvs)
+    my_sim.add_kpi(kpis.Sum("East", my_pvs.array_outputs[0]))
+    my_sim.enable_reruns()
+    first = my_sim.run()
+
+    my_sim.reset()
+    assert not hasattr(my_pvs, "output")
+    assert not my_sim.WrappedComponents[1].is_precomputed
+    # the outputs of the sub-arrays are still the registered ones
+    assert my_pvs.array_outputs[0] is my_sim.all_outputs[my_pvs.array_outputs[0].GlobalIndex]
+    second = my_sim.rerun()
+    assert my_sim.WrappedComponents[1].is_precomputed
+    assert np.array_equal(second.values, first.values)
+    assert second.kpis == first.kpis
+
+    doubled = my_sim.rerun({"PVSystem.array_powers": 2 * my_pvs.array_powers})
+    assert np.allclose(doubled.get_column(my_pvs.electricity_outputC.FullName),
+                       2 * first.get_column(my_pvs.electricity_outputC.FullName))
+
+
+def test_photovoltaic_sub_arrays_resume(tmp_path, monkeypatch):
+    # the PV system is calculated in every timestep, so its state is part of the checkpoints
+    monkeypatch.setattr(pvs.PVSystem, "i_simulate_all_inputs", lambda self, timesteps, input_values: None)
+    mysim = sim.SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.checkpoint_interval = 300
+
+    def build_simulator(directory) -> Tuple[sim.Simulator, pvs.PVSystem]:
+        directory.mkdir()
+        my_sim: sim.Simulator = sim.Simulator(module_directory=str(directory), setup_function="test_setup", my_simulation_parameters=mysim)
+        my_weather = weather.Weather(location="Aachen", my_simulation_parameters=mysim)
+        sub_arrays = [pvs.PVSubArray(name="East", power=3E3, azimuth=90, tilt=40),
+                      pvs.PVSubArray(name="West", power=5E3, azimuth=270, tilt=40)]
+        my_pvs = pvs.PVSystem(sub_arrays=sub_arrays, my_simulation_parameters=mysim)
+        if hasattr(my_pvs, "output"):
+            del my_pvs.output
+        my_pvs.data = np.zeros((mysim.timesteps, 2))
+        my_pvs.data_length = mysim.timesteps
+        my_pvs.cache_filepaths = [str(directory / "east.cache"), str(directory / "west.cache")]
+        my_pvs.connect_only_predefined_connections(my_weather)
+        my_sim.add_component(my_weather)
+        my_sim.add_component(my_pvs)
+        return my_sim, my_pvs
+
+    expected = build_simulator(tmp_path / "complete")[0].run()
+    failing_sim = build_simulator(tmp_path / "failed")[0]
+    simulate = pvs.PVSystem.i_simulate
+
+    def fail_at_noon(self, timestep, stsv, force_convergence):
+        if timestep == 700:
+            raise Exception("Failed in timestep 700")
+        simulate(self, timestep, stsv, force_convergence)
+    monkeypatch.setattr(pvs.PVSystem, "i_simulate", fail_at_noon)
+    with pytest.raises(Exception):
+        failing_sim.run()
+    monkeypatch.setattr(pvs.PVSystem, "i_simulate", simulate)
+
+    resumed_sim, my_pvs = build_simulator(tmp_path / "resumed")
+    resumed_sim.load_checkpoint(os.path.join(failing_sim.get_result_directory(), "checkpoint.pkl"))
+    resumed = resumed_sim.run()
+    assert not resumed_sim.WrappedComponents[1].is_precomputed
+    # the outputs of the sub-arrays are still the registered ones
+    for output in my_pvs.array_outputs:
+        assert output is resumed_sim.all_outputs[output.GlobalIndex]
+    assert my_pvs.simulation_repository is resumed_sim.simulation_repository
+    assert resumed.values is not None and expected.values is not None
+    assert np.allclose(resumed.values, expected.values)
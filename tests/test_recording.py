@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import recording
+from hisim.simulationparameters import SimulationParameters
+from hisim.components.transformer import Transformer
+from tests.test_simulator import Counter, run_counter
+
+
+def test_result_recorder():
+    outputs = [cp.ComponentOutput("A", "Temperature", lt.LoadTypes.Temperature, lt.Units.Celsius),
+               cp.ComponentOutput("A", "Debug", lt.LoadTypes.Any, lt.Units.Any),
+               cp.ComponentOutput("B", "Power", lt.LoadTypes.Electricity, lt.Units.Watt),
+               cp.ComponentOutput("B", "Peak", lt.LoadTypes.Electricity, lt.Units.Watt)]
+    for index, output in enumerate(outputs):
+        output.GlobalIndex = index
+    policy = recording.RecordingPolicy(outputs=["A # Temperature", "B # *"], steps=3,
+                                       methods={"B # Power": recording.SUM, "B # Peak": recording.MAXIMUM})
+    recorded_outputs = policy.select_outputs(outputs)
+    assert [output.FieldName for output in recorded_outputs] == ["Temperature", "Power", "Peak"]
+    timesteps = 7
+    results_array = np.zeros((policy.get_number_of_records(timesteps), len(recorded_outputs)))
+    recorder = recording.ResultRecorder(policy, recorded_outputs, len(outputs), results_array)
+    assert not recorder.records_all_values
+    for timestep in range(timesteps):
+        recorder.record(timestep, np.array([timestep, -1, 10, timestep % 3], dtype=np.float64), timestep == timesteps - 1)
+    assert np.array_equal(results_array, [[1, 30, 2], [4, 30, 2], [6, 10, 0]])
+
+    with pytest.raises(ValueError):
+        recording.RecordingPolicy(method="median")
+
+
+def test_downsampled_results(tmp_path, monkeypatch):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.recording_policy = recording.RecordingPolicy(outputs=["MyCounter # *", "MyTransformer # " + Transformer.TransformerOutput],
+                                                       steps=60, methods={"MyCounter # *": recording.MAXIMUM})
+    # the checkpoints are written within an hour, so the buffers of the recorder are stored as well
+    mysim.checkpoint_interval = 100
+    monkeypatch.setattr(Counter, "fail_at_timestep", 250)
+    with pytest.raises(Exception):
+        run_counter(tmp_path / "failed", mysim)
+    monkeypatch.setattr(Counter, "fail_at_timestep", -1)
+    checkpoint = str(next((tmp_path / "failed" / "results").iterdir()) / "checkpoint.pkl")
+
+    for name, checkpoint_file in [("complete", None), ("resumed", checkpoint)]:
+        my_sim = run_counter(tmp_path / name, mysim, checkpoint=checkpoint_file)
+        assert my_sim.results.shape == (24, 2)
+        hours = np.arange(24)
+        assert np.array_equal(my_sim.results.values[:, 0], 60 * (hours + 1))
+        assert np.allclose(my_sim.results.values[:, 1], 5 * (60 * hours + 30.5))
+        assert my_sim.results.index[1] - my_sim.results.index[0] == np.timedelta64(1, "h")
+        assert len(my_sim.results_std) == 24
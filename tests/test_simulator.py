@@ -0,0 +1,647 @@
+import os
+import json
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import pytest
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import simulator as sim
+from hisim import convergence
+from hisim import utils
+from hisim import kpis
+from hisim import log
+from hisim import recording
+from hisim.simulationparameters import SimulationParameters
+from hisim.components.random_numbers import RandomNumbers
+from hisim.components.transformer import Transformer
+
+
+class HalfPlusOne(cp.Component):
+    """
+    Test component that returns half of its input plus one. Two of them connected
+    in a circle converge towards a value of two.
+    """
+    Input = "Input"
+    Output = "Output"
+
+    def __init__(self, name: str, my_simulation_parameters: SimulationParameters):
+        super().__init__(name=name, my_simulation_parameters=my_simulation_parameters)
+        self.input1: cp.ComponentInput = self.add_input(self.ComponentName, self.Input, lt.LoadTypes.Any, lt.Units.Any, True)
+        self.output1: cp.ComponentOutput = self.add_output(self.ComponentName, self.Output, lt.LoadTypes.Any, lt.Units.Any)
+        self.number_of_calls = 0
+
+    def i_save_state(self):
+        pass
+
+    def i_restore_state(self):
+        pass
+
+    def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
+        pass
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        self.number_of_calls += 1
+        stsv.set_output_value(self.output1, stsv.get_input_value(self.input1) * 0.5 + 1)
+
+
+class LinearFunction(cp.Component):
+    """
+    Test component for circular connections with a physical unit, the output is slope * input + offset.
+    """
+    Input = "Input"
+    OffsetInput = "OffsetInput"
+    Output = "Output"
+
+    def __init__(self, name: str, slope: float, offset: float, my_simulation_parameters: SimulationParameters):
+        super().__init__(name=name, my_simulation_parameters=my_simulation_parameters)
+        self.slope = slope
+        self.offset = offset
+        self.input1: cp.ComponentInput = self.add_input(self.ComponentName, self.Input, lt.LoadTypes.Temperature, lt.Units.Celsius, True)
+        self.offset_input: cp.ComponentInput = self.add_input(self.ComponentName, self.OffsetInput, lt.LoadTypes.Any, lt.Units.Any, False)
+        self.output1: cp.ComponentOutput = self.add_output(self.ComponentName, self.Output, lt.LoadTypes.Temperature, lt.Units.Celsius)
+
+    def i_save_state(self):
+        pass
+
+    def i_restore_state(self):
+        pass
+
+    def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
+        pass
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        stsv.set_output_value(self.output1, stsv.get_input_value(self.input1) * self.slope + self.offset
+                              + stsv.get_input_value(self.offset_input))
+
+
+class LateValue(HalfPlusOne):
+    """
+    Test component that has no value in its first calculation of a timestep and returns half of its input
+    plus one afterwards, a missing input counts as zero.
+    """
+    def __init__(self, name: str, my_simulation_parameters: SimulationParameters):
+        super().__init__(name=name, my_simulation_parameters=my_simulation_parameters)
+        self.calculated_timestep = -1
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        self.number_of_calls += 1
+        if timestep != self.calculated_timestep:
+            self.calculated_timestep = timestep
+            stsv.set_output_value(self.output1, None)
+        else:
+            stsv.set_output_value(self.output1, np.nan_to_num(stsv.get_input_value(self.input1)) * 0.5 + 1)
+
+
+class Sign(HalfPlusOne):
+    """
+    Test component that returns 1 for positive inputs and 0 otherwise.
+    """
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        self.number_of_calls += 1
+        stsv.set_output_value(self.output1, 1 if stsv.get_input_value(self.input1) > 0 else 0)
+
+
+class Counter(cp.Component):
+    """
+    Test component with a state that counts the timesteps.
+    """
+    Output = "Output"
+    # class attribute, so it is not restored from a checkpoint
+    fail_at_timestep = -1
+
+    def __init__(self, name: str, my_simulation_parameters: SimulationParameters):
+        super().__init__(name=name, my_simulation_parameters=my_simulation_parameters)
+        self.output1: cp.ComponentOutput = self.add_output(self.ComponentName, self.Output, lt.LoadTypes.Any, lt.Units.Any)
+        self.count = 0
+        self.previous_count = 0
+
+    def i_save_state(self):
+        self.previous_count = self.count
+
+    def i_restore_state(self):
+        self.count = self.previous_count
+
+    def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
+        pass
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        if timestep == self.fail_at_timestep:
+            raise Exception("Failed in timestep " + str(timestep))
+        self.count += 1
+        stsv.set_output_value(self.output1, self.count)
+
+
+class RepositoryWriter(HalfPlusOne):
+    """
+    Test component that writes its input to the simulation repository.
+    """
+    Entry = "RepositoryValue"
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        self.simulation_repository.set_entry(self.Entry, stsv.get_input_value(self.input1))
+        stsv.set_output_value(self.output1, stsv.get_input_value(self.input1))
+
+
+class RepositoryReader(cp.Component):
+    """
+    Test component that returns the value the RepositoryWriter wrote in the same timestep.
+    """
+    Output = "Output"
+
+    def __init__(self, name: str, my_simulation_parameters: SimulationParameters):
+        super().__init__(name=name, my_simulation_parameters=my_simulation_parameters)
+        self.output1: cp.ComponentOutput = self.add_output(self.ComponentName, self.Output, lt.LoadTypes.Any, lt.Units.Any)
+
+    def i_save_state(self):
+        pass
+
+    def i_restore_state(self):
+        pass
+
+    def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues):
+        pass
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool):
+        stsv.set_output_value(self.output1, self.simulation_repository.get_entry(RepositoryWriter.Entry))
+
+
+def make_simulator(tmp_path, simulation_parameters: SimulationParameters) -> sim.Simulator:
+    my_sim: sim.Simulator = sim.Simulator(module_directory=str(tmp_path), setup_function="test_setup",
+                                          my_simulation_parameters=simulation_parameters)
+    return my_sim
+
+
+def test_execution_plan(tmp_path, monkeypatch):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    # the transformer is added before its source to check the topological order
+    my_transformer = Transformer(name="MyTransformer", my_simulation_parameters=mysim)
+    my_transformer.connect_input(my_transformer.TransformerInput, "MyRandom", RandomNumbers.RandomOutput)
+    my_rn = RandomNumbers(name="MyRandom", timesteps=mysim.timesteps, minimum=1, maximum=2, my_simulation_parameters=mysim)
+    loop_a = HalfPlusOne("LoopA", mysim)
+    loop_b = HalfPlusOne("LoopB", mysim)
+    loop_a.connect_input(loop_a.Input, "LoopB", HalfPlusOne.Output)
+    loop_b.connect_input(loop_b.Input, "LoopA", HalfPlusOne.Output)
+    # a feed forward component that depends on the circular group
+    after_loop = HalfPlusOne("AfterLoop", mysim)
+    after_loop.connect_input(after_loop.Input, "LoopA", HalfPlusOne.Output)
+    for component in [after_loop, my_transformer, my_rn, loop_a, loop_b]:
+        my_sim.add_component(component)
+    my_sim.connect_all_components()
+    my_sim.build_execution_plan()
+
+    # the components keep the order in which they were added, unless their outputs are needed earlier
+    names = [group.get_names() for group in my_sim.execution_plan]
+    assert names == ["LoopA, LoopB", "AfterLoop", "MyRandom", "MyTransformer"]
+    assert [group.is_circular for group in my_sim.execution_plan] == [True, False, False, False]
+
+    calls: Dict[str, int] = {}
+    for component in [my_rn, my_transformer]:
+        def count_calls(timestep, stsv, force_convergence, component=component, simulate=component.i_simulate):
+            calls[component.ComponentName] = calls.get(component.ComponentName, 0) + 1
+            simulate(timestep, stsv, force_convergence)
+        monkeypatch.setattr(component, "i_simulate", count_calls)
+
+    stsv, iterations = my_sim.process_one_timestep(0)
+    assert abs(stsv.values[my_transformer.output1.GlobalIndex] - 5 * stsv.values[my_rn.output1.GlobalIndex]) < 1e-9
+    assert abs(stsv.values[loop_a.output1.GlobalIndex] - 2) < 1e-3
+    assert abs(stsv.values[after_loop.output1.GlobalIndex] - 2) < 1e-3
+    assert iterations > 1
+    # only the circular group is iterated, feed forward components before and after it
+    # are calculated only once per timestep
+    assert loop_a.number_of_calls == iterations
+    assert calls == {"MyRandom": 1, "MyTransformer": 1}
+    assert after_loop.number_of_calls == 1
+
+
+def test_repository_coupled_components_keep_their_order(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    # the source of the writer is added last, so the writer is moved, but the reader still follows it
+    writer = RepositoryWriter("Writer", mysim)
+    writer.connect_input(writer.Input, "MyCounter", Counter.Output)
+    reader = RepositoryReader("Reader", mysim)
+    my_counter = Counter("MyCounter", mysim)
+    for component in [writer, reader, my_counter]:
+        my_sim.add_component(component)
+    results = my_sim.run()
+
+    assert [group.get_names() for group in my_sim.execution_plan] == ["MyCounter", "Writer", "Reader"]
+    assert results.values is not None
+    assert np.array_equal(results.get_column(reader.output1.FullName), np.arange(1, mysim.timesteps + 1))
+
+
+def test_single_timestep_values():
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    component = HalfPlusOne("Single", mysim)
+    component.output1.GlobalIndex = 0
+    stsv = cp.SingleTimeStepValues(2)
+    previous_values = cp.SingleTimeStepValues(2)
+    stsv.set_output_value(component.output1, None)
+    assert np.isnan(stsv.values[0])
+    stsv.values[1] = 1000
+    previous_values.copy_values_from_other(stsv)
+    stsv.values[1] = 1000.05
+    assert not stsv.is_close_enough_to_previous(previous_values)
+    assert stsv.is_close_enough_to_previous(previous_values, absolute_tolerance=0.0001, relative_tolerance=1e-4)
+    assert "Single" in stsv.get_differences_for_error_msg(previous_values, [component.output1, component.output1])
+    # a value that is set for the first time or becomes missing is a change
+    stsv.values[0] = 1
+    assert not stsv.is_close_enough_to_previous(previous_values, absolute_tolerance=0.0001, relative_tolerance=1e-4)
+    assert stsv.is_close_enough_to_previous(stsv)
+    previous_values.copy_values_from_other(stsv)
+    stsv.set_output_value(component.output1, None)
+    assert not stsv.is_close_enough_to_previous(previous_values, absolute_tolerance=0.0001, relative_tolerance=1e-4)
+
+
+def test_circular_output_set_after_none(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    late = LateValue("Late", mysim)
+    half = HalfPlusOne("Half", mysim)
+    late.connect_input(late.Input, "Half", HalfPlusOne.Output)
+    half.connect_input(half.Input, "Late", HalfPlusOne.Output)
+    my_sim.add_component(late)
+    my_sim.add_component(half)
+    results = my_sim.run()
+
+    # the loop is iterated after the missing value was set instead of stopping after the first sweep
+    assert results.values is not None
+    assert not np.any(np.isnan(results.values))
+    assert np.allclose(results.values, 2, atol=1e-3)
+
+
+def test_memory_mapped_results(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.memory_mapped_results = True
+    my_sim = make_simulator(tmp_path, mysim)
+    my_rn = RandomNumbers(name="MyRandom", timesteps=mysim.timesteps, minimum=1, maximum=2, my_simulation_parameters=mysim)
+    my_transformer = Transformer(name="MyTransformer", my_simulation_parameters=mysim)
+    my_transformer.connect_input(my_transformer.TransformerInput, "MyRandom", RandomNumbers.RandomOutput)
+    my_sim.add_component(my_rn)
+    my_sim.add_component(my_transformer)
+    my_sim.run_all_timesteps()
+
+    results_file = np.load(os.path.join(my_sim.get_result_directory(), "results.npy"), mmap_mode="r")
+    assert results_file.shape == (mysim.timesteps, len(my_sim.all_outputs))
+    assert np.allclose(results_file[:, my_transformer.output1.GlobalIndex], 5 * results_file[:, my_rn.output1.GlobalIndex])
+    assert np.allclose(my_sim.results.values, results_file)
+
+
+def test_component_cache(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    my_rn = RandomNumbers(name="MyRandom", timesteps=mysim.timesteps, minimum=1, maximum=2, my_simulation_parameters=mysim)
+    cached = HalfPlusOne("Cached", mysim)
+    cached.connect_input(cached.Input, "MyRandom", RandomNumbers.RandomOutput)
+    my_sim.add_component(my_rn)
+    my_sim.add_component(cached, is_cachable=True, cache_size=5, cache_quantization=0.1)
+    my_sim.connect_all_components()
+    my_sim.build_execution_plan()
+    wrapper = my_sim.WrappedComponents[1]
+
+    for timestep in range(100):
+        stsv, _ = my_sim.process_one_timestep(timestep)
+        random_value = stsv.values[my_rn.output1.GlobalIndex]
+        assert abs(stsv.values[cached.output1.GlobalIndex] - (random_value * 0.5 + 1)) <= 0.1 * 0.5 + 1e-9
+    # the inputs are rounded to eleven different values, which do not all fit into the cache
+    assert wrapper.cache_hits + wrapper.cache_misses == 100
+    assert wrapper.cache_misses == cached.number_of_calls
+    assert wrapper.cache_hits > 0
+    assert len(wrapper.cachedict) == 5
+
+
+def test_precomputed_components(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    my_rn = RandomNumbers(name="MyRandom", timesteps=mysim.timesteps, minimum=1, maximum=2, my_simulation_parameters=mysim)
+    my_transformer = Transformer(name="MyTransformer", my_simulation_parameters=mysim)
+    my_transformer.connect_input(my_transformer.TransformerInput, "MyRandom", RandomNumbers.RandomOutput)
+    my_sim.add_component(my_rn)
+    my_sim.add_component(my_transformer)
+    my_sim.connect_all_components()
+    my_sim.build_execution_plan()
+    results_array = my_sim.allocate_results_array()
+    my_sim.precompute_components(results_array)
+
+    assert my_sim.WrappedComponents[0].is_precomputed
+    assert not my_sim.WrappedComponents[1].is_precomputed
+    assert [group.get_names() for group in my_sim.execution_plan] == ["MyTransformer"]
+    assert np.allclose(results_array[:, my_rn.output1.GlobalIndex], my_rn.values)
+    stsv, _ = my_sim.process_one_timestep(10)
+    assert stsv.values[my_rn.output1.GlobalIndex] == my_rn.values[10]
+    assert abs(stsv.values[my_transformer.output1.GlobalIndex] - 5 * my_rn.values[10]) < 1e-9
+
+
+def run_oscillating_loop(tmp_path, convergence_strategy: convergence.ConvergenceStrategy, mysim: SimulationParameters):
+    # every simulator needs its own directory, since the name of the result directory only contains the time
+    directory = tmp_path / str(len(list(tmp_path.iterdir())))
+    directory.mkdir()
+    my_sim = make_simulator(directory, mysim)
+    my_sim.set_convergence_strategy(convergence_strategy)
+    # the loop converges towards 1 / 1.9, with plain Gauss-Seidel the error only shrinks by 10% per sweep
+    loop_a = LinearFunction("LoopA", -0.9, 1, mysim)
+    loop_b = LinearFunction("LoopB", 1, 0, mysim)
+    loop_a.connect_input(loop_a.Input, "LoopB", LinearFunction.Output)
+    loop_b.connect_input(loop_b.Input, "LoopA", LinearFunction.Output)
+    my_sim.add_component(loop_a)
+    my_sim.add_component(loop_b)
+    my_sim.connect_all_components()
+    my_sim.build_execution_plan()
+    stsv, iterations = my_sim.process_one_timestep(0)
+    return stsv.values[loop_a.output1.GlobalIndex], iterations
+
+
+def test_convergence_strategies(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.maximum_iterations = 200
+    results = {}
+    for name, strategy in [("GaussSeidel", convergence.GaussSeidel()),
+                           ("Relaxation", convergence.Relaxation(0.5)),
+                           ("Aitken", convergence.Aitken())]:
+        results[name] = run_oscillating_loop(tmp_path, strategy, mysim)
+    for value, _ in results.values():
+        assert abs(value - 1 / 1.9) < 1e-3
+    assert results["Relaxation"][1] < results["GaussSeidel"][1]
+    assert results["Aitken"][1] < results["GaussSeidel"][1]
+
+
+def test_tolerances_per_load_type_and_output(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.maximum_iterations = 200
+    _, default_iterations = run_oscillating_loop(tmp_path, convergence.GaussSeidel(), mysim)
+    mysim.convergence_tolerances_per_load_type = {lt.LoadTypes.Temperature: 0.01}
+    mysim.convergence_tolerances_per_output = {"LoopB # Output": 0.02}
+    value, iterations = run_oscillating_loop(tmp_path, convergence.GaussSeidel(), mysim)
+    assert iterations < default_iterations
+    assert abs(value - 1 / 1.9) < 0.2
+
+
+def test_tolerance_precedence(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.convergence_tolerances_per_load_type = {lt.LoadTypes.Temperature: 0.01}
+    mysim.convergence_tolerances_per_output = {"LoopB # Output": 0.02}
+    my_sim = make_simulator(tmp_path, mysim)
+    loop_a = LinearFunction("LoopA", 1, 0, mysim)
+    loop_b = LinearFunction("LoopB", 1, 0, mysim)
+    other = HalfPlusOne("Other", mysim)
+    for component in [loop_a, loop_b, other]:
+        my_sim.add_component(component)
+    my_sim.build_absolute_tolerances()
+    assert list(my_sim.absolute_tolerances) == [0.01, 0.02, 0.0001]
+
+
+def test_skip_unchanged_inputs(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    # loop_a -> loop_b -> sign -> constant -> loop_a: the input of the constant component never changes
+    loop_a = LinearFunction("LoopA", -0.5, 1, mysim)
+    loop_b = LinearFunction("LoopB", 1, 0, mysim)
+    sign = Sign("Sign", mysim)
+    constant = HalfPlusOne("Constant", mysim)
+    loop_a.connect_input(loop_a.Input, "LoopB", LinearFunction.Output)
+    loop_a.connect_input(loop_a.OffsetInput, "Constant", HalfPlusOne.Output)
+    loop_b.connect_input(loop_b.Input, "LoopA", LinearFunction.Output)
+    sign.connect_input(sign.Input, "LoopB", LinearFunction.Output)
+    constant.connect_input(constant.Input, "Sign", HalfPlusOne.Output)
+    for component in [loop_a, loop_b, sign, constant]:
+        my_sim.add_component(component)
+    my_sim.connect_all_components()
+    my_sim.build_execution_plan()
+    assert [group.get_names() for group in my_sim.execution_plan] == ["LoopA, LoopB, Sign, Constant"]
+
+    stsv, iterations = my_sim.process_one_timestep(0)
+    assert abs(stsv.values[loop_a.output1.GlobalIndex] - 2.5 / 1.5) < 1e-3
+    assert sign.number_of_calls == iterations
+    # the constant component is only calculated in the first sweep and when convergence is forced
+    assert iterations > mysim.force_convergence_after_iterations + 2
+    assert constant.number_of_calls == 2
+    assert my_sim.WrappedComponents[3].skipped_calculations == iterations - 2
+
+
+def run_counter(directory, mysim: SimulationParameters, checkpoint: Optional[str] = None, warm_start: bool = False) -> sim.Simulator:
+    directory.mkdir()
+    my_sim = make_simulator(directory, mysim)
+    my_counter = Counter("MyCounter", mysim)
+    my_transformer = Transformer(name="MyTransformer", my_simulation_parameters=mysim)
+    my_transformer.connect_input(my_transformer.TransformerInput, "MyCounter", Counter.Output)
+    my_sim.add_component(my_counter)
+    my_sim.add_component(my_transformer)
+    if checkpoint is not None:
+        my_sim.load_checkpoint(checkpoint, warm_start=warm_start)
+    my_sim.run_all_timesteps()
+    return my_sim
+
+
+def test_checkpoint_resume_and_warm_start(tmp_path, monkeypatch):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.checkpoint_interval = 100
+    monkeypatch.setattr(Counter, "fail_at_timestep", 250)
+    written_records: List[Tuple[int, int]] = []
+    get_records = recording.ResultRecorder.get_records
+    def record_written_records(recorder, start, stop):
+        written_records.append((start, stop))
+        return get_records(recorder, start, stop)
+    monkeypatch.setattr(recording.ResultRecorder, "get_records", record_written_records)
+    with pytest.raises(Exception):
+        run_counter(tmp_path / "failed", mysim)
+    monkeypatch.setattr(Counter, "fail_at_timestep", -1)
+    checkpoint_directory = next((tmp_path / "failed" / "results").iterdir())
+    checkpoint = str(checkpoint_directory / "checkpoint.pkl")
+    # every checkpoint only appends the records since the previous one
+    assert written_records == [(0, 100), (100, 200), (200, 250)]
+
+    resumed = run_counter(tmp_path / "resumed", mysim, checkpoint=checkpoint)
+    assert (checkpoint_directory / sim.CHECKPOINT_RECORDS_FILENAME).stat().st_size == 250 * resumed.results.shape[1] * 8
+    expected = np.arange(1, mysim.timesteps + 1)
+    assert np.array_equal(resumed.results.values[:, 0], expected)
+    assert np.array_equal(resumed.results.values[:, 1], 5 * expected)
+
+    warm_started = run_counter(tmp_path / "warm", mysim, checkpoint=checkpoint, warm_start=True)
+    assert np.array_equal(warm_started.results.values[:, 0], expected + 250)
+
+
+def test_component_profile(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.profile_components = True
+    my_sim = run_counter(tmp_path / "profiled", mysim)
+    with open(os.path.join(my_sim.get_result_directory(), "component_profile.json")) as profile_file:
+        profile = json.load(profile_file)
+    methods = profile["components"]["MyCounter"]["methods"]
+    for method_name in sim.PROFILED_METHODS:
+        assert methods[method_name]["calls"] == mysim.timesteps
+        assert methods[method_name]["seconds"] >= 0
+    assert profile["iterations"]["total"] == mysim.timesteps
+    profile_table = pd.read_csv(os.path.join(my_sim.get_result_directory(), "component_profile.csv"))
+    assert len(profile_table) == 2 * len(sim.PROFILED_METHODS)
+    iterations = pd.read_csv(os.path.join(my_sim.get_result_directory(), "iterations_per_timestep.csv"))
+    assert (iterations["Iterations"] == 1).all()
+
+    # without profiling the methods of the wrappers are not replaced
+    mysim.profile_components = False
+    unprofiled = run_counter(tmp_path / "unprofiled", mysim)
+    assert "calculate_component" not in vars(unprofiled.WrappedComponents[0])
+    assert not os.path.exists(os.path.join(unprofiled.get_result_directory(), "component_profile.json"))
+
+
+def test_connection_index(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = make_simulator(tmp_path, mysim)
+    source = LinearFunction("Source", 1, 2, mysim)
+    target = LinearFunction("Target", 1, 0, mysim)
+    target.connect_input(target.Input, "Source", LinearFunction.Output)
+    source.connect_input(source.Input, "Target", LinearFunction.Output)
+    my_sim.add_component(target)
+    my_sim.add_component(source)
+    with pytest.raises(Exception):
+        my_sim.add_component(LinearFunction("Source", 1, 2, mysim))
+    my_sim.connect_all_components()
+    assert target.inputs[0].SourceIndex == source.output1.GlobalIndex
+    assert target.inputs[0].SourceOutput is source.output1
+    # the offset input is optional and not connected
+    assert target.inputs[1].SourceIndex == -1
+
+    stsv = cp.SingleTimeStepValues(len(my_sim.all_outputs))
+    stsv.values[:] = [3, 4]
+    assert stsv.get_input_value(target.inputs[0]) == 4
+    assert stsv.get_input_value(target.inputs[1]) == 0
+
+
+def test_feather_export(tmp_path):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    mysim.post_processing_options = [utils.PostProcessingOptions.Export_To_Feather]
+    my_sim = run_counter(tmp_path / "exported", mysim)
+    filename = os.path.join(my_sim.get_result_directory(), "results.feather")
+    results, metadata = utils.load_results(filename)
+    assert np.array_equal(results.values, my_sim.results.values)
+    assert list(results.index) == list(my_sim.results.index)
+    transformer_column = my_sim.results.columns[1]
+    assert metadata[transformer_column] == {"ObjectName": "MyTransformer", "FieldName": Transformer.TransformerOutput,
+                                            "LoadType": "Any", "Unit": "-"}
+
+    selected, _ = utils.load_results(filename, columns=[transformer_column])
+    assert list(selected.columns) == [transformer_column]
+
+    mysim.result_compression = "zstd"
+    compressed = run_counter(tmp_path / "compressed", mysim)
+    compressed_results, _ = utils.load_results(os.path.join(compressed.get_result_directory(), "results.feather"))
+    assert np.array_equal(compressed_results.values, results.values)
+
+
+def test_headless_run(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    files_before = set(tmp_path.iterdir())
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_counter = Counter("MyCounter", mysim)
+    my_transformer = Transformer(name="MyTransformer", my_simulation_parameters=mysim)
+    my_transformer.connect_input(my_transformer.TransformerInput, "MyCounter", Counter.Output)
+    my_sim.add_component(my_counter)
+    my_sim.add_component(my_transformer)
+    my_sim.add_kpi(kpis.Maximum("Peak", my_transformer.output1))
+    capsys.readouterr()
+    results = my_sim.run()
+
+    # nothing was logged during the simulation and no files were written from the construction on
+    assert capsys.readouterr().out == ""
+    assert set(tmp_path.iterdir()) == files_before
+    assert not log.file_logging
+    assert not (tmp_path / "results").exists()
+    expected = np.arange(1, mysim.timesteps + 1)
+    assert results.values is not None
+    assert results.values.shape == (mysim.timesteps, 3)
+    assert np.array_equal(results.get_column(my_transformer.output1.FullName), 5 * expected)
+    assert results.get_output_metadata()[1] == {"ObjectName": "MyTransformer", "FieldName": Transformer.TransformerOutput,
+                                                "LoadType": "Any", "Unit": "-"}
+    assert len(results.timeline) == mysim.timesteps
+    assert results.kpis == {"Peak": 5 * mysim.timesteps}
+    with pytest.raises(Exception):
+        my_sim.run_all_timesteps()
+
+    mysim.checkpoint_interval = 100
+    with pytest.raises(Exception):
+        my_sim.run()
+    # a simulator with a result directory writes the log files again
+    sim.Simulator(module_directory=str(tmp_path), setup_function="test_setup", my_simulation_parameters=mysim)
+    assert log.file_logging
+
+
+def test_rerun_with_overrides():
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_counter = Counter("MyCounter", mysim)
+    scaled = LinearFunction("Scaled", 2, 0, mysim)
+    scaled.connect_input(scaled.Input, "MyCounter", Counter.Output)
+    my_sim.add_component(my_counter)
+    my_sim.add_component(scaled)
+    my_sim.add_kpi(kpis.Sum("Total count", my_counter.output1))
+    expected = np.arange(1, mysim.timesteps + 1)
+    my_sim.enable_reruns()
+
+    first = my_sim.run()
+    assert np.array_equal(first.get_column(scaled.output1.FullName), 2 * expected)
+    plan = my_sim.execution_plan
+    # attributes that were added during a run are removed again
+    setattr(my_counter, "added_during_run", True)
+    # the counter and the KPI start again from their initial states
+    second = my_sim.rerun({"Scaled.slope": 3, "Scaled.offset": 1})
+    assert np.array_equal(second.get_column(scaled.output1.FullName), 3 * expected + 1)
+    assert second.kpis == first.kpis
+    assert my_sim.execution_plan == plan
+    assert not hasattr(my_counter, "added_during_run")
+    # the inputs and outputs are not copied
+    assert scaled.input1.SourceOutput is my_counter.output1
+    # the overrides do not carry over to the next rerun
+    third = my_sim.rerun(kpis_only=True)
+    assert third.values is None
+    assert scaled.slope == 2
+    assert third.kpis == first.kpis
+    # parameters that are set directly are kept when the simulation is reset
+    my_sim.set_parameter("Scaled.offset", 5)
+    fourth = my_sim.rerun()
+    assert np.array_equal(fourth.get_column(scaled.output1.FullName), 2 * expected + 5)
+
+    with pytest.raises(AttributeError):
+        my_sim.set_parameter("Scaled.slop", 3)
+    with pytest.raises(KeyError):
+        my_sim.set_parameter("Unknown.slope", 3)
+    with pytest.raises(Exception):
+        my_sim.add_component(Counter("AnotherCounter", mysim))
+
+    # the initial states are only stored if they are needed
+    other_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    other_sim.add_component(Counter("MyCounter", mysim))
+    other_sim.run()
+    assert other_sim.initial_state is None
+    with pytest.raises(Exception):
+        other_sim.reset()
+
+
+def test_reset_shares_time_series(capsys):
+    mysim = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=60)
+    my_sim = sim.Simulator(module_directory=None, setup_function="test_setup", my_simulation_parameters=mysim)
+    my_random = RandomNumbers("MyRandom", mysim.timesteps, 0, 1, mysim)
+    my_counter = Counter("MyCounter", mysim)
+    profile = np.arange(mysim.timesteps, dtype=np.float64)
+    setattr(my_counter, "profiles", {"steps": profile})
+    setattr(my_counter, "history", [0])
+    my_sim.add_component(my_random)
+    my_sim.add_component(my_counter)
+    my_sim.enable_reruns()
+    my_sim.run()
+    values = my_random.values
+    getattr(my_counter, "history").append(1)
+    my_sim.reset()
+
+    # the time series are shared instead of copied, the other attributes are restored
+    assert my_random.values is values
+    assert getattr(my_counter, "profiles")["steps"] is profile
+    assert getattr(my_counter, "history") == [0]
+    assert my_counter.count == 0
+    # changing parameters of components that calculate all timesteps in advance might have no effect
+    capsys.readouterr()
+    my_sim.set_parameter("MyCounter.count", 0)
+    assert capsys.readouterr().out == ""
+    my_sim.set_parameter("MyRandom.values", list(values))
+    assert "setting MyRandom.values might have no effect" in capsys.readouterr().out
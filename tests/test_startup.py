@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import time
+import hisim
+
+# modules that take long to import and are only needed for the post processing or on a cache miss
+HEAVY_MODULES = ["matplotlib", "matplotlib.pyplot", "reportlab", "seaborn", "tkinter", "pvlib.irradiance"]
+
+
+def run_python(code: str) -> str:
+    # the subprocess imports hisim from the same directory as the tests, even if it is not installed
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(hisim.__file__)))
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                          env=environment).stdout
+
+
+def get_loaded_heavy_modules(statement: str):
+    code = statement + "\nimport sys\nprint(','.join(m for m in " + repr(HEAVY_MODULES) + " if m in sys.modules))"
+    output = run_python(code)
+    return [module for module in output.strip().split(",") if module]
+
+
+def get_import_seconds(statement: str, repetitions: int = 3) -> float:
+    # the fastest of several runs is the least affected by other processes
+    durations = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        run_python(statement)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def test_simulator_import_is_lightweight():
+    # the import used to take several seconds because of the post processing
+    assert get_loaded_heavy_modules("import hisim.simulator") == []
+
+
+def test_component_import_does_not_load_pvlib():
+    loaded_modules = get_loaded_heavy_modules(
+        "import hisim.components.weather, hisim.components.pvs, hisim.components.building")
+    assert loaded_modules == []
+
+
+def test_simulator_import_time():
+    # numpy and pandas are needed by the simulator anyway and take most of its import time. Importing matplotlib
+    # as well takes more than twice as long as them, so the bound is relative to not depend on the machine.
+    baseline = get_import_seconds("import numpy, pandas")
+    duration = get_import_seconds("import hisim.simulator")
+    assert duration < 1.5 * baseline + 0.2, "importing hisim.simulator took {:.2f} s, numpy and pandas {:.2f} s".format(
+        duration, baseline)